@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tempfile
+import statistics
+import subprocess
+from eth_account import Account
+from mock_rpc import MockServer, CHAIN_ID
+from client import batch_request
+
+# Offline benchmark for the stake workflows, run against mock_rpc.py.
+#
+#   python3 bench.py                                   # every workflow, 3 runs each
+#   python3 bench.py --latency 0.05 --runs 5 status nominate
+#   python3 bench.py --save baseline.json
+#   python3 bench.py --compare baseline.json --max-regression 0.25
+#
+# Each workflow is the real script run as a subprocess (with its prompts
+# answered on stdin) against a mock node started in this process. Reported
+# per workflow: JSON-RPC round trips (HTTP requests) and calls seen by the
+# mock, wall time, and the script's CPU time (user + system). Times are the
+# median over --runs. By default the mock mines each transaction as it
+# arrives, so round trips do not depend on block timing and are the same on
+# every run.
+#
+# --compare exits non-zero when a workflow now makes more round trips than
+# the baseline, or when its wall or CPU time grew by more than --max-regression.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+STAKE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fixed test account, so runs are reproducible
+BENCH_KEY = "0x" + "42" * 32
+PAYEE_ADDRESS = "0x000000000000000000000000000000000000dEaD"
+SESSION_KEYS = "0x" + "ab" * 96
+
+# Workflow -> (script, stdin answering its prompts)
+WORKFLOWS = {
+    "status": ("status.py", ""),
+    "stake": ("stake.py", "1\n"),
+    "nominate": ("nominate.py", ""),
+    "change-commission": ("change-commission.py", "1\n5\n"),
+    "setPayee": ("change-stake-addres.py", f"{PAYEE_ADDRESS}\n"),
+    "setKeys": ("zen.py", ""),
+    "rewards": ("rewards.py", ""),
+    "broadcast-rejected": ("broadcast.py", ""),
+}
+
+# Workflows run with arguments or expected to exit non-zero: name -> (arguments, exit code).
+# "{workdir}" in an argument is the benchmark's temporary directory.
+WORKFLOW_ARGS = {
+    # Every send is rejected (wrong chain id), so --wait has nothing to wait for
+    "broadcast-rejected": (["{workdir}/rejected.jsonl", "--wait", "--timeout", "5"], 1),
+}
+
+
+# Signed transactions for the broadcast-rejected workflow, signed for another chain
+def write_rejected(path, account):
+    with open(path, 'w') as file:
+        for nonce in range(3):
+            signed = account.sign_transaction({
+                'chainId': CHAIN_ID + 1, 'nonce': nonce, 'to': PAYEE_ADDRESS, 'value': 0,
+                'gas': 21000, 'gasPrice': 10 ** 9,
+            })
+            file.write(json.dumps({
+                "account": account.address, "nonce": nonce, "function": "transfer",
+                "tx_hash": "0x" + signed.hash.hex(), "raw": "0x" + signed.raw_transaction.hex(),
+            }) + "\n")
+
+
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_workflow(name, rpc_url, env, workdir):
+    script, stdin = WORKFLOWS[name]
+    args, exit_code = WORKFLOW_ARGS.get(name, ([], 0))
+    batch_request([("mock_reset", [])], rpc_url)
+
+    cpu_before = child_cpu_seconds()
+    started = time.perf_counter()
+    argv = [sys.executable, os.path.join(STAKE_DIR, script)] + [arg.format(workdir=workdir) for arg in args]
+    proc = subprocess.run(argv, input=stdin,
+                          capture_output=True, text=True, env=env, cwd=STAKE_DIR)
+    wall = time.perf_counter() - started
+    cpu = child_cpu_seconds() - cpu_before
+
+    stats = batch_request([("mock_stats", [])], rpc_url)[0]
+    return {
+        "ok": proc.returncode == exit_code and "Traceback" not in proc.stderr,
+        "round_trips": stats["requests"],
+        "calls": stats["calls"],
+        "methods": stats["methods"],
+        "wall": wall,
+        "cpu": cpu,
+        "output": proc.stdout[-2000:] + proc.stderr[-2000:],
+    }
+
+
+def summarize(name, runs):
+    return {
+        "workflow": name,
+        "ok": all(run["ok"] for run in runs),
+        "runs": len(runs),
+        "round_trips": max(run["round_trips"] for run in runs),
+        "calls": max(run["calls"] for run in runs),
+        "wall_seconds": round(statistics.median(run["wall"] for run in runs), 4),
+        "cpu_seconds": round(statistics.median(run["cpu"] for run in runs), 4),
+        "methods": runs[-1]["methods"],
+    }
+
+
+# Regressions of result against baseline (both summaries of one workflow)
+def regressions(result, baseline, max_regression):
+    found = []
+    if result["round_trips"] > baseline["round_trips"]:
+        found.append(f"round trips {baseline['round_trips']} -> {result['round_trips']}")
+    for field in ("wall_seconds", "cpu_seconds"):
+        if baseline[field] and result[field] > baseline[field] * (1 + max_regression):
+            found.append(f"{field.split('_')[0]} {baseline[field]:.3f}s -> {result[field]:.3f}s")
+    return found
+
+
+def print_table(results, baseline):
+    print(f"{'workflow':<20}{'ok':<5}{'round trips':>12}{'calls':>8}{'wall (s)':>11}{'cpu (s)':>10}")
+    for result in results:
+        line = (f"{result['workflow']:<20}{'yes' if result['ok'] else 'NO':<5}{result['round_trips']:>12}"
+                f"{result['calls']:>8}{result['wall_seconds']:>11.3f}{result['cpu_seconds']:>10.3f}")
+        base = baseline.get(result["workflow"])
+        if base:
+            line += (f"   (baseline {base['round_trips']} trips, {base['wall_seconds']:.3f}s wall,"
+                     f" {base['cpu_seconds']:.3f}s cpu)")
+        print(f"{line}" if result["ok"] else f"{RED}{line}{RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stake workflows against a local mock node")
+    parser.add_argument("workflows", nargs="*", help=f"workflows to run (default: all of {', '.join(WORKFLOWS)})")
+    parser.add_argument("--runs", type=int, default=3, help="runs per workflow; times are the median")
+    parser.add_argument("--block-time", type=float, default=0, help="mock block time in seconds (0 = mine on arrival)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock latency per HTTP request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock calls that fail")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the mock's jitter and failures")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the chain cache between runs")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier --save")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed relative time increase for --compare")
+    parser.add_argument("--verbose", action="store_true", help="print script output for failed runs")
+    args = parser.parse_args()
+
+    names = args.workflows or list(WORKFLOWS)
+    unknown = [name for name in names if name not in WORKFLOWS]
+    if unknown:
+        print(f"Unknown workflow: {', '.join(unknown)}")
+        sys.exit(2)
+
+    baseline = {}
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as file:
+                baseline = {entry["workflow"]: entry for entry in json.load(file)["results"]}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to load baseline: {e}")
+            sys.exit(1)
+
+    server = MockServer(latency=args.latency, jitter=args.jitter, block_time=args.block_time,
+                        error_rate=args.error_rate, seed=args.seed).start()
+    account = Account.from_key(BENCH_KEY)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        priv_data = os.path.join(workdir, "priv-data.txt")
+        with open(priv_data, 'w') as file:
+            file.write(f"MY_ADDRESS={account.address}\nPRIVATE_KEY={BENCH_KEY}\nSESSION_KEYS={SESSION_KEYS}\n")
+        cache_path = os.path.join(workdir, "chain-cache.sqlite")
+        write_rejected(os.path.join(workdir, "rejected.jsonl"), account)
+
+        env = dict(os.environ)
+        env.pop("ZENCHAIN_RPC_URLS", None)
+        env.update({
+            "ZENCHAIN_RPC_URL": server.url,
+            "ZENCHAIN_WS_URL": "",
+            "ZENCHAIN_PRIV_DATA": priv_data,
+            "ZENCHAIN_CACHE_PATH": cache_path,
+            "ZENCHAIN_JOURNAL_PATH": os.path.join(workdir, "tx-journal.sqlite"),
+            "ZENCHAIN_BLOCK_TIME": str(args.block_time or 1),
+            "ZENCHAIN_RECEIPT_TIMEOUT": "60",
+        })
+
+        for name in names:
+            runs = []
+            for _ in range(args.runs):
+                if not args.warm_cache:
+                    for suffix in ("", "-wal", "-shm"):
+                        if os.path.exists(cache_path + suffix):
+                            os.remove(cache_path + suffix)
+                run = run_workflow(name, server.url, env, workdir)
+                if not run["ok"] and args.verbose:
+                    print(f"{RED}{name} failed:{RESET}\n{run['output']}")
+                runs.append(run)
+            results.append(summarize(name, runs))
+
+    server.stop()
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({
+                "settings": {
+                    "runs": args.runs, "block_time": args.block_time, "latency": args.latency,
+                    "jitter": args.jitter, "error_rate": args.error_rate, "seed": args.seed,
+                    "warm_cache": args.warm_cache, "python": sys.version.split()[0],
+                },
+                "results": results,
+            }, file, indent=2)
+        print(f"Results written to {args.save}")
+
+    failed = [result["workflow"] for result in results if not result["ok"]]
+    regressed = {}
+    for result in results:
+        if result["workflow"] in baseline:
+            found = regressions(result, baseline[result["workflow"]], args.max_regression)
+            if found:
+                regressed[result["workflow"]] = found
+
+    if failed and not args.error_rate:
+        print(f"{RED}Failed workflows: {', '.join(failed)}{RESET}")
+    for name, found in regressed.items():
+        print(f"{RED}Regression in {name}: {'; '.join(found)}{RESET}")
+    if (failed and not args.error_rate) or regressed:
+        sys.exit(1)
+    if args.compare:
+        print(f"{GREEN}No regressions against {args.compare}{RESET}")
+
+
+if __name__ == "__main__":
+    main()
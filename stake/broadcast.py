@@ -0,0 +1,121 @@
+import sys
+import json
+import time
+import argparse
+from client import get_web3, batch_request, RPCError
+from receipts import ReceiptTracker
+
+# Broadcast stage for transactions signed offline by sign-batch.py.
+#
+#   python3 broadcast.py signed.jsonl --rate 20 --batch-size 10 --report sent.jsonl --wait
+#
+# Transactions are sent in file order (so each account's nonces stay in
+# sequence) as JSON-RPC batches, paced to at most --rate transactions per second.
+# A batch holds at most one transaction per account; an account's later
+# transactions are skipped once one of its transactions is rejected.
+
+
+def load_signed(path):
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broadcast pre-signed ZenChain transactions at a controlled rate")
+    parser.add_argument("signed_file", help="output of sign-batch.py")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the configured endpoints, see client.py)")
+    parser.add_argument("--rate", type=float, default=10, help="transactions per second")
+    parser.add_argument("--batch-size", type=int, default=10, help="transactions per JSON-RPC batch")
+    parser.add_argument("--report", help="write one result line per transaction to this file")
+    parser.add_argument("--wait", action="store_true", help="wait for receipts after sending")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for receipts")
+    args = parser.parse_args()
+
+    try:
+        entries = load_signed(args.signed_file)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load signed transactions: {e}")
+        sys.exit(1)
+
+    results = [None] * len(entries)
+    # An account whose transaction was rejected would leave a nonce gap, so stop sending for it.
+    # Each batch carries at most one transaction per account, so a rejection is known before
+    # that account's next nonce goes out.
+    stopped_accounts = set()
+    pending = list(range(len(entries)))
+    next_send = time.monotonic()
+
+    while pending:
+        batch, deferred, in_batch = [], [], set()
+        for position, i in enumerate(pending):
+            if len(batch) >= args.batch_size:
+                deferred.extend(pending[position:])
+                break
+            account = entries[i]["account"].lower()
+            if account in stopped_accounts:
+                results[i] = dict(entries[i], status="skipped", error="earlier transaction for this account was rejected")
+            elif account in in_batch:
+                deferred.append(i)
+            else:
+                in_batch.add(account)
+                batch.append(i)
+        pending = deferred
+        if not batch:
+            continue
+
+        time.sleep(max(0, next_send - time.monotonic()))
+        next_send = max(next_send, time.monotonic()) + len(batch) / args.rate
+
+        try:
+            replies = batch_request([("eth_sendRawTransaction", [entries[i]["raw"]]) for i in batch], args.rpc_url)
+        except Exception as e:
+            replies = [RPCError({'message': str(e)})] * len(batch)
+
+        for i, reply in zip(batch, replies):
+            entry = entries[i]
+            if isinstance(reply, RPCError):
+                # The node already has it (e.g. a re-run): treat as sent
+                if "already known" in str(reply).lower():
+                    results[i] = dict(entry, status="sent")
+                    continue
+                stopped_accounts.add(entry["account"].lower())
+                results[i] = dict(entry, status="rejected", error=str(reply))
+                print(f"Rejected {entry['function']} for {entry['account']} (nonce {entry['nonce']}): {reply}")
+            else:
+                results[i] = dict(entry, status="sent")
+
+        sent = sum(1 for result in results if result and result["status"] == "sent")
+        print(f"Sent {sent}/{len(entries)} transactions", end="\r")
+    print()
+
+    if args.wait:
+        tracker = ReceiptTracker(get_web3(args.rpc_url), rpc_url=args.rpc_url)
+        sent_hashes = [result["tx_hash"] for result in results if result["status"] == "sent"]
+        receipts = tracker.wait(sent_hashes, timeout=args.timeout)
+        for result in results:
+            if result["status"] != "sent":
+                continue
+            receipt = receipts.get(result["tx_hash"])
+            if receipt is None:
+                result["status"] = "pending"
+            else:
+                result["status"] = "success" if receipt["status"] == 1 else "failed"
+                result["block"] = receipt["blockNumber"]
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        result.pop("raw", None)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+    if args.report:
+        with open(args.report, 'w') as out:
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+
+    if any(result["status"] not in ("sent", "success") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
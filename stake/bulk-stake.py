@@ -0,0 +1,408 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor
+from eth_account import Account
+from web3 import Web3
+from client import get_web3, batch_request, RPCError
+from nonce_manager import TxPipeline
+from receipts import ReceiptTracker
+from fees import get_estimator, get_oracle
+from key_client import agent_keys, is_agent_key, AgentError
+from simulate import SIMULATE, simulate, prime_estimator
+from tx_journal import get_journal, JournalError
+from staking_abi import COMMISSION_PER_PERCENT, FUNCTIONS, NATIVE_STAKING_ADDRESS, NATIVE_STAKING_ABI, KEY_MANAGER_ABI, encode_call
+
+# Non-interactive bulk executor for staking operations across many accounts.
+#
+#   python3 bulk-stake.py ops.jsonl --keys keys.csv --concurrency 16 --rate 10 --report results.jsonl
+#   python3 bulk-stake.py ops.jsonl --keys keys.csv --dry-run
+#
+# ops.jsonl holds one operation per line, run in file order per account:
+#   {"account": "0x...", "function": "bondExtra", "amount": 2.5}                 # ZCX
+#   {"account": "0x...", "function": "validate", "commission": 5}               # percent, like change-commission.py
+#   {"account": "0x...", "function": "setPayee", "payee": "0x..."}
+#   {"account": "0x...", "function": "nominate", "targets": ["0x...", "0x..."]}
+#   {"account": "0x...", "function": "nominate", "targets": "auto"}             # validator_planner.py picks them
+#   {"account": "0x...", "function": "unbond", "args": [1000000000000000000]}  # raw ABI arguments
+#
+# keys.csv holds one "address,private_key" pair per line (same file as sign-batch.py).
+# With --agent, keys held by key-agent.py are used as well (see key_client.py).
+#
+# The whole manifest is checked before anything is sent, and every operation
+# is simulated (eth_call + eth_estimateGas at the pending block, in batches,
+# see simulate.py); operations that would revert are dropped with their
+# revert reason instead of being signed and mined as failures. An operation
+# that only fails after an earlier one in its lane is kept, and simulated
+# again once the operation before it is mined. Every account then
+# gets its own nonce lane (a TxPipeline: one nonce lookup, then local nonces),
+# and up to --concurrency lanes run at once. All broadcasts share one
+# --rate limit. A rejected broadcast stops its lane, because later nonces
+# would only queue behind the gap. Receipts for every lane are collected
+# in one batched wait at the end, and each operation gets a line in the report.
+#
+# Every operation is a step in the transaction journal (see tx_journal.py),
+# keyed by the manifest path. Running the same manifest again after a crash
+# or a partial failure settles whatever was in flight against the chain and
+# sends only the operations that are not confirmed yet; the others are
+# reported as success with "resumed": true.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+# Functions a manifest may use
+BULK_FUNCTIONS = ("bondExtra", "unbond", "validate", "setPayee", "nominate", "chill", "setKeys")
+
+
+# Broadcasts per second shared by every lane
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        time.sleep(max(0, slot - now))
+
+
+def load_keys(path):
+    keys = {}
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            address, private_key = [part.strip() for part in line.split(',', 1)]
+            keys[address.lower()] = private_key
+    return keys
+
+
+def to_wei(amount):
+    return int(Decimal(str(amount)) * 10**18)
+
+
+# Manifest entry -> ABI arguments for its function
+def operation_args(entry, auto_targets):
+    function = entry["function"]
+    if "args" in entry:
+        return list(entry["args"])
+    if function in ("bondExtra", "unbond"):
+        return [to_wei(entry["amount"])]
+    if function == "validate":
+        commission = int(Decimal(str(entry["commission"])) * COMMISSION_PER_PERCENT)
+        return [commission, bool(entry.get("blocked", False))]
+    if function == "setPayee":
+        return [Web3.to_checksum_address(entry["payee"])]
+    if function == "nominate":
+        targets = entry["targets"]
+        if targets == "auto":
+            targets = auto_targets()
+        return [[Web3.to_checksum_address(target) for target in targets]]
+    if function == "setKeys":
+        return [entry["keys"]]
+    return []
+
+
+# Read and check the manifest: returns {account: [operation, ...]} in file order
+def plan_operations(path, keys):
+    planned_targets = []
+
+    def auto_targets():
+        if not planned_targets:
+            from validator_planner import plan_targets
+            planned_targets.extend(plan_targets())
+            if not planned_targets:
+                raise ValueError("validator planner found no eligible targets")
+        return planned_targets
+
+    lanes = {}
+    with open(path, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+                function = entry["function"]
+                if function not in BULK_FUNCTIONS:
+                    raise ValueError(f"unknown function {function}")
+                account = Web3.to_checksum_address(entry["account"])
+                if account.lower() not in keys:
+                    raise ValueError(f"no key for {account}")
+                args = operation_args(entry, auto_targets)
+                # Encoding checks argument count, types and ranges before anything is sent
+                encode_call(function, *args)
+            except (ValueError, KeyError, TypeError, InvalidOperation) as e:
+                raise ValueError(f"line {line_number}: {e!r}")
+            lanes.setdefault(account, []).append({
+                "line": line_number,
+                "account": account,
+                "function": function,
+                "args": args,
+                "status": "planned",
+            })
+    return lanes
+
+
+class BulkExecutor:
+    def __init__(self, w3, keys, rpc_url=None, concurrency=16, rate=10):
+        self.w3 = w3
+        self.keys = keys
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.tracker = ReceiptTracker(w3, rpc_url=rpc_url)
+        self.estimator = get_estimator(w3)
+        self.oracle = get_oracle(rpc_url)
+        self.contracts = {
+            NATIVE_STAKING_ADDRESS: w3.eth.contract(address=NATIVE_STAKING_ADDRESS, abi=NATIVE_STAKING_ABI),
+        }
+        self.contracts[FUNCTIONS["setKeys"][0]] = w3.eth.contract(address=FUNCTIONS["setKeys"][0], abi=KEY_MANAGER_ABI)
+        self.journal_run = None
+        self.sent = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def _function(self, operation):
+        contract = self.contracts[FUNCTIONS[operation["function"]][0]]
+        return getattr(contract.functions, operation["function"])(*operation["args"])
+
+    # Broadcast one account's operations in order on its own nonces
+    def run_lane(self, account, operations):
+        private_key = self.keys[account.lower()]
+        try:
+            matches = is_agent_key(private_key) or Account.from_key(private_key).address == account
+        except ValueError:
+            matches = False
+        if not matches:
+            for operation in operations:
+                if operation["status"] == "planned":
+                    operation.update(status="rejected", error="private key does not match account")
+            return
+        pipeline = TxPipeline(self.w3, account, private_key, tracker=self.tracker, estimator=self.estimator,
+                              oracle=self.oracle)
+        last_hash = None
+        for i, operation in enumerate(operations):
+            if operation["status"] != "planned":
+                continue
+            if "recheck" in operation and not self.recheck(operation, last_hash):
+                continue
+            self.limiter.wait()
+            started = time.monotonic()
+            steps = [self.journal_run.step(operation["_step"])] if self.journal_run else None
+            try:
+                [(nonce, tx_hash)] = pipeline.send([self._function(operation)], steps=steps)
+            except Exception as e:
+                # Anything that stops this send (rejected broadcast, gas price or
+                # nonce lookup failing) ends only this lane; the run still reports
+                operation.update(status="rejected", error=str(e))
+                for later in operations[i + 1:]:
+                    if later["status"] == "planned":
+                        later.update(status="skipped", error="earlier operation for this account was rejected")
+                return
+            operation.update(status="sent", nonce=nonce, tx_hash="0x" + bytes(tx_hash).hex(),
+                             broadcast_seconds=round(time.monotonic() - started, 3))
+            last_hash = operation["tx_hash"]
+            with self._lock:
+                self.sent += 1
+                print(f"Broadcast {self.sent}/{self.total}", end="\r", flush=True)
+
+    # Simulate an operation again once the lane's previous transaction is mined;
+    # drops it and returns False when it still fails
+    def recheck(self, operation, last_hash):
+        del operation["recheck"]
+        if last_hash is not None:
+            self.tracker.wait([last_hash])
+        [result] = simulate([(operation["account"], operation["function"], operation["args"])], self.tracker.rpc_url)
+        if result["ok"] is False:
+            operation.update(status="dropped", error=result["reason"])
+            return False
+        return True
+
+    # Wait for every sent operation and record its outcome
+    def collect(self, operations, timeout):
+        sent = [operation for operation in operations if operation["status"] == "sent"]
+        receipts = self.tracker.wait([operation["tx_hash"] for operation in sent], timeout=timeout)
+
+        missing = [operation for operation in sent if receipts.get(operation["tx_hash"]) is None]
+        mined_nonces = {}
+        if missing:
+            accounts = sorted({operation["account"] for operation in missing})
+            counts = batch_request([("eth_getTransactionCount", [account, "latest"]) for account in accounts],
+                                   self.tracker.rpc_url)
+            mined_nonces = {account: int(count, 16) for account, count in zip(accounts, counts)
+                            if not isinstance(count, RPCError)}
+
+        for operation in sent:
+            receipt = receipts.get(operation["tx_hash"])
+            if receipt is not None:
+                operation["status"] = "success" if receipt["status"] == 1 else "failed"
+                operation["block"] = receipt["blockNumber"]
+                operation["gas_used"] = receipt["gasUsed"]
+            elif operation["nonce"] < mined_nonces.get(operation["account"], -1):
+                # The nonce was used by a different transaction
+                operation["status"] = "replaced"
+            else:
+                operation["status"] = "pending"
+
+        if self.journal_run is not None:
+            for operation in sent:
+                if operation["status"] in ("success", "failed"):
+                    self.journal_run.finish(operation["_step"], int(operation["status"] == "success"),
+                                            operation["block"])
+                elif operation["status"] == "replaced":
+                    self.journal_run.replaced(operation["_step"])
+            self.journal_run.close_if_done()
+
+    # Open the journal run for this manifest and settle what an earlier attempt
+    # left in flight; operations already confirmed are marked success
+    def resume(self, path, lanes):
+        operations = sorted((operation for lane in lanes.values() for operation in lane),
+                            key=lambda operation: operation["line"])
+        calls = []
+        for i, operation in enumerate(operations):
+            operation["_step"] = i
+            calls.append((operation["account"], FUNCTIONS[operation["function"]][0],
+                          encode_call(operation["function"], *operation["args"])))
+        run = get_journal().open("bulk-stake", calls, key=os.path.realpath(path))
+        self.journal_run = run
+        if not run.resumed:
+            return 0
+        run.recover(self.tracker, self.tracker.rpc_url)
+        resumed = 0
+        for operation, step in zip(operations, run.steps()):
+            if step["state"] == "confirmed":
+                operation.update(status="success", resumed=True, nonce=step["nonce"], tx_hash=step["tx_hash"],
+                                 block=step["block"])
+                resumed += 1
+        run.close_if_done()
+        return resumed
+
+    def run(self, lanes, timeout):
+        operations = [operation for lane in lanes.values() for operation in lane]
+        self.total = sum(operation["status"] == "planned" for operation in operations)
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as executor:
+            list(executor.map(lambda item: self.run_lane(*item), lanes.items()))
+        print()
+        self.collect(operations, timeout)
+        return operations
+
+
+# Simulate every planned operation; doomed ones are marked dropped, and those
+# that only fail after an earlier operation in their lane get "recheck" with
+# the reason (see BulkExecutor.recheck). Returns (calls, results).
+def simulate_operations(lanes, rpc_url=None):
+    operations = [operation for lane in lanes.values() for operation in lane if operation["status"] == "planned"]
+    calls = [(operation["account"], operation["function"], operation["args"]) for operation in operations]
+    results = simulate(calls, rpc_url)
+    for operation, result in zip(operations, results):
+        if result["ok"] is not False:
+            continue
+        if result["after"] is None:
+            operation.update(status="dropped", error=result["reason"])
+        else:
+            operation["recheck"] = result["reason"]
+    return calls, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run staking operations for many accounts without prompts")
+    parser.add_argument("manifest", help="JSON lines file of operations")
+    parser.add_argument("--keys", help="CSV file of address,private_key")
+    parser.add_argument("--agent", action="store_true", help="sign with the keys held by key-agent.py")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the configured endpoints, see client.py)")
+    parser.add_argument("--concurrency", type=int, default=16, help="accounts broadcasting at once")
+    parser.add_argument("--rate", type=float, default=10, help="transactions per second over all accounts")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for receipts after sending")
+    parser.add_argument("--report", help="write one result line per operation to this file")
+    parser.add_argument("--dry-run", action="store_true", help="check and simulate the manifest, send nothing")
+    parser.add_argument("--no-simulate", action="store_true", default=not SIMULATE,
+                        help="skip the eth_call / estimate_gas dry run")
+    args = parser.parse_args()
+
+    if not args.keys and not args.agent:
+        parser.error("give --keys, --agent or both")
+    try:
+        keys = load_keys(args.keys) if args.keys else {}
+        if args.agent:
+            keys.update(agent_keys())
+        lanes = plan_operations(args.manifest, keys)
+    except (OSError, ValueError, AgentError) as e:
+        print(f"{RED}Failed to load manifest or keys: {e}{RESET}")
+        sys.exit(1)
+
+    counts = {}
+    for lane in lanes.values():
+        for operation in lane:
+            counts[operation["function"]] = counts.get(operation["function"], 0) + 1
+    total = sum(counts.values())
+    print(f"{total} operations for {len(lanes)} accounts: "
+          f"{', '.join(f'{function} {count}' for function, count in sorted(counts.items()))}")
+    if not total:
+        return
+
+    started = time.monotonic()
+    executor = None
+    if not args.dry_run:
+        executor = BulkExecutor(get_web3(args.rpc_url), keys, args.rpc_url, args.concurrency, args.rate)
+        try:
+            resumed = executor.resume(args.manifest, lanes)
+        except JournalError as e:
+            print(f"{RED}{e}{RESET}")
+            sys.exit(1)
+        if resumed:
+            print(f"Resuming an unfinished run of {args.manifest}: {resumed}/{total} operations already confirmed "
+                  f"({time.monotonic() - started:.2f}s)")
+
+    simulated = None
+    if not args.no_simulate:
+        simulated = simulate_operations(lanes, args.rpc_url)
+        dropped = [operation for lane in lanes.values() for operation in lane if operation["status"] == "dropped"]
+        for operation in dropped:
+            print(f"{RED}Line {operation['line']}: {operation['function']} for {operation['account']} "
+                  f"would fail: {operation['error']}{RESET}")
+        recheck = [operation for lane in lanes.values() for operation in lane if "recheck" in operation]
+        for operation in recheck:
+            print(f"Line {operation['line']}: {operation['function']} for {operation['account']} "
+                  f"fails before the operations ahead of it are mined ({operation['recheck']}), "
+                  f"it is checked again once they are")
+        print(f"Simulated {len(simulated[0])} operations in {time.monotonic() - started:.2f}s, "
+              f"{len(dropped)} would fail, {len(recheck)} to check again")
+    if args.dry_run:
+        return
+
+    if simulated is not None:
+        prime_estimator(executor.estimator, *simulated)
+    operations = executor.run(lanes, args.timeout)
+    elapsed = time.monotonic() - started
+
+    outcome = {}
+    for operation in operations:
+        outcome[operation["status"]] = outcome.get(operation["status"], 0) + 1
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(outcome.items()))
+    ok = outcome.get("success", 0) == len(operations)
+    print(f"{GREEN if ok else RED}{summary} ({elapsed:.1f}s){RESET}")
+
+    for operation in operations:
+        operation.pop("_step", None)
+        operation.pop("recheck", None)
+    if args.report:
+        with open(args.report, 'w') as out:
+            for operation in sorted(operations, key=lambda operation: operation["line"]):
+                out.write(json.dumps(operation) + "\n")
+        print(f"Report written to {args.report}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
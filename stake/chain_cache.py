@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# On-disk cache shared by the stake scripts and monitoring loops (override with ZENCHAIN_CACHE_PATH)
+CACHE_PATH = os.environ.get("ZENCHAIN_CACHE_PATH", os.path.expanduser("~/.cache/zenchain/chain-cache.sqlite"))
+
+# Seconds a cached activeEra is trusted before it is read from the chain again
+ERA_TTL = float(os.environ.get("ZENCHAIN_ERA_TTL", "600"))
+
+
+# SQLite cache for values that change rarely or never.
+#
+# Every entry is stored with an era:
+#   era=None   immutable (chain id, finalized past-era data), kept forever
+#   era=N      valid only while N is the active era; dropped when the era changes
+#
+# Keys are built from the call data plus the block or era they were read at,
+# so one file can be shared by several processes (WAL mode).
+class ChainCache:
+    def __init__(self, path=CACHE_PATH, era_ttl=ERA_TTL):
+        self.era_ttl = era_ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, era INTEGER, value TEXT NOT NULL, stored REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL, stored REAL NOT NULL)"
+            )
+
+    # Cache key for an eth_call (or any RPC method) at a given block or era tag
+    @staticmethod
+    def key(to, data, tag=""):
+        return hashlib.sha256(f"{to.lower()}|{data}|{tag}".encode()).hexdigest()
+
+    def get(self, key, era=None):
+        with self._lock:
+            row = self._db.execute("SELECT era, value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        stored_era, value = row
+        if stored_era is not None and stored_era != era:
+            return None
+        return json.loads(value)
+
+    def put(self, key, value, era=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, era, value, stored) VALUES (?, ?, ?, ?)",
+                (key, era, json.dumps(value), time.time()),
+            )
+
+    # Last activeEra read from the chain, or None once it is older than era_ttl
+    def active_era(self):
+        with self._lock:
+            row = self._db.execute("SELECT value, stored FROM meta WHERE name = 'active_era'").fetchone()
+        if row is None or time.time() - row[1] > self.era_ttl:
+            return None
+        return int(row[0])
+
+    # Record a fresh activeEra; a new era drops every entry tied to an older one
+    def set_era(self, era):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'active_era'").fetchone()
+            if row is None or int(row[0]) != era:
+                self._db.execute("DELETE FROM entries WHERE era IS NOT NULL AND era != ?", (era,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (name, value, stored) VALUES ('active_era', ?, ?)",
+                (str(era), time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+# ANSI escape codes for green text
+GREEN = "\033[92m"
+RESET = "\033[0m"  # Reset to default color
+
+
+# Set the ZenChain RPC URL (one place for every script, override with ZENCHAIN_RPC_URL)
+RPC_URL = os.environ.get("ZENCHAIN_RPC_URL", "https://zenchain-testnet.api.onfinality.io/public")
+
+# Endpoints for the RPC router, comma separated (override with ZENCHAIN_RPC_URLS).
+# Without it an explicit ZENCHAIN_RPC_URL is used on its own; otherwise the local
+# node started by run_node in zenchain.sh comes first, backed by the public endpoint.
+LOCAL_NODE_URL = "http://localhost:9944"
+if os.environ.get("ZENCHAIN_RPC_URLS"):
+    RPC_URLS = [url.strip() for url in os.environ["ZENCHAIN_RPC_URLS"].split(",") if url.strip()]
+elif "ZENCHAIN_RPC_URL" in os.environ:
+    RPC_URLS = [RPC_URL]
+else:
+    RPC_URLS = [LOCAL_NODE_URL, RPC_URL]
+
+# Connection pool size and request timeout (seconds) for the shared HTTP session
+POOL_SIZE = int(os.environ.get("ZENCHAIN_POOL_SIZE", "10"))
+TIMEOUT = float(os.environ.get("ZENCHAIN_RPC_TIMEOUT", "30"))
+
+# Set ZENCHAIN_PREFLIGHT=1 to run the is_connected / balance checks before each action
+PREFLIGHT = os.environ.get("ZENCHAIN_PREFLIGHT", "0") == "1"
+
+
+_session = None
+_router = None
+_web3_instances = {}
+
+
+# Keep-alive session shared by every provider in this process
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
+# Router over RPC_URLS (see rpc_router.py), or None when there is only one endpoint
+def get_router():
+    global _router
+    if _router is None and len(RPC_URLS) > 1:
+        from rpc_router import Router
+        _router = Router(RPC_URLS, get_session(), TIMEOUT)
+    return _router
+
+
+# Endpoint for a script that talks to one URL directly (the async fleet scan):
+# the router's best in-sync endpoint when several are configured, else RPC_URLS[0]
+def read_url():
+    router = get_router()
+    if router is not None:
+        return router.candidates()[0].url
+    return RPC_URLS[0]
+
+
+# Return the pooled Web3 instance for rpc_url. Without an rpc_url it uses the
+# router when several endpoints are configured, else RPC_URL.
+def get_web3(rpc_url=None):
+    router = get_router() if rpc_url is None else None
+    key = "router" if router is not None else (rpc_url or RPC_URLS[0])
+    w3 = _web3_instances.get(key)
+    if w3 is None:
+        # eth_chainId never changes, so web3's own per-call chain id checks are answered from memory
+        options = dict(request_kwargs={'timeout': TIMEOUT}, session=get_session(),
+                       cache_allowed_requests=True, cacheable_requests={"eth_chainId"})
+        if router is not None:
+            from rpc_router import RoutedHTTPProvider
+            provider = RoutedHTTPProvider(router, **options)
+        else:
+            provider = Web3.HTTPProvider(key, **options)
+        w3 = Web3(provider)
+        _web3_instances[key] = w3
+    return w3
+
+
+# Optional connection and balance check, only runs when PREFLIGHT is enabled
+def preflight(w3, address, min_balance=None):
+    if not PREFLIGHT:
+        return
+
+    # Check if connected to the ZenChain network
+    if not w3.is_connected():
+        print('Not connected to ZenChain')
+        sys.exit(1)
+
+    if not w3.is_address(address):
+        print(f"Invalid address: {address}")
+        return
+
+    try:
+        balance = w3.eth.get_balance(address)
+        balance_in_ether = w3.from_wei(balance, 'ether')
+        print(f"{GREEN}Balance for {address}: {balance_in_ether} ZCX{RESET}")
+    except Exception as e:
+        print(f"Error getting balance: {e}")
+        return
+
+    if min_balance is not None and balance_in_ether < min_balance:
+        print(f"{GREEN}You need to deposit at least {min_balance} token to proceed.{RESET}")
+        sys.exit(1)
+
+
+# Error returned by the node for a single call inside a batch
+class RPCError(Exception):
+    def __init__(self, error):
+        self.code = error.get('code')
+        self.data = error.get('data')
+        super().__init__(error.get('message', str(error)))
+
+
+def _batch_payload(calls):
+    return [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+
+
+# Match batch replies back to their calls by id
+def _batch_results(replies, count):
+    # Nodes without batch support answer with a single error object
+    if not isinstance(replies, list):
+        raise RPCError(replies.get('error', {'message': f"Unexpected batch response: {replies}"}))
+
+    by_id = {reply.get('id'): reply for reply in replies}
+    results = []
+    for i in range(count):
+        reply = by_id.get(i)
+        if reply is None:
+            results.append(RPCError({'message': f"No reply for batch call {i}"}))
+        elif 'error' in reply:
+            results.append(RPCError(reply['error']))
+        else:
+            results.append(reply.get('result'))
+    return results
+
+
+# Send several JSON-RPC calls as one HTTP request (one round trip).
+# calls is a list of (method, params); returns the results in the same order,
+# with an RPCError in place of any call the node rejected.
+# Without an rpc_url the batch goes through the router when one is configured.
+# timeout overrides ZENCHAIN_RPC_TIMEOUT for a direct request.
+def batch_request(calls, rpc_url=None, timeout=None):
+    payload = _batch_payload(calls)
+    router = get_router() if rpc_url is None else None
+    if router is not None:
+        replies = json.loads(router.post(json.dumps(payload).encode(), [method for method, _ in calls]))
+        return _batch_results(replies, len(calls))
+    response = get_session().post(rpc_url or RPC_URLS[0], json=payload, timeout=timeout or TIMEOUT)
+    response.raise_for_status()
+    replies = response.json()
+    return _batch_results(replies, len(calls))
+
+
+# Send a long list of calls as batches of batch_size, with up to concurrency
+# batches in flight. Results come back in call order like batch_request; a
+# batch that still fails after its retries gives an RPCError for every call.
+def parallel_batches(calls, rpc_url=None, batch_size=60, concurrency=8, retries=2):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def send(chunk):
+        for attempt in range(retries + 1):
+            try:
+                return batch_request(chunk, rpc_url)
+            except Exception as e:
+                if attempt == retries:
+                    return [RPCError({'message': str(e)})] * len(chunk)
+                time.sleep(0.5 * 2 ** attempt)
+
+    chunks = [calls[i:i + batch_size] for i in range(0, len(calls), batch_size)]
+    if len(chunks) <= 1:
+        return send(chunks[0]) if chunks else []
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        for chunk_results in executor.map(send, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+# Async version of batch_request for an aiohttp.ClientSession
+async def async_batch_request(session, calls, rpc_url=None):
+    payload = _batch_payload(calls)
+    async with session.post(rpc_url or RPC_URLS[0], json=payload) as response:
+        response.raise_for_status()
+        replies = await response.json(content_type=None)
+    return _batch_results(replies, len(calls))
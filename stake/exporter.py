@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from eth_utils import to_checksum_address
+from client import batch_request, RPCError
+from staking_abi import eth_call, decode_output
+from chain_cache import ChainCache
+
+# Resident Prometheus exporter for node and staking state.
+#
+#   python3 exporter.py --node-url http://localhost:9944 --address 0x... --port 9615 --interval 15
+#
+# A background loop polls the node (system_health, system_syncState) and the
+# chain (balance and NativeStaking bonded/status/stake per address, activeEra)
+# with one JSON-RPC batch per endpoint. /metrics serves the last poll, so
+# scrapes never touch the RPC.
+
+# Per-address NativeStaking reads, also the metric name suffixes (see staking_abi.py)
+ADDRESS_CALLS = ["bonded", "status", "stake"]
+
+# Load data from priv-data.txt when no address is given (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
+
+
+def load_default_address():
+    try:
+        with open(file_path, 'r') as file:
+            for line in file:
+                if line.startswith("MY_ADDRESS="):
+                    return line.split('=')[1].strip()
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def format_wei_to_zcx(wei_amount):
+    # Convert from wei to ZCX (divide by 10^18)
+    return wei_amount / 10**18
+
+
+# Metric types for the exposition format; anything not listed is a gauge
+COUNTERS = ("zenchain_exporter_polls_total", "zenchain_exporter_poll_errors_total")
+
+
+# Collects samples grouped by metric, as the Prometheus text format requires
+class Samples:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, labels=""):
+        self.metrics.setdefault(name, []).append((labels, value))
+
+    def render(self):
+        out = []
+        for name, samples in self.metrics.items():
+            out.append(f"# TYPE {name} {'counter' if name in COUNTERS else 'gauge'}")
+            for labels, value in samples:
+                out.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(out) + "\n"
+
+
+# Holds the metrics text from the last poll
+class MetricsState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.text = "# no poll completed yet\n"
+        self.poll_errors = 0
+        self.polls = 0
+
+
+class Poller:
+    def __init__(self, state, node_url, rpc_url, addresses, cache):
+        self.state = state
+        self.node_url = node_url
+        self.rpc_url = rpc_url
+        self.addresses = addresses
+        self.cache = cache
+        self.address_calls = {address: [eth_call(name, address) for name in ADDRESS_CALLS] for address in addresses}
+
+    def poll_node(self, samples):
+        try:
+            health, sync_state = batch_request([("system_health", []), ("system_syncState", [])], self.node_url)
+        except Exception:
+            samples.add("zenchain_node_up", 0)
+            return False
+
+        samples.add("zenchain_node_up", 1)
+        if not isinstance(health, RPCError):
+            samples.add("zenchain_node_peers", health.get('peers', 0))
+            samples.add("zenchain_node_is_syncing", int(bool(health.get('isSyncing'))))
+        if not isinstance(sync_state, RPCError):
+            for field, metric in (("startingBlock", "starting"), ("currentBlock", "current"), ("highestBlock", "highest")):
+                if sync_state.get(field) is not None:
+                    samples.add(f"zenchain_sync_{metric}_block", sync_state[field])
+        return not isinstance(health, RPCError) and not isinstance(sync_state, RPCError)
+
+    def poll_chain(self, samples):
+        era = self.cache.active_era() if self.cache is not None else None
+
+        calls = []
+        for address in self.addresses:
+            calls.append(("eth_getBalance", [address, "latest"]))
+            calls.extend(self.address_calls[address])
+        if era is None:
+            calls.append(eth_call("activeEra"))
+
+        if not calls:
+            return True
+        try:
+            results = batch_request(calls, self.rpc_url)
+        except Exception:
+            samples.add("zenchain_chain_up", 0)
+            return False
+        samples.add("zenchain_chain_up", 1)
+
+        ok = True
+        per_address = len(ADDRESS_CALLS) + 1
+        for i, address in enumerate(self.addresses):
+            chunk = results[i * per_address:(i + 1) * per_address]
+            label = f'address="{address}"'
+            if isinstance(chunk[0], RPCError):
+                ok = False
+            else:
+                samples.add("zenchain_account_balance_zcx", format_wei_to_zcx(int(chunk[0], 16)), label)
+            for name, result in zip(ADDRESS_CALLS, chunk[1:]):
+                if isinstance(result, RPCError):
+                    ok = False
+                    continue
+                values = decode_output(name, result)
+                if name == "stake":
+                    samples.add("zenchain_staking_total_stake_zcx", format_wei_to_zcx(values[0]), label)
+                    samples.add("zenchain_staking_active_stake_zcx", format_wei_to_zcx(values[1]), label)
+                else:
+                    samples.add(f"zenchain_staking_{name}", int(values[0]), label)
+
+        if era is None:
+            result = results[-1]
+            if isinstance(result, RPCError):
+                ok = False
+            else:
+                era = decode_output("activeEra", result)[0]
+                if self.cache is not None:
+                    self.cache.set_era(era)
+        if era is not None:
+            samples.add("zenchain_active_era", era)
+        return ok
+
+    def poll(self):
+        started = time.monotonic()
+        samples = Samples()
+        ok = self.poll_node(samples)
+        ok = self.poll_chain(samples) and ok
+        duration = time.monotonic() - started
+
+        with self.state.lock:
+            self.state.polls += 1
+            if not ok:
+                self.state.poll_errors += 1
+            samples.add("zenchain_exporter_poll_duration_seconds", round(duration, 6))
+            samples.add("zenchain_exporter_last_poll_timestamp_seconds", round(time.time(), 3))
+            samples.add("zenchain_exporter_polls_total", self.state.polls)
+            samples.add("zenchain_exporter_poll_errors_total", self.state.poll_errors)
+            self.state.text = samples.render()
+
+    def run(self, interval):
+        while True:
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Poll failed: {e}", file=sys.stderr)
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+
+def make_handler(state):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            with state.lock:
+                body = state.text.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prometheus exporter for a ZenChain node and staking accounts")
+    parser.add_argument("--node-url", default="http://localhost:9944", help="node RPC for system_* calls")
+    parser.add_argument("--rpc-url", help="RPC for balance and staking calls (default: the configured endpoints)")
+    parser.add_argument("--address", action="append", default=[], help="account to export (repeatable)")
+    parser.add_argument("--address-file", help="file with one address per line")
+    parser.add_argument("--listen", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9615)
+    parser.add_argument("--interval", type=float, default=15, help="seconds between polls")
+    args = parser.parse_args()
+
+    addresses = list(args.address)
+    if args.address_file:
+        with open(args.address_file, 'r') as file:
+            addresses.extend(line.strip() for line in file if line.strip() and not line.startswith('#'))
+    if not addresses:
+        default_address = load_default_address()
+        if default_address:
+            addresses.append(default_address)
+    addresses = [to_checksum_address(address) for address in addresses]
+
+    try:
+        cache = ChainCache()
+    except Exception as e:
+        print(f"Chain cache unavailable: {e}", file=sys.stderr)
+        cache = None
+
+    state = MetricsState()
+    poller = Poller(state, args.node_url, args.rpc_url, addresses, cache)
+    threading.Thread(target=poller.run, args=(args.interval,), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.listen, args.port), make_handler(state))
+    print(f"Serving metrics for {len(addresses)} address(es) on http://{args.listen}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from client import batch_request, RPCError
+
+# Gas limit used when estimation is not possible (the old hard-coded value)
+DEFAULT_GAS = 2000000
+
+# Extra gas on top of estimate_gas, 1.2 = +20% (override with ZENCHAIN_GAS_MARGIN)
+GAS_MARGIN = float(os.environ.get("ZENCHAIN_GAS_MARGIN", "1.2"))
+
+# Seconds a gas price stays valid before the block number is checked again
+BLOCK_TIME = float(os.environ.get("ZENCHAIN_BLOCK_TIME", "6"))
+
+
+# Runs estimate_gas once per precompile function (bondExtra, validate,
+# nominate, setPayee, setKeys, ...) and reuses the result, plus a margin,
+# for every later call with the same selector.
+class GasEstimator:
+    def __init__(self, w3, margin=GAS_MARGIN, default_gas=DEFAULT_GAS):
+        self.w3 = w3
+        self.margin = margin
+        self.default_gas = default_gas
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _key(self, func):
+        return (func.address.lower(), func.selector)
+
+    def estimate(self, func, sender):
+        key = self._key(func)
+        with self._lock:
+            gas = self._cache.get(key)
+        if gas is not None:
+            return gas
+
+        try:
+            estimated = func.estimate_gas({'from': sender})
+        except Exception:
+            # Estimation can fail for calls that depend on earlier pending
+            # transactions in the same pipeline; keep the old safe limit
+            return self.default_gas
+
+        gas = int(estimated * self.margin)
+        with self._lock:
+            self._cache[key] = gas
+        return gas
+
+    # Take an estimate made elsewhere (see simulate.py); keeps the largest per function
+    def prime(self, address, selector, estimated):
+        key = (address.lower(), selector)
+        gas = int(estimated * self.margin)
+        with self._lock:
+            self._cache[key] = max(gas, self._cache.get(key, 0))
+
+
+# Gas price shared by every transaction in a batch, fetched once per block.
+# The first fetch gets the price together with the block number in one
+# round trip. After about one block time a cheap eth_blockNumber shows
+# whether a new block has arrived, and only then is the price fetched again.
+class GasPriceOracle:
+    def __init__(self, rpc_url=None, block_time=BLOCK_TIME):
+        self.rpc_url = rpc_url
+        self.block_time = block_time
+        self._block = None
+        self._price = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def gas_price(self):
+        with self._lock:
+            if self._price is not None and time.monotonic() - self._checked < self.block_time:
+                return self._price
+
+            if self._price is None:
+                block, price = batch_request([("eth_blockNumber", []), ("eth_gasPrice", [])], self.rpc_url)
+            else:
+                [block] = batch_request([("eth_blockNumber", [])], self.rpc_url)
+                if isinstance(block, RPCError):
+                    raise block
+                if int(block, 16) <= self._block:
+                    # Same block: the price cannot have changed
+                    self._checked = time.monotonic()
+                    return self._price
+                [price] = batch_request([("eth_gasPrice", [])], self.rpc_url)
+            for result in (block, price):
+                if isinstance(result, RPCError):
+                    raise result
+
+            self._checked = time.monotonic()
+            self._block = int(block, 16)
+            self._price = int(price, 16)
+            return self._price
+
+
+_estimators = {}
+_oracles = {}
+
+
+# Process-wide instances, so a long-running process (zencli.py repl) keeps
+# its gas estimates and gas price between commands
+def get_estimator(w3):
+    estimator = _estimators.get(id(w3))
+    if estimator is None:
+        estimator = _estimators[id(w3)] = GasEstimator(w3)
+    return estimator
+
+
+def get_oracle(rpc_url=None):
+    oracle = _oracles.get(rpc_url)
+    if oracle is None:
+        oracle = _oracles[rpc_url] = GasPriceOracle(rpc_url)
+    return oracle
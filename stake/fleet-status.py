@@ -0,0 +1,197 @@
+import os
+import sys
+import csv
+import json
+import asyncio
+import argparse
+import aiohttp
+from web3 import Web3
+from client import TIMEOUT, read_url, async_batch_request, RPCError
+from staking_abi import eth_call, decode_output
+
+# Scan bonded / status / stake / balance for every address in a list file.
+#
+#   python3 fleet-status.py addresses.txt --format csv --concurrency 8 --batch-size 50
+#
+# The address file holds one address per line (blank lines and # comments are skipped).
+# Rows are written as soon as their batch returns, so output order follows completion.
+
+
+# Per-address NativeStaking reads (see staking_abi.py)
+ADDRESS_CALLS = ["bonded", "status", "stake"]
+
+FIELDS = ["address", "balance_zcx", "bonded", "status", "total_stake_zcx", "active_stake_zcx", "error"]
+
+
+def format_wei_to_zcx(wei_amount):
+    # Convert from wei to ZCX (divide by 10^18)
+    return wei_amount / 10**18
+
+
+def load_addresses(path):
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
+
+
+# Calls for one address: eth_getBalance followed by ADDRESS_CALLS
+def address_calls(address):
+    return [("eth_getBalance", [address, "latest"])] + [eth_call(name, address) for name in ADDRESS_CALLS]
+
+
+def decode_row(address, results):
+    row = dict.fromkeys(FIELDS)
+    row["address"] = address
+    errors = []
+
+    balance = results[0]
+    if isinstance(balance, RPCError):
+        errors.append(f"balance: {balance}")
+    else:
+        row["balance_zcx"] = format_wei_to_zcx(int(balance, 16))
+
+    decoded = {}
+    for name, result in zip(ADDRESS_CALLS, results[1:]):
+        if isinstance(result, RPCError):
+            errors.append(f"{name}: {result}")
+            continue
+        decoded[name] = decode_output(name, result)
+
+    if "bonded" in decoded:
+        row["bonded"] = decoded["bonded"][0]
+    if "status" in decoded:
+        row["status"] = decoded["status"][0]
+    if "stake" in decoded:
+        row["total_stake_zcx"] = format_wei_to_zcx(decoded["stake"][0])
+        row["active_stake_zcx"] = format_wei_to_zcx(decoded["stake"][1])
+
+    if errors:
+        row["error"] = "; ".join(errors)
+    return row
+
+
+def error_row(address, error):
+    row = dict.fromkeys(FIELDS)
+    row["address"] = address
+    row["error"] = str(error)
+    return row
+
+
+# Query one chunk of addresses as a single JSON-RPC batch
+async def scan_chunk(session, semaphore, addresses, rpc_url, retries):
+    rows = []
+    calls = []
+    valid = []
+    for address in addresses:
+        if not Web3.is_address(address):
+            rows.append(error_row(address, "invalid address"))
+            continue
+        address = Web3.to_checksum_address(address)
+        valid.append(address)
+        calls.extend(address_calls(address))
+
+    if not valid:
+        return rows
+
+    per_address = len(ADDRESS_CALLS) + 1
+    async with semaphore:
+        for attempt in range(retries + 1):
+            try:
+                results = await async_batch_request(session, calls, rpc_url)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    return rows + [error_row(address, e) for address in valid]
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    for i, address in enumerate(valid):
+        rows.append(decode_row(address, results[i * per_address:(i + 1) * per_address]))
+    return rows
+
+
+class RowWriter:
+    def __init__(self, out, fmt):
+        self.out = out
+        self.fmt = fmt
+        self.csv = None
+        if fmt == "csv":
+            self.csv = csv.DictWriter(out, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self.csv is not None:
+                self.csv.writerow(row)
+            else:
+                self.out.write(json.dumps(row) + "\n")
+        self.out.flush()
+
+
+async def scan(addresses, writer, rpc_url, concurrency, batch_size, retries):
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    scanned = 0
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        pending = set()
+        chunk = []
+
+        # Keep at most 2x concurrency chunks queued so huge lists stay in bounded memory
+        async def drain(limit):
+            nonlocal pending, scanned
+            while len(pending) > limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    rows = task.result()
+                    writer.write(rows)
+                    scanned += len(rows)
+
+        for address in addresses:
+            chunk.append(address)
+            if len(chunk) == batch_size:
+                pending.add(asyncio.create_task(scan_chunk(session, semaphore, chunk, rpc_url, retries)))
+                chunk = []
+                await drain(concurrency * 2)
+
+        if chunk:
+            pending.add(asyncio.create_task(scan_chunk(session, semaphore, chunk, rpc_url, retries)))
+        await drain(0)
+
+    return scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet-wide ZenChain staking status scan")
+    parser.add_argument("address_file", help="file with one address per line")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the best of the configured endpoints, see client.py)")
+    parser.add_argument("--concurrency", type=int, default=8, help="batches in flight at once")
+    parser.add_argument("--batch-size", type=int, default=50, help="addresses per JSON-RPC batch")
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.address_file):
+        print(f"Address file not found: {args.address_file}", file=sys.stderr)
+        sys.exit(1)
+
+    addresses = load_addresses(args.address_file)
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+
+    # One endpoint for the whole scan: with ZENCHAIN_RPC_URLS set, the router's best one
+    rpc_url = args.rpc_url or read_url()
+    try:
+        writer = RowWriter(out, args.format)
+        scanned = asyncio.run(scan(addresses, writer, rpc_url, args.concurrency, args.batch_size, args.retries))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Scanned {scanned} addresses", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
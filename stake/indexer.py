@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from client import batch_request, RPCError
+from staking_abi import NATIVE_STAKING_ADDRESS, KEY_MANAGER_ADDRESS, EVENTS, decode_values
+
+# Event indexer for the NativeStaking (0x...0800) and KeyManager (0x...0802)
+# precompiles.
+#
+#   python3 indexer.py scan                           # catch up to the chain head, resuming where it stopped
+#   python3 indexer.py scan --from-block 0 --concurrency 8
+#   python3 indexer.py history 0xYourAddress          # bond / nomination / payee / commission history
+#   python3 indexer.py history 0xYourAddress --event Nominated --json
+#   python3 indexer.py info
+#
+# Block ranges are fetched with eth_getLogs in parallel. The chunk size adapts:
+# it halves (and the range is split) when the node rejects or times out a
+# query, and doubles again while queries come back quickly. Every finished
+# range is written together with its events in one SQLite transaction, so a
+# crash or restart only refetches ranges that were not committed.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+# Local event store (override with ZENCHAIN_INDEX_PATH)
+INDEX_PATH = os.environ.get("ZENCHAIN_INDEX_PATH", os.path.expanduser("~/.cache/zenchain/events.sqlite"))
+
+# Chunk size limits for eth_getLogs, in blocks
+MIN_CHUNK = 1
+MAX_CHUNK = 100000
+# Chunk size grows while queries answer faster than this (seconds)
+FAST_QUERY = 2.0
+# Attempts for a single-block range before the scan gives up
+MAX_ATTEMPTS = 5
+
+
+def _jsonable(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool) and abs(value) > 2**53:
+        return str(value)
+    return value
+
+
+# Decode one log into (event name, account, fields dict)
+def decode_log(log):
+    topics = log.get("topics") or []
+    event = EVENTS.get(topics[0].lower()) if topics else None
+    if event is None:
+        return None, None, {"topics": topics, "data": log.get("data")}
+
+    name, fields = event
+    indexed_topics = iter(topics[1:])
+    data_fields = [(field, abi_type) for field, abi_type, indexed in fields if not indexed]
+    decoded = {}
+    account = None
+    try:
+        values = iter(decode_values([abi_type for _, abi_type in data_fields], log.get("data", "0x")))
+        for field, abi_type, indexed in fields:
+            if indexed:
+                topic = next(indexed_topics)
+                # Indexed dynamic values are stored as their hash
+                value = decode_values([abi_type], topic)[0] if abi_type in ("address", "uint256", "uint32", "bool") else topic
+                if abi_type == "address":
+                    account = account or value
+            else:
+                value = next(values)
+            decoded[field] = _jsonable(value)
+    except (StopIteration, ValueError):
+        # Known topic but not the expected shape (too few topics, bad data): keep it raw
+        return None, None, {"topics": topics, "data": log.get("data")}
+    return name, account, decoded
+
+
+class EventStore:
+    def __init__(self, path=INDEX_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        with self.db:
+            if path != ":memory:":
+                self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "block INTEGER NOT NULL, tx_hash TEXT NOT NULL, log_index INTEGER NOT NULL, "
+                "contract TEXT NOT NULL, event TEXT, account TEXT, fields TEXT NOT NULL, "
+                "PRIMARY KEY (tx_hash, log_index))"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS events_account ON events (account, block)")
+            # Block ranges whose logs are fully stored (inclusive)
+            self.db.execute("CREATE TABLE IF NOT EXISTS ranges (start INTEGER PRIMARY KEY, end INTEGER NOT NULL)")
+
+    # Store the logs of one block range and mark the range done, atomically
+    def commit_range(self, start, end, logs):
+        rows = []
+        for log in logs:
+            name, account, fields = decode_log(log)
+            rows.append((
+                int(log["blockNumber"], 16), log["transactionHash"], int(log["logIndex"], 16),
+                log["address"].lower(), name, account.lower() if account else None, json.dumps(fields),
+            ))
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO ranges (start, end) VALUES (?, ?)", (start, end))
+        return len(rows)
+
+    # Merge adjacent done ranges so the table stays small
+    def compact(self):
+        merged = []
+        for start, end in self.db.execute("SELECT start, end FROM ranges ORDER BY start"):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        with self.db:
+            self.db.execute("DELETE FROM ranges")
+            self.db.executemany("INSERT INTO ranges (start, end) VALUES (?, ?)", merged)
+        return merged
+
+    # Block ranges between start and end that are not stored yet
+    def gaps(self, start, end):
+        gaps = []
+        cursor = start
+        for done_start, done_end in self.compact():
+            if done_end < cursor:
+                continue
+            if done_start > end:
+                break
+            if done_start > cursor:
+                gaps.append((cursor, min(end, done_start - 1)))
+            cursor = max(cursor, done_end + 1)
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def history(self, account, event=None):
+        query = "SELECT block, tx_hash, log_index, contract, event, fields FROM events WHERE account = ?"
+        params = [account.lower()]
+        if event:
+            query += " AND event = ?"
+            params.append(event)
+        query += " ORDER BY block, log_index"
+        for block, tx_hash, log_index, contract, name, fields in self.db.execute(query, params):
+            yield {"block": block, "tx_hash": tx_hash, "log_index": log_index, "contract": contract,
+                   "event": name, "fields": json.loads(fields)}
+
+    def info(self):
+        events = self.db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        by_event = dict(self.db.execute("SELECT COALESCE(event, '(unknown)'), COUNT(*) FROM events GROUP BY event"))
+        return {"events": events, "by_event": by_event, "ranges": self.compact()}
+
+    def close(self):
+        self.db.close()
+
+
+def get_logs(start, end, rpc_url):
+    log_filter = {
+        "fromBlock": hex(start),
+        "toBlock": hex(end),
+        "address": [NATIVE_STAKING_ADDRESS, KEY_MANAGER_ADDRESS],
+    }
+    started = time.monotonic()
+    result = batch_request([("eth_getLogs", [log_filter])], rpc_url)[0]
+    if isinstance(result, RPCError):
+        raise result
+    return result, time.monotonic() - started
+
+
+# Fetch every gap with up to `concurrency` eth_getLogs in flight
+def scan(store, gaps, rpc_url, concurrency, chunk, progress=True):
+    spans = list(gaps)
+    retry = []
+    attempts = {}
+    total_blocks = sum(end - start + 1 for start, end in spans)
+    done_blocks = 0
+    stored = 0
+
+    def next_range():
+        if retry:
+            return retry.pop()
+        start, end = spans[0]
+        chunk_end = min(end, start + chunk - 1)
+        if chunk_end == end:
+            spans.pop(0)
+        else:
+            spans[0] = (chunk_end + 1, end)
+        return start, chunk_end
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        while spans or retry or in_flight:
+            while len(in_flight) < concurrency and (spans or retry):
+                start, end = next_range()
+                in_flight[executor.submit(get_logs, start, end, rpc_url)] = (start, end)
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = in_flight.pop(future)
+                try:
+                    logs, took = future.result()
+                except Exception as e:
+                    size = end - start + 1
+                    if size > MIN_CHUNK:
+                        # Too big or too slow for the node: split it and shrink new chunks too
+                        middle = start + size // 2
+                        retry.extend([(middle, end), (start, middle - 1)])
+                        chunk = max(MIN_CHUNK, min(chunk, size) // 2)
+                        continue
+                    attempts[start] = attempts.get(start, 0) + 1
+                    if attempts[start] >= MAX_ATTEMPTS:
+                        raise RuntimeError(f"eth_getLogs failed for block {start}: {e}")
+                    time.sleep(min(10, 2 ** attempts[start]))
+                    retry.append((start, end))
+                    continue
+
+                stored += store.commit_range(start, end, logs)
+                done_blocks += end - start + 1
+                if took < FAST_QUERY and end - start + 1 >= chunk:
+                    chunk = min(MAX_CHUNK, chunk * 2)
+                if progress:
+                    print(f"Scanned {done_blocks}/{total_blocks} blocks, {stored} events, chunk {chunk}", end="\r")
+    if progress:
+        print()
+    return stored, chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index NativeStaking and KeyManager events into SQLite")
+    parser.add_argument("--db", default=INDEX_PATH, help="SQLite file for the index")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the configured endpoints)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = commands.add_parser("scan", help="fetch logs up to the chain head")
+    scan_parser.add_argument("--from-block", type=int, default=0)
+    scan_parser.add_argument("--to-block", type=int, help="last block to index (default: head minus --confirmations)")
+    scan_parser.add_argument("--confirmations", type=int, default=10, help="blocks left unindexed below the head")
+    scan_parser.add_argument("--concurrency", type=int, default=4, help="eth_getLogs requests in flight")
+    scan_parser.add_argument("--chunk-size", type=int, default=2000, help="initial blocks per eth_getLogs")
+
+    history_parser = commands.add_parser("history", help="show stored events for an account")
+    history_parser.add_argument("address")
+    history_parser.add_argument("--event", help="only this event (e.g. Bonded, Nominated, PayeeSet, Validated)")
+    history_parser.add_argument("--json", action="store_true")
+
+    commands.add_parser("info", help="show what the index holds")
+    args = parser.parse_args()
+
+    store = EventStore(args.db)
+
+    if args.command == "scan":
+        to_block = args.to_block
+        if to_block is None:
+            try:
+                head = int(batch_request([("eth_blockNumber", [])], args.rpc_url)[0], 16)
+            except Exception as e:
+                print(f"{RED}Failed to read the chain head: {e}{RESET}")
+                sys.exit(1)
+            to_block = head - args.confirmations
+        gaps = store.gaps(args.from_block, to_block)
+        if not gaps:
+            print(f"{GREEN}Index is up to date to block {to_block}{RESET}")
+            return
+        print(f"Indexing {sum(end - start + 1 for start, end in gaps)} blocks in {len(gaps)} range(s) up to {to_block}")
+        started = time.monotonic()
+        try:
+            stored, chunk = scan(store, gaps, args.rpc_url, args.concurrency, args.chunk_size)
+        except KeyboardInterrupt:
+            print("\nStopped; finished ranges are saved and the next scan resumes from there")
+            sys.exit(130)
+        except RuntimeError as e:
+            print(f"\n{RED}{e}{RESET}")
+            sys.exit(1)
+        store.compact()
+        print(f"{GREEN}Stored {stored} events in {time.monotonic() - started:.1f}s (final chunk size {chunk}){RESET}")
+
+    elif args.command == "history":
+        rows = list(store.history(args.address, args.event))
+        if args.json:
+            for row in rows:
+                print(json.dumps(row))
+            return
+        if not rows:
+            print(f"No indexed events for {args.address}")
+        for row in rows:
+            fields = ", ".join(f"{key}={value}" for key, value in row["fields"].items())
+            print(f"{GREEN}#{row['block']}{RESET} {row['event'] or '(unknown)'} {fields} {row['tx_hash']}")
+
+    elif args.command == "info":
+        info = store.info()
+        print(f"{GREEN}Events:{RESET} {info['events']}")
+        for name, count in sorted(info["by_event"].items()):
+            print(f"  {name}: {count}")
+        print(f"{GREEN}Indexed block ranges:{RESET} " + (", ".join(f"{start}-{end}" for start, end in info["ranges"]) or "none"))
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import signal
+import getpass
+import argparse
+import resource
+import threading
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+from key_client import SOCKET_PATH, MAX_BATCH, AGENT_KEY, KeyAgentClient, AgentError
+
+# Local signing agent: unlocks encrypted keystores once and signs for the
+# stake scripts over a Unix socket, so no plaintext key has to sit on disk
+# and no script pays for scrypt on every run.
+#
+#   python3 key-agent.py encrypt keys.csv --out /root/chain-data/keystore   # one-time migration
+#   python3 key-agent.py serve /root/chain-data/keystore                    # asks for the password once
+#   python3 key-agent.py accounts                                            # what a running agent holds
+#
+# Keystores are decrypted in parallel across CPU cores at start-up (scrypt
+# takes hundreds of ms per key). The keys then live only in this process,
+# which has core dumps disabled. The socket is created mode 0600.
+#
+# Requests and replies are one JSON object per line:
+#   {"method": "sign", "transactions": [{"from": "0x...", "to": ..., "nonce": ..., ...}, ...]}
+#   -> {"result": [{"raw": "0x...", "hash": "0x..."} or {"error": "..."}, ...]}
+# At most --max-concurrent sign requests are worked on at once; the rest
+# wait their turn. See key_client.py for the client side.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+
+def read_password(path, confirm=False):
+    if path:
+        with open(path, 'r') as file:
+            return file.readline().rstrip("\n")
+    password = getpass.getpass("Keystore password: ")
+    if confirm and getpass.getpass("Repeat password: ") != password:
+        print(f"{RED}Passwords do not match{RESET}")
+        sys.exit(1)
+    return password
+
+
+def keystore_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if os.path.isfile(os.path.join(path, name)) and not name.startswith('.'))
+        else:
+            files.append(path)
+    return files
+
+
+# Worker: decrypt one keystore file -> (address, private key hex)
+def unlock_file(path, password):
+    from eth_account import Account
+    with open(path, 'r') as file:
+        keystore = json.load(file)
+    private_key = Account.decrypt(keystore, password)
+    return Account.from_key(private_key).address, private_key.hex()
+
+
+# Worker: encrypt one private key -> (address, keystore dict)
+def encrypt_key(private_key, password):
+    from eth_account import Account
+    account = Account.from_key(private_key)
+    return account.address, Account.encrypt(private_key, password)
+
+
+class Signer:
+    def __init__(self, accounts, max_concurrent):
+        self.accounts = accounts  # lowercase address -> LocalAccount
+        self.slots = threading.Semaphore(max_concurrent)
+        self.started = time.monotonic()
+        self.signed = 0
+        self._lock = threading.Lock()
+
+    def sign(self, transactions):
+        if len(transactions) > MAX_BATCH:
+            raise ValueError(f"at most {MAX_BATCH} transactions per request")
+        results = []
+        with self.slots:
+            for transaction in transactions:
+                transaction = dict(transaction)
+                try:
+                    account = self.accounts.get(str(transaction.pop("from", "")).lower())
+                    if account is None:
+                        raise ValueError("no key for this sender")
+                    signed = account.sign_transaction(transaction)
+                    results.append({"raw": "0x" + signed.raw_transaction.hex(), "hash": "0x" + signed.hash.hex()})
+                except Exception as e:
+                    results.append({"error": str(e)})
+        with self._lock:
+            self.signed += sum("raw" in result for result in results)
+        return results
+
+    def handle(self, request):
+        method = request.get("method")
+        if method == "sign":
+            return self.sign(request.get("transactions", []))
+        if method == "accounts":
+            return sorted(account.address for account in self.accounts.values())
+        if method == "ping":
+            return {"accounts": len(self.accounts), "signed": self.signed,
+                    "uptime": round(time.monotonic() - self.started, 1)}
+        raise ValueError(f"unknown method {method}")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = {"result": self.server.signer.handle(json.loads(line))}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+# Remove a socket left by an agent that is gone; refuse if one still answers
+def claim_socket(path):
+    if not os.path.exists(path):
+        return
+    try:
+        KeyAgentClient(path, timeout=2).ping()
+    except AgentError:
+        os.unlink(path)
+        return
+    print(f"{RED}A key agent is already listening on {path}{RESET}")
+    sys.exit(1)
+
+
+def serve(args):
+    from eth_account import Account
+
+    files = keystore_files(args.keystores)
+    if not files:
+        print(f"{RED}No keystore files found{RESET}")
+        sys.exit(1)
+    password = read_password(args.password_file)
+
+    # Keep keys out of core files
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    started = time.monotonic()
+    accounts = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {path: executor.submit(unlock_file, path, password) for path in files}
+        for path, future in futures.items():
+            try:
+                address, private_key = future.result()
+            except Exception as e:
+                print(f"{RED}Failed to unlock {path}: {e}{RESET}")
+                sys.exit(1)
+            accounts[address.lower()] = Account.from_key(private_key)
+    del password
+    print(f"{GREEN}Unlocked {len(accounts)} keys in {time.monotonic() - started:.2f}s{RESET}")
+
+    claim_socket(args.socket)
+    os.makedirs(os.path.dirname(os.path.abspath(args.socket)), exist_ok=True)
+    previous_umask = os.umask(0o177)
+    try:
+        server = AgentServer(args.socket, RequestHandler)
+    finally:
+        os.umask(previous_umask)
+    server.signer = Signer(accounts, args.max_concurrent)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Listening on {args.socket} (up to {args.max_concurrent} sign requests at once)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        print(f"Key agent stopped after signing {server.signer.signed} transactions")
+
+
+def encrypt(args):
+    keys = []
+    with open(args.keys, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            address, private_key = [part.strip() for part in line.split(',', 1)]
+            if private_key.lower() != AGENT_KEY:
+                keys.append(private_key)
+    password = read_password(args.password_file, confirm=True)
+
+    os.makedirs(args.out, mode=0o700, exist_ok=True)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for address, keystore in executor.map(encrypt_key, keys, [password] * len(keys)):
+            path = os.path.join(args.out, f"{address}.json")
+            with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as out:
+                json.dump(keystore, out)
+    print(f"{GREEN}Wrote {len(keys)} keystores to {args.out} in {time.monotonic() - started:.2f}s{RESET}")
+    print(f"Replace the keys in {args.keys} with '{AGENT_KEY}' (or delete it) once the agent is running.")
+
+
+def accounts(args):
+    client = KeyAgentClient(args.socket)
+    try:
+        status = client.ping()
+        for address in client.accounts():
+            print(address)
+    except AgentError as e:
+        print(f"{RED}{e}{RESET}")
+        sys.exit(1)
+    print(f"{status['accounts']} keys, {status['signed']} transactions signed, up {status['uptime']}s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local signing agent for the stake scripts")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="unlock keystores and serve sign requests")
+    serve_parser.add_argument("keystores", nargs="+", help="keystore files or directories of them")
+    serve_parser.add_argument("--socket", default=SOCKET_PATH)
+    serve_parser.add_argument("--password-file", help="read the keystore password from this file instead of asking")
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes decrypting keystores")
+    serve_parser.add_argument("--max-concurrent", type=int, default=4, help="sign requests worked on at once")
+    serve_parser.set_defaults(func=serve)
+
+    encrypt_parser = commands.add_parser("encrypt", help="turn a keys.csv file into encrypted keystores")
+    encrypt_parser.add_argument("keys", help="CSV file of address,private_key")
+    encrypt_parser.add_argument("--out", required=True, help="directory for the keystore files")
+    encrypt_parser.add_argument("--password-file", help="read the keystore password from this file instead of asking")
+    encrypt_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes encrypting keys")
+    encrypt_parser.set_defaults(func=encrypt)
+
+    accounts_parser = commands.add_parser("accounts", help="list the accounts a running agent holds")
+    accounts_parser.add_argument("--socket", default=SOCKET_PATH)
+    accounts_parser.set_defaults(func=accounts)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import json
+import socket
+from collections import namedtuple
+
+# Client for key-agent.py, the local signing agent.
+#
+#   agent = KeyAgentClient()
+#   agent.accounts()                        # addresses the agent holds keys for
+#   signed = agent.sign([transaction, ...])  # SignedTransaction, or AgentError per transaction
+#
+# Each transaction is the dict eth_account would sign, plus "from" naming
+# the key to use. Private keys never leave the agent; only signed raw
+# transactions come back.
+#
+# Scripts opt in with AGENT_KEY in place of a private key: PRIVATE_KEY=agent
+# in priv-data.txt, or "agent" in the key column of keys.csv. TxPipeline
+# (nonce_manager.py) then signs through the agent.
+
+# Agent socket (override with ZENCHAIN_KEY_AGENT_SOCKET)
+SOCKET_PATH = os.environ.get("ZENCHAIN_KEY_AGENT_SOCKET", "/root/chain-data/key-agent.sock")
+
+# Written instead of a private key to sign through the agent
+AGENT_KEY = "agent"
+
+# Transactions per sign request (the agent rejects larger requests)
+MAX_BATCH = 1000
+
+SignedTransaction = namedtuple("SignedTransaction", ["raw_transaction", "hash"])
+
+
+class AgentError(Exception):
+    pass
+
+
+def is_agent_key(private_key):
+    return isinstance(private_key, str) and private_key.strip().lower() == AGENT_KEY
+
+
+class KeyAgentClient:
+    def __init__(self, path=SOCKET_PATH, timeout=60):
+        self.path = path
+        self.timeout = timeout
+
+    # One request per connection: connecting to a Unix socket costs microseconds,
+    # and it keeps the client safe to share between threads
+    def _request(self, request):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.settimeout(self.timeout)
+                conn.connect(self.path)
+                conn.sendall(json.dumps(request).encode() + b"\n")
+                with conn.makefile('rb') as reader:
+                    line = reader.readline()
+        except OSError as e:
+            raise AgentError(f"key agent at {self.path} is not reachable: {e}")
+        if not line:
+            raise AgentError("key agent closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise AgentError(reply["error"])
+        return reply["result"]
+
+    def ping(self):
+        return self._request({"method": "ping"})
+
+    def accounts(self):
+        return self._request({"method": "accounts"})
+
+    # Sign transactions in order; each result is a SignedTransaction or an AgentError
+    def sign(self, transactions):
+        results = []
+        for i in range(0, len(transactions), MAX_BATCH):
+            chunk = transactions[i:i + MAX_BATCH]
+            replies = self._request({"method": "sign", "transactions": [_jsonable(tx) for tx in chunk]})
+            for reply in replies:
+                if "error" in reply:
+                    results.append(AgentError(reply["error"]))
+                else:
+                    results.append(SignedTransaction(bytes.fromhex(reply["raw"][2:]), bytes.fromhex(reply["hash"][2:])))
+        return results
+
+    # Sign one transaction, raising AgentError if the agent refused it
+    def sign_one(self, transaction):
+        result = self.sign([transaction])[0]
+        if isinstance(result, AgentError):
+            raise result
+        return result
+
+
+# web3 fills some fields with bytes (HexBytes); the agent takes JSON
+def _jsonable(transaction):
+    return {key: "0x" + bytes(value).hex() if isinstance(value, (bytes, bytearray)) else value
+            for key, value in transaction.items()}
+
+
+# {address: AGENT_KEY} for every account the agent holds, to merge into a keys.csv mapping
+def agent_keys(path=SOCKET_PATH):
+    return {address.lower(): AGENT_KEY for address in KeyAgentClient(path).accounts()}
@@ -0,0 +1,275 @@
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import deque
+from datetime import datetime
+
+# Streaming reader for ZenChain node logs.
+#
+#   python3 log-follow.py                          # last 1000 lines of `docker logs zenchain`, summarised
+#   python3 log-follow.py --follow                 # one status line per informant tick, plus errors
+#   python3 log-follow.py --follow --json          # structured events, one JSON object per line
+#   python3 log-follow.py --file node.log --tail all --json
+#
+# Lines are parsed one at a time as they arrive. Only the last --lines raw
+# lines are kept (a ring buffer), so memory stays flat however long the log is.
+
+GREEN = "\033[32m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?)\s+(.*)$")
+LEVEL = re.compile(r"^(ERROR|WARN)\s+(?:(\S+)\s+)?([\w:-]+):\s*(.*)$")
+
+# ✨ Imported #123456 (0xabcd…ef12 → 0x1234…5678)
+IMPORTED = re.compile(r"Imported #(\d+) \((0x[0-9a-fA-F.…]+)")
+
+# Informant line, every few seconds:
+# 💤 Idle (8 peers), best: #123456 (0x…), finalized #123454 (0x…), ⬇ 1.2kiB/s ⬆ 0.8kiB/s
+# ⚙️  Syncing 45.2 bps, target=#2000000 (12 peers), best: #123456 (0x…), finalized #123000 (0x…), ⬇ …
+INFORMANT_STATE = re.compile(r"(Idle|Syncing|Preparing|Downloading state|Importing state|Warping|Block history)")
+PEERS = re.compile(r"\((\d+) peers\)")
+BEST = re.compile(r"best: #(\d+)")
+FINALIZED = re.compile(r"finalized #(\d+)")
+TARGET = re.compile(r"target=#(\d+)")
+SYNC_RATE = re.compile(r"([\d.]+) bps")
+BANDWIDTH = re.compile(r"⬇ ([\d.]+\s?\w+/s) ⬆ ([\d.]+\s?\w+/s)")
+
+
+def parse_time(text):
+    try:
+        return datetime.fromisoformat(text[:19])
+    except ValueError:
+        return None
+
+
+def _int(pattern, text):
+    match = pattern.search(text)
+    return int(match.group(1)) if match else None
+
+
+# Incremental parser for Substrate log lines. feed() takes one line and
+# returns the events it produced; the latest values are kept on the parser.
+class LogParser:
+    def __init__(self):
+        self.lines = 0
+        self.best = None
+        self.finalized = None
+        self.peers = None
+        self.import_rate = None
+        self.state = None
+        self.errors = 0
+        self.warnings = 0
+        self.last_error = None
+        self.last_time = None
+        # Previous informant (time, best) pair, for the import rate while idle
+        self._last_tick = None
+
+    def feed(self, line):
+        self.lines += 1
+        if "\x1b" in line:
+            line = ANSI_ESCAPE.sub("", line)
+        line = line.rstrip()
+        match = TIMESTAMP.match(line)
+        if not match:
+            return []
+        time_text, message = match.groups()
+        self.last_time = time_text
+        events = []
+
+        level = LEVEL.match(message) if message.startswith(("ERROR", "WARN")) else None
+        if level:
+            severity, _, target, text = level.groups()
+            if severity == "ERROR":
+                self.errors += 1
+            else:
+                self.warnings += 1
+            self.last_error = {"time": time_text, "level": severity, "target": target, "message": text}
+            events.append(dict(self.last_error, event="error"))
+            return events
+
+        imported = IMPORTED.search(message) if "Imported #" in message else None
+        if imported:
+            height = int(imported.group(1))
+            if self.best is None or height > self.best:
+                self.best = height
+            events.append({"event": "imported", "time": time_text, "height": height, "hash": imported.group(2)})
+            return events
+
+        best = _int(BEST, message) if "best: #" in message else None
+        state = INFORMANT_STATE.search(message) if best is not None else None
+        if state:
+            self.state = state.group(1)
+            peers = _int(PEERS, message)
+            finalized = _int(FINALIZED, message)
+            if peers is not None:
+                self.peers = peers
+            if finalized is not None:
+                self.finalized = finalized
+
+            rate = SYNC_RATE.search(message)
+            tick_time = parse_time(time_text)
+            if rate:
+                self.import_rate = float(rate.group(1))
+            elif tick_time and self._last_tick and tick_time > self._last_tick[0]:
+                seconds = (tick_time - self._last_tick[0]).total_seconds()
+                self.import_rate = round(max(0, best - self._last_tick[1]) / seconds, 3)
+            if tick_time:
+                self._last_tick = (tick_time, best)
+            self.best = best
+
+            event = {
+                "event": "status",
+                "time": time_text,
+                "state": self.state,
+                "peers": self.peers,
+                "best": best,
+                "finalized": self.finalized,
+                "target": _int(TARGET, message),
+                "import_rate": self.import_rate,
+            }
+            bandwidth = BANDWIDTH.search(message)
+            if bandwidth:
+                event["download"], event["upload"] = bandwidth.groups()
+            events.append(event)
+        return events
+
+    def summary(self):
+        return {
+            "event": "summary",
+            "time": self.last_time,
+            "lines": self.lines,
+            "state": self.state,
+            "best": self.best,
+            "finalized": self.finalized,
+            "peers": self.peers,
+            "import_rate": self.import_rate,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "last_error": self.last_error,
+        }
+
+
+def format_event(event):
+    if event["event"] == "error":
+        return f"{RED}{event['time']} {event['level']} {event['target']}: {event['message']}{RESET}"
+    if event["event"] == "status":
+        rate = "-" if event["import_rate"] is None else f"{event['import_rate']} bps"
+        target = f" target #{event['target']}" if event["target"] is not None else ""
+        return (f"{event['time']} {event['state']}: best #{event['best']} finalized #{event['finalized']}"
+                f"{target} peers {event['peers']} import {rate}")
+    return None
+
+
+def print_summary(summary):
+    rate = "-" if summary["import_rate"] is None else f"{summary['import_rate']} bps"
+    print(f"{GREEN}Lines read:{RESET} {summary['lines']}")
+    print(f"{GREEN}State:{RESET} {summary['state']}")
+    print(f"{GREEN}Best block:{RESET} {summary['best']}")
+    print(f"{GREEN}Finalized block:{RESET} {summary['finalized']}")
+    print(f"{GREEN}Peers:{RESET} {summary['peers']}")
+    print(f"{GREEN}Import rate:{RESET} {rate}")
+    print(f"{GREEN}Errors / warnings:{RESET} {summary['errors']} / {summary['warnings']}")
+    if summary["last_error"]:
+        last = summary["last_error"]
+        print(f"{GREEN}Last error:{RESET} {last['time']} {last['level']} {last['target']}: {last['message']}")
+
+
+def open_source(args):
+    if args.file == "-":
+        return None, sys.stdin
+    if args.file:
+        return None, open(args.file, 'r', errors='replace')
+
+    command = ["docker", "logs"]
+    if args.follow:
+        command.append("--follow")
+    command += ["--tail", args.tail]
+    command.append(args.container)
+    # The node logs to stderr, so both streams are read as one
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, errors='replace', bufsize=1)
+    return proc, proc.stdout
+
+
+def read_lines(args, stream):
+    if args.file and args.tail != "all":
+        # A plain file has no --tail of its own; the ring buffer keeps only the last N lines
+        yield from deque(stream, maxlen=int(args.tail))
+    else:
+        yield from stream
+    if args.file and args.file != "-" and args.follow:
+        # Keep reading lines appended to the file
+        while True:
+            line = stream.readline()
+            if line:
+                yield line
+            else:
+                time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow ZenChain node logs and extract block heights, peers and errors")
+    parser.add_argument("--container", default="zenchain", help="docker container to read logs from")
+    parser.add_argument("--file", help="read a log file instead of docker ('-' for stdin)")
+    parser.add_argument("--tail", default="1000", help="lines of history to read, or 'all'")
+    parser.add_argument("--follow", "-f", action="store_true", help="keep reading new lines")
+    parser.add_argument("--json", action="store_true", help="print structured events as JSON lines")
+    parser.add_argument("--lines", type=int, default=20, help="raw lines kept in the ring buffer and shown at the end")
+    args = parser.parse_args()
+
+    if args.tail != "all" and not args.tail.isdigit():
+        print("--tail must be a number or 'all'")
+        sys.exit(1)
+
+    try:
+        proc, stream = open_source(args)
+    except OSError as e:
+        print(f"{RED}Failed to read logs: {e}{RESET}")
+        sys.exit(1)
+
+    log_parser = LogParser()
+    recent = deque(maxlen=args.lines)
+    try:
+        for line in read_lines(args, stream):
+            recent.append(line.rstrip("\n"))
+            for event in log_parser.feed(line):
+                if args.json:
+                    print(json.dumps(event), flush=args.follow)
+                elif args.follow:
+                    text = format_event(event)
+                    if text:
+                        print(text, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if proc is not None:
+            if args.follow:
+                proc.terminate()
+            proc.wait()
+
+    if proc is not None and proc.returncode not in (0, -15):
+        print(f"{RED}Failed to retrieve logs for container: {args.container}{RESET}")
+        for line in recent:
+            print(f"{RED}{line}{RESET}")
+        sys.exit(1)
+
+    summary = log_parser.summary()
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    if not args.follow and args.lines > 0:
+        print(f"{GREEN}<=========== Last {len(recent)} log lines ==============>{RESET}")
+        for line in recent:
+            print(line)
+        print()
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,682 @@
+import sys
+import json
+import copy
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import rlp
+from eth_abi import encode, decode
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from staking_abi import NATIVE_STAKING_ADDRESS, KEY_MANAGER_ADDRESS, COMMISSION_PER_PERCENT, SELECTORS, FUNCTIONS as PRECOMPILE_FUNCTIONS
+
+# Local stand-in for a ZenChain node, for benchmarks and offline runs.
+#
+#   python3 mock_rpc.py --port 8545 --block-time 0.2 --latency 0.05 --error-rate 0.01
+#   ZENCHAIN_RPC_URL=http://127.0.0.1:8545 ZENCHAIN_WS_URL= python3 status.py
+#
+# Emulates the NativeStaking (0x...0800) and KeyManager (0x...0802)
+# precompiles, balances, nonces, eth_sendRawTransaction, receipts, gas and
+# system_* calls. Pending transactions are included in nonce order every
+# --block-time seconds (or as soon as they arrive with --block-time 0); their
+# calls change the staking state that later eth_calls read back and emit
+# logs for eth_getLogs, which enforces a result cap and a block range limit.
+# Per-era and validator set getters (--validators generated validators)
+# answer with values derived from the era and address, so reads repeat.
+#
+# Latency is added per HTTP request, so it costs the same per round trip as
+# a remote node would. Failures can be injected per call (JSON-RPC error),
+# per request (HTTP 503) or per mined transaction (status 0).
+#
+# Extra methods for the benchmark, not counted in the stats: mock_stats
+# (requests and calls since the last reset, by method), mock_reset and
+# mock_mine (produce a block now).
+#
+# MockRuntime stands in for the docker container for node-supervisor.py: it
+# boots a mock node with a delay, reports no peers at first, and can stop
+# producing blocks after a while so stall handling can be exercised.
+
+CHAIN_ID = 8408
+
+# Status values reported by the mock after each staking call
+STATUS_NOMINATOR = 1
+STATUS_VALIDATOR = 2
+
+INITIAL_BALANCE = 1000 * 10**18
+INITIAL_STAKE = 10 * 10**18
+# Active stake validate needs; just above INITIAL_STAKE, so an account reaches it with a bondExtra
+MIN_VALIDATOR_BOND = 11 * 10**18
+
+# Past-era payouts older than this many eras are reported as claimed
+CLAIM_DELAY = 7
+
+# Nominators per validator that are paid; validators above it are oversubscribed
+MAX_NOMINATORS_REWARDED = 512
+
+
+# Precompile functions: selector -> (precompile, name, argument types)
+FUNCTIONS = {SELECTORS[name]: (precompile, name, types) for name, (precompile, types, _, _) in PRECOMPILE_FUNCTIONS.items()}
+
+# Functions that change state (simulated on a scratch account by eth_call)
+STATE_CHANGING = {name for name, (_, _, _, mutability) in PRECOMPILE_FUNCTIONS.items() if mutability == "nonpayable"}
+
+# Gas reported by eth_estimateGas and charged in receipts
+CALL_GAS = 60000
+TRANSFER_GAS = 21000
+
+
+class InjectedFailure(Exception):
+    pass
+
+
+class Revert(Exception):
+    pass
+
+
+class MockAccount:
+    def __init__(self):
+        self.balance = INITIAL_BALANCE
+        self.nonce = 0
+        self.bonded = True
+        self.total_stake = INITIAL_STAKE
+        self.active_stake = INITIAL_STAKE
+        self.status = 0
+        self.payee = None
+        self.commission = None
+        self.targets = []
+        self.session_keys = None
+
+
+# Chain state shared by every request handler thread
+class MockChain:
+    def __init__(self, block_time=1.0, error_rate=0.0, revert_rate=0.0, seed=None, active_era=42, history_depth=84,
+                 max_logs=10000, max_log_range=100000, validators=200):
+        self.lock = threading.Lock()
+        self.block_time = block_time
+        self.error_rate = error_rate
+        self.revert_rate = revert_rate
+        self.random = random.Random(seed)
+        self.block = 100
+        # system_health peers; a halted chain stops producing blocks
+        self.peers = 8
+        self.halted = False
+        # Set by MockServer.stop: kept-alive connections are dropped, as by a stopped node
+        self.stopped = False
+        self.active_era = active_era
+        self.history_depth = history_depth
+        self.accounts = {}
+        self.pending = {}
+        self.receipts = {}
+        # Every accepted transaction by hash, for eth_getTransactionByHash
+        self.transactions = {}
+        self.logs = []
+        # eth_getLogs limits, like a public endpoint
+        self.max_logs = max_logs
+        self.max_log_range = max_log_range
+        # Generated validator set; accounts that call validate() join it
+        self.validator_set = [to_checksum_address(keccak(text=f"validator-{i}")[-20:]) for i in range(validators)]
+        self.validator_lookup = set(self.validator_set)
+        self.stats_requests = 0
+        self.stats_methods = {}
+
+    def account(self, address):
+        address = address.lower()
+        if address not in self.accounts:
+            self.accounts[address] = MockAccount()
+        return self.accounts[address]
+
+    # ---- staking precompiles ----
+
+    def view(self, to, data):
+        entry = FUNCTIONS.get(data[:10])
+        if entry is None or entry[0] != to.lower():
+            raise Revert("unknown function")
+        _, name, types = entry
+        args = decode(types, bytes.fromhex(data[10:])) if types else ()
+
+        if name in ("activeEra", "currentEra"):
+            return encode(['uint256'], [self.active_era])
+        if name == "historyDepth":
+            return encode(['uint256'], [self.history_depth])
+        if name == "bonded":
+            return encode(['bool'], [self.account(args[0]).bonded])
+        if name == "status":
+            return encode(['uint256'], [self.account(args[0]).status])
+        if name == "stake":
+            account = self.account(args[0])
+            return encode(['uint256', 'uint256'], [account.total_stake, account.active_stake])
+        if name in ("eraStake", "eraExposure", "eraPayout"):
+            return self.era_value(name, *args)
+        if name == "validators":
+            joined = [to_checksum_address(address) for address, account in self.accounts.items()
+                      if account.status == STATUS_VALIDATOR]
+            return encode(['address[]'], [self.validator_set + joined])
+        if name == "maxNominatorsRewarded":
+            return encode(['uint32'], [MAX_NOMINATORS_REWARDED])
+        if name in ("validatorPrefs", "eraPoints", "nominatorCount"):
+            return self.validator_value(name, *args)
+        # State-changing functions return nothing when called
+        return b""
+
+    # eth_call: reads go to view(); a state-changing call with a sender runs
+    # apply() on a scratch copy of the sender, so it reverts like the real
+    # transaction would without changing anything
+    def simulate(self, call):
+        to = call.get("to") or ""
+        data = call.get("data") or call.get("input", "0x")
+        entry = FUNCTIONS.get(data[:10])
+        if entry is None or not call.get("from") or entry[1] not in STATE_CHANGING:
+            return self.view(to, data)
+        sender = call["from"].lower()
+        saved = self.accounts.get(sender)
+        self.accounts[sender] = copy.copy(self.account(sender))
+        try:
+            self.apply(sender, to, data)
+        finally:
+            if saved is None:
+                del self.accounts[sender]
+            else:
+                self.accounts[sender] = saved
+        return b""
+
+    # Per-era values: the current era reflects the account, past eras are
+    # derived from (era, address) so they never change between calls
+    def era_value(self, name, era, who):
+        if era > self.active_era or era < self.active_era - self.history_depth:
+            raise Revert("EraOutOfHistory")
+        account = self.account(who)
+        seed = int.from_bytes(keccak(era.to_bytes(32, 'big') + bytes.fromhex(who[2:]))[:8], 'big')
+        stake = account.active_stake if era == self.active_era else INITIAL_STAKE + seed % 10**18
+        if name == "eraStake":
+            return encode(['uint256'], [stake])
+        if name == "eraExposure":
+            if to_checksum_address(who) in self.validator_lookup:
+                others = (seed % 50000) * 10**18
+            else:
+                others = seed % (5 * 10**18) if account.status == STATUS_VALIDATOR or seed % 3 == 0 else 0
+            return encode(['uint256', 'uint256', 'uint256'], [stake + others, stake, others])
+        if era == self.active_era:
+            return encode(['uint256', 'bool'], [0, False])
+        payout = stake * (100 + seed % 100) // 10**6
+        return encode(['uint256', 'bool'], [payout, era < self.active_era - CLAIM_DELAY])
+
+    # Validator set values, derived from the address like era_value
+    def validator_value(self, name, *args):
+        era, who = args if name == "eraPoints" else (0, args[0])
+        account = self.account(who)
+        seed = int.from_bytes(keccak(era.to_bytes(32, 'big') + bytes.fromhex(who[2:]))[:8], 'big')
+        if name == "validatorPrefs":
+            commission = account.commission if account.commission is not None else seed % (25 * COMMISSION_PER_PERCENT)
+            return encode(['uint32', 'bool'], [commission, seed % 17 == 0])
+        if name == "nominatorCount":
+            return encode(['uint32'], [seed % (MAX_NOMINATORS_REWARDED + 150)])
+        return encode(['uint256'], [0 if seed % 11 == 0 else 20 * (seed % 4000)])
+
+    # Run a state-changing call; returns the events it emits as (signature, account, data types, data values)
+    def apply(self, sender, to, data):
+        entry = FUNCTIONS.get(data[:10])
+        if entry is None or entry[0] != to.lower():
+            raise Revert("unknown function")
+        _, name, types = entry
+        args = decode(types, bytes.fromhex(data[10:])) if types else ()
+        account = self.account(sender)
+
+        if name == "bondWithPayeeAddress":
+            if account.bonded:
+                raise Revert("AlreadyBonded")
+            account.bonded = True
+            account.total_stake = account.active_stake = args[0]
+            account.payee = args[1]
+            return [("Bonded(address,uint256)", sender, ['uint256'], [args[0]]),
+                    ("PayeeSet(address,address)", sender, ['address'], [args[1]])]
+        if name == "setKeys":
+            account.session_keys = args[0].hex()
+            return [("KeysSet(address,bytes)", sender, ['bytes'], [args[0]])]
+        if not account.bonded:
+            raise Revert("NotBonded")
+        if name == "bondExtra":
+            if args[0] > account.balance:
+                raise Revert("InsufficientBalance")
+            account.balance -= args[0]
+            account.total_stake += args[0]
+            account.active_stake += args[0]
+            return [("Bonded(address,uint256)", sender, ['uint256'], [args[0]])]
+        if name == "unbond":
+            account.active_stake = max(0, account.active_stake - args[0])
+            return [("Unbonded(address,uint256)", sender, ['uint256'], [args[0]])]
+        if name == "validate":
+            if account.active_stake < MIN_VALIDATOR_BOND:
+                raise Revert("InsufficientBond")
+            account.commission, _ = args
+            account.status = STATUS_VALIDATOR
+            return [("Validated(address,uint32,bool)", sender, ['uint32', 'bool'], list(args))]
+        if name == "nominate":
+            account.targets = list(args[0])
+            account.status = STATUS_NOMINATOR
+            return [("Nominated(address,address[])", sender, ['address[]'], [list(args[0])])]
+        if name == "setPayee":
+            account.payee = args[0]
+            return [("PayeeSet(address,address)", sender, ['address'], [args[0]])]
+        if name == "chill":
+            account.status = 0
+            return [("Chilled(address)", sender, [], [])]
+        raise Revert(f"{name} is read-only")
+
+    def add_log(self, block, tx_hash, tx_index, log_index, contract, signature, account, types, values):
+        log = {
+            "address": to_checksum_address(contract),
+            "topics": ["0x" + keccak(text=signature).hex(), "0x" + encode(['address'], [account]).hex()],
+            "data": "0x" + encode(types, values).hex(),
+            "blockNumber": hex(block),
+            "blockHash": "0x" + keccak(block.to_bytes(32, 'big')).hex(),
+            "transactionHash": tx_hash,
+            "transactionIndex": hex(tx_index),
+            "logIndex": hex(log_index),
+            "removed": False,
+        }
+        self.logs.append(log)
+        return log
+
+    def get_logs(self, log_filter):
+        def block_number(tag, default):
+            if tag is None:
+                return default
+            return self.block if tag in ("latest", "pending", "safe", "finalized") else int(tag, 16)
+
+        start = block_number(log_filter.get("fromBlock"), self.block)
+        end = block_number(log_filter.get("toBlock"), self.block)
+        if end - start + 1 > self.max_log_range:
+            raise ValueError(f"block range is too wide (maximum {self.max_log_range})")
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {address.lower() for address in addresses} if addresses else None
+        topics = log_filter.get("topics") or []
+
+        matches = []
+        for log in self.logs:
+            block = int(log["blockNumber"], 16)
+            if block < start or block > end:
+                continue
+            if addresses and log["address"].lower() not in addresses:
+                continue
+            if any(wanted and log["topics"][i] not in (wanted if isinstance(wanted, list) else [wanted])
+                   for i, wanted in enumerate(topics) if i < len(log["topics"])):
+                continue
+            matches.append(log)
+            if len(matches) > self.max_logs:
+                raise ValueError(f"query returned more than {self.max_logs} results")
+        return matches
+
+    # ---- transactions ----
+
+    def send_raw(self, raw):
+        payload = bytes.fromhex(raw[2:] if raw.startswith("0x") else raw)
+        tx_hash = "0x" + keccak(payload).hex()
+        if tx_hash in self.pending or tx_hash in self.receipts:
+            raise ValueError("already known")
+
+        if payload[0] == 2:
+            chain_id, nonce, _, _, gas, to, value, data = rlp.decode(payload[1:])[:8]
+            chain_id = int.from_bytes(chain_id, 'big')
+        else:
+            nonce, _, gas, to, value, data, v = rlp.decode(payload)[:7]
+            v = int.from_bytes(v, 'big')
+            chain_id = (v - 35) // 2 if v >= 35 else None
+        if chain_id is not None and chain_id != CHAIN_ID:
+            raise ValueError("invalid chain id")
+
+        sender = Account.recover_transaction(raw)
+        nonce = int.from_bytes(nonce, 'big')
+        account = self.account(sender)
+        if nonce < account.nonce:
+            raise ValueError("nonce too low")
+        # A new transaction with a pending nonce replaces the old one
+        for old_hash, old in list(self.pending.items()):
+            if old["sender"] == sender.lower() and old["nonce"] == nonce:
+                del self.pending[old_hash]
+
+        self.pending[tx_hash] = {
+            "sender": sender.lower(),
+            "nonce": nonce,
+            "to": "0x" + to.hex() if to else None,
+            "value": int.from_bytes(value, 'big'),
+            "data": "0x" + data.hex(),
+            "gas": int.from_bytes(gas, 'big'),
+        }
+        self.transactions[tx_hash] = self.pending[tx_hash]
+        return tx_hash
+
+    def get_transaction(self, tx_hash):
+        tx = self.transactions.get(tx_hash)
+        if tx is None:
+            return None
+        receipt = self.receipts.get(tx_hash)
+        return {
+            "hash": tx_hash,
+            "from": to_checksum_address(tx["sender"]),
+            "to": to_checksum_address(tx["to"]) if tx["to"] else None,
+            "nonce": hex(tx["nonce"]),
+            "value": hex(tx["value"]),
+            "input": tx["data"],
+            "gas": hex(tx["gas"]),
+            "gasPrice": hex(10**9),
+            "blockNumber": receipt["blockNumber"] if receipt else None,
+            "blockHash": receipt["blockHash"] if receipt else None,
+            "transactionIndex": receipt["transactionIndex"] if receipt else None,
+        }
+
+    def pending_count(self, address):
+        return sum(1 for tx in self.pending.values() if tx["sender"] == address.lower())
+
+    def mine(self):
+        with self.lock:
+            self._mine()
+
+    # Include every pending transaction whose nonce is next for its sender
+    def _mine(self):
+        self.block += 1
+        included = True
+        index = 0
+        while included:
+            included = False
+            for tx_hash, tx in sorted(self.pending.items(), key=lambda item: item[1]["nonce"]):
+                account = self.account(tx["sender"])
+                if tx["nonce"] != account.nonce:
+                    continue
+                del self.pending[tx_hash]
+                account.nonce += 1
+                self.receipts[tx_hash] = self._execute(tx_hash, tx, index)
+                index += 1
+                included = True
+
+    def _execute(self, tx_hash, tx, index):
+        status = 1
+        gas_used = TRANSFER_GAS
+        logs = []
+        if tx["to"] in (NATIVE_STAKING_ADDRESS, KEY_MANAGER_ADDRESS):
+            gas_used = CALL_GAS
+            try:
+                if self.random.random() < self.revert_rate:
+                    raise Revert("injected revert")
+                for event in self.apply(tx["sender"], tx["to"], tx["data"]):
+                    logs.append(self.add_log(self.block, tx_hash, index, len(self.logs), tx["to"], *event))
+            except (Revert, ValueError):
+                status = 0
+        elif tx["value"]:
+            self.account(tx["sender"]).balance -= tx["value"]
+            self.account(tx["to"]).balance += tx["value"]
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": hex(index),
+            "blockNumber": hex(self.block),
+            "blockHash": "0x" + keccak(self.block.to_bytes(32, 'big')).hex(),
+            "from": to_checksum_address(tx["sender"]),
+            "to": to_checksum_address(tx["to"]) if tx["to"] else None,
+            "gasUsed": hex(gas_used),
+            "cumulativeGasUsed": hex(gas_used * (index + 1)),
+            "effectiveGasPrice": hex(10**9),
+            "contractAddress": None,
+            "logs": logs,
+            "logsBloom": "0x" + "00" * 256,
+            "status": hex(status),
+            "type": "0x0",
+        }
+
+    # ---- JSON-RPC ----
+
+    def handle(self, request):
+        method = request.get("method")
+        params = request.get("params") or []
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            if method.startswith("mock_"):
+                reply["result"] = self.mock_method(method)
+                return reply
+            with self.lock:
+                self.stats_methods[method] = self.stats_methods.get(method, 0) + 1
+                if self.random.random() < self.error_rate:
+                    raise InjectedFailure("injected failure")
+                reply["result"] = self.call(method, params)
+        except InjectedFailure as e:
+            reply["error"] = {"code": -32603, "message": str(e)}
+        except Revert as e:
+            # Reason encoded as Error(string), like an EVM revert
+            data = "0x08c379a0" + encode(['string'], [str(e)]).hex()
+            reply["error"] = {"code": 3, "message": f"execution reverted: {e}", "data": data}
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            reply["error"] = {"code": -32000, "message": str(e)}
+        return reply
+
+    def call(self, method, params):
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "net_version":
+            return str(CHAIN_ID)
+        if method == "eth_blockNumber":
+            return hex(self.block)
+        if method == "eth_gasPrice":
+            return hex(10**9)
+        if method == "eth_getBalance":
+            return hex(self.account(params[0]).balance)
+        if method == "eth_getTransactionCount":
+            account = self.account(params[0])
+            tag = params[1] if len(params) > 1 else "latest"
+            return hex(account.nonce + (self.pending_count(params[0]) if tag == "pending" else 0))
+        if method == "eth_call":
+            return "0x" + self.simulate(params[0]).hex()
+        if method == "eth_estimateGas":
+            call = params[0]
+            if call.get("to", "").lower() in (NATIVE_STAKING_ADDRESS, KEY_MANAGER_ADDRESS):
+                self.simulate(call)
+                return hex(CALL_GAS)
+            return hex(TRANSFER_GAS)
+        if method == "eth_sendRawTransaction":
+            tx_hash = self.send_raw(params[0])
+            if not self.block_time:
+                self._mine()
+            return tx_hash
+        if method == "eth_getTransactionByHash":
+            return self.get_transaction(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method == "eth_getBlockByNumber":
+            return {"number": hex(self.block), "hash": "0x" + keccak(self.block.to_bytes(32, 'big')).hex(),
+                    "timestamp": hex(int(time.time())), "transactions": [], "baseFeePerGas": hex(10**9)}
+        if method == "eth_getLogs":
+            return self.get_logs(params[0])
+        if method == "system_health":
+            return {"peers": self.peers, "isSyncing": False, "shouldHavePeers": True}
+        if method == "system_syncState":
+            return {"startingBlock": 0, "currentBlock": self.block, "highestBlock": self.block}
+        if method == "author_rotateKeys":
+            return "0x" + keccak(str(time.time()).encode()).hex() * 2
+        if method == "author_hasSessionKeys":
+            return True
+        raise ValueError(f"Method not found: {method}")
+
+    def mock_method(self, method):
+        if method == "mock_mine":
+            self.mine()
+            return self.block
+        with self.lock:
+            if method == "mock_stats":
+                return {
+                    "requests": self.stats_requests,
+                    "calls": sum(self.stats_methods.values()),
+                    "methods": dict(self.stats_methods),
+                    "block": self.block,
+                }
+            if method == "mock_reset":
+                self.stats_requests = 0
+                self.stats_methods = {}
+                return True
+        raise ValueError(f"Method not found: {method}")
+
+    # Block production for block_time > 0; with 0 every transaction is mined as it arrives
+    def run_blocks(self, stop):
+        if not self.block_time:
+            return
+        while not stop.wait(self.block_time):
+            if not self.halted:
+                self.mine()
+
+
+def make_handler(chain, latency=0.0, jitter=0.0, http_error_rate=0.0):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if chain.stopped:
+                self.close_connection = True
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            requests = body if isinstance(body, list) else [body]
+            counted = not requests or any(not request.get("method", "").startswith("mock_") for request in requests)
+
+            if counted:
+                with chain.lock:
+                    chain.stats_requests += 1
+                    fail = chain.random.random() < http_error_rate
+                    delay = latency + (chain.random.uniform(0, jitter) if jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+            if requests:
+                replies = [chain.handle(request) for request in requests]
+                data = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+            else:
+                # Like a spec-compliant node, an empty batch gets a single error object
+                data = json.dumps({"jsonrpc": "2.0", "id": None,
+                                   "error": {"code": -32600, "message": "Invalid request"}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+
+# Mock node running in background threads; url is set once started
+class MockServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, http_error_rate=0.0, **chain_options):
+        self.chain = MockChain(**chain_options)
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.chain, latency, jitter, http_error_rate))
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.chain.run_blocks, args=(self._stop,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.chain.stopped = True
+        self._stop.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Container runtime for node-supervisor.py backed by a mock node on a fixed
+# port. start() returns at once, like `docker run -d`; the node answers RPC
+# after boot_seconds, finds peers peer_seconds later, and stops importing
+# blocks stall_after seconds after it came up (on the first stalls starts).
+class MockRuntime:
+    def __init__(self, port, block_time=1.0, boot_seconds=2.0, peer_seconds=1.0, stall_after=None, stalls=1):
+        self.port = port
+        self.block_time = block_time
+        self.boot_seconds = boot_seconds
+        self.peer_seconds = peer_seconds
+        self.stall_after = stall_after
+        self.stalls = stalls
+        self.server = None
+        self.starts = 0
+        self._generation = 0
+        self._timers = []
+        self._lock = threading.Lock()
+
+    def status(self):
+        with self._lock:
+            return "running" if self._timers or self.server is not None else "missing"
+
+    def start(self):
+        with self._lock:
+            self.starts += 1
+            self._generation += 1
+            stall = self.stall_after if self.starts <= self.stalls else None
+            self._timers = [threading.Timer(self.boot_seconds, self._boot, args=(self._generation, stall))]
+            self._timers[0].daemon = True
+            self._timers[0].start()
+
+    def _boot(self, generation, stall):
+        server = MockServer(port=self.port, block_time=self.block_time)
+        server.chain.peers = 0
+        server.start()
+        with self._lock:
+            # Stopped while booting
+            if generation != self._generation:
+                server.stop()
+                return
+            self.server = server
+            self._timers = [threading.Timer(self.peer_seconds, setattr, args=(server.chain, "peers", 8))]
+            if stall is not None:
+                self._timers.append(threading.Timer(stall, setattr, args=(server.chain, "halted", True)))
+            for timer in self._timers:
+                timer.daemon = True
+                timer.start()
+
+    def stop(self, timeout=None):
+        with self._lock:
+            self._generation += 1
+            for timer in self._timers:
+                timer.cancel()
+            self._timers = []
+            server, self.server = self.server, None
+        if server is not None:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock ZenChain JSON-RPC node")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--block-time", type=float, default=1.0, help="seconds between blocks (0 = mine every transaction on arrival)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with a JSON-RPC error")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument("--revert-rate", type=float, default=0.0, help="share of staking transactions mined with status 0")
+    parser.add_argument("--seed", type=int, help="random seed for jitter and failure injection")
+    parser.add_argument("--max-logs", type=int, default=10000, help="eth_getLogs result cap")
+    parser.add_argument("--max-log-range", type=int, default=100000, help="widest eth_getLogs block range")
+    parser.add_argument("--validators", type=int, default=200, help="size of the generated validator set")
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                        http_error_rate=args.http_error_rate, block_time=args.block_time,
+                        error_rate=args.error_rate, revert_rate=args.revert_rate, seed=args.seed,
+                        max_logs=args.max_logs, max_log_range=args.max_log_range, validators=args.validators)
+    server.start()
+    print(f"Mock ZenChain node on {server.url} (block time {args.block_time}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+from client import batch_request, RPCError
+
+# Supervisor for the zenchain node container.
+#
+#   python3 node-supervisor.py                       # start the node if needed, then watch it
+#   python3 node-supervisor.py --restart --once      # restart now, return once the node is ready
+#   python3 node-supervisor.py --runtime mock        # against a mock node (see mock_rpc.py)
+#
+# Readiness is read from the node itself: system_health and system_syncState
+# are polled every --poll seconds from the moment the container starts. The
+# node is ready once RPC answers, it has peers and its current block has
+# moved, so there is no fixed sleep after `docker run`. A ready node is then
+# polled every --interval seconds; when block import has not moved for
+# --stall seconds, RPC has not answered for as long, or the container is no
+# longer running, the container is recreated. The first restart after a
+# healthy spell happens at once; further restarts in a row wait --backoff
+# seconds, doubling up to --max-backoff. The streak resets after --stable
+# seconds of healthy running.
+#
+# Starts, restarts with their reasons, and the time from start to ready are
+# kept in --state (JSON), rewritten after every change.
+#
+# The container runtime is a small object with status(), start() and
+# stop(timeout): DockerRuntime below runs the node with the flags run_node
+# in zenchain.sh uses; MockRuntime in mock_rpc.py stands in for it in tests.
+# With --safe-rpc (the restart after setting keys) the node only serves
+# safe RPC methods, so author_* stays closed, and 9944 is published on
+# 127.0.0.1 alone, just enough for the readiness polls.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+IMAGE = "ghcr.io/zenchain-protocol/zenchain-testnet:latest"
+CONTAINER = "zenchain"
+BOOTNODE = "/dns4/node-7242611732906999808-0.p2p.onfinality.io/tcp/26266/p2p/12D3KooWLAH3GejHmmchsvJpwDYkvacrBeAQbJrip5oZSymx5yrE"
+
+# Load NODE_NAME from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
+
+# Readiness / restart times kept in the state file
+HISTORY = 20
+
+
+def load_node_name():
+    try:
+        with open(file_path, 'r') as file:
+            for line in file:
+                if line.startswith("NODE_NAME="):
+                    return line.split('=', 1)[1].strip()
+    except FileNotFoundError:
+        pass
+    return None
+
+
+class DockerRuntime:
+    def __init__(self, node_name, name=CONTAINER, image=IMAGE, data_dir=os.path.expanduser("~/chain-data"),
+                 safe_rpc=False):
+        self.node_name = node_name
+        self.name = name
+        self.image = image
+        self.data_dir = data_dir
+        self.safe_rpc = safe_rpc
+
+    def _docker(self, *args):
+        return subprocess.run(["docker", *args], capture_output=True, text=True)
+
+    # "running", "exited", "created", ... or "missing"
+    def status(self):
+        result = self._docker("inspect", "-f", "{{.State.Status}}", self.name)
+        return result.stdout.strip() if result.returncode == 0 else "missing"
+
+    def start(self):
+        if self.safe_rpc:
+            rpc_port = "127.0.0.1:9944:9944"
+            rpc_flags = ["--rpc-methods=safe", "--rpc-external"]
+        else:
+            rpc_port = "9944:9944"
+            rpc_flags = ["--rpc-cors=all", "--rpc-methods=unsafe", "--unsafe-rpc-external"]
+        result = self._docker(
+            "run", "-d", "--name", self.name,
+            "-p", rpc_port, "-p", "30333:30333",
+            "-v", f"{self.data_dir}:/chain-data",
+            self.image,
+            "./usr/bin/zenchain-node",
+            "--base-path=/chain-data",
+            *rpc_flags,
+            "--validator",
+            f"--name={self.node_name}",
+            f"--bootnodes={BOOTNODE}",
+            "--chain=zenchain_testnet",
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"docker run failed: {result.stderr.strip()}")
+
+    # Stop and remove the container; a missing container is fine
+    def stop(self, timeout=30):
+        self._docker("stop", "-t", str(int(timeout)), self.name)
+        self._docker("rm", "-f", self.name)
+
+
+# One poll of the node: {"block": ..., "peers": ..., "syncing": ...} or {"error": ...}
+def probe(rpc_url, timeout):
+    try:
+        health, sync_state = batch_request([("system_health", []), ("system_syncState", [])], rpc_url, timeout)
+    except Exception as e:
+        return {"error": str(e)}
+    for reply in (health, sync_state):
+        if isinstance(reply, RPCError):
+            return {"error": str(reply)}
+    peers = health.get("peers", 0)
+    # A dev chain has no peers to find
+    if not health.get("shouldHavePeers", True):
+        peers = max(peers, 1)
+    return {"block": sync_state["currentBlock"], "peers": peers, "syncing": health.get("isSyncing")}
+
+
+class NodeSupervisor:
+    def __init__(self, runtime, rpc_url, state_path=None, poll=0.5, interval=5, stall=120, ready_timeout=900,
+                 backoff=10, max_backoff=300, stable=600, stop_timeout=30):
+        self.runtime = runtime
+        self.rpc_url = rpc_url
+        self.state_path = state_path
+        self.poll = poll
+        self.interval = interval
+        self.stall = stall
+        self.ready_timeout = ready_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable = stable
+        self.stop_timeout = stop_timeout
+        self.streak = 0
+        self.streak_start = time.monotonic()
+        self.stopping = False
+        self.state = {"starts": 0, "restarts": 0, "ready": 0, "status": "idle",
+                      "last_ready_seconds": None, "ready_seconds": [], "restart_reasons": []}
+
+    def log(self, message, color=""):
+        print(f"{color}{time.strftime('%H:%M:%S')} {message}{RESET if color else ''}", flush=True)
+
+    def save(self, **changes):
+        self.state.update(changes)
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, 'w') as out:
+            json.dump(self.state, out, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def sleep(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(min(0.2, deadline - time.monotonic()))
+
+    def start(self):
+        self.save(starts=self.state["starts"] + 1, status="starting")
+        self.runtime.start()
+
+    def restart(self, reason):
+        self.streak += 1
+        delay = 0 if self.streak == 1 else min(self.max_backoff, self.backoff * 2 ** (self.streak - 2))
+        reasons = (self.state["restart_reasons"] + [{"time": time.time(), "reason": reason}])[-HISTORY:]
+        self.save(restarts=self.state["restarts"] + 1, restart_reasons=reasons, status="restarting")
+        self.log(f"Restarting: {reason}" + (f" in {delay}s (restart {self.streak} in a row)" if delay else ""), RED)
+        self.sleep(delay)
+        if self.stopping:
+            return
+        started = time.monotonic()
+        self.runtime.stop(self.stop_timeout)
+        self.log(f"Container stopped in {time.monotonic() - started:.1f}s")
+        self.start()
+
+    # Poll from start until ready; returns (seconds to ready, block), or (None, the reason it gave up)
+    def wait_ready(self, started):
+        first_block = None
+        last = {}
+        while not self.stopping:
+            elapsed = time.monotonic() - started
+            if elapsed > self.ready_timeout:
+                return None, f"not ready after {self.ready_timeout:.0f}s ({last.get('error') or last})"
+            status = self.runtime.status()
+            if status != "running":
+                return None, f"container is {status} while starting"
+            last = probe(self.rpc_url, max(self.poll, 2))
+            if "error" not in last:
+                if first_block is None:
+                    first_block = last["block"]
+                elif last["peers"] > 0 and last["block"] > first_block:
+                    return time.monotonic() - started, last["block"]
+            self.sleep(self.poll)
+        return None, "supervisor stopped"
+
+    # Wait for a freshly started container, restarting it until it comes up ready
+    def until_ready(self):
+        started = time.monotonic()
+        while not self.stopping:
+            seconds, detail = self.wait_ready(started)
+            if seconds is not None:
+                self.streak_start = time.monotonic()
+                times = (self.state["ready_seconds"] + [round(seconds, 2)])[-HISTORY:]
+                self.save(ready=self.state["ready"] + 1, last_ready_seconds=round(seconds, 2), ready_seconds=times,
+                          status="ready")
+                self.log(f"Node ready in {seconds:.1f}s at block {detail}", GREEN)
+                return True
+            if self.stopping:
+                break
+            self.restart(detail)
+            started = time.monotonic()
+        return False
+
+    # Watch a ready node; returns the reason it needs a restart
+    def watch(self):
+        last_block = None
+        last_progress = last_answer = time.monotonic()
+        while not self.stopping:
+            self.sleep(self.interval)
+            if self.stopping:
+                break
+            now = time.monotonic()
+            status = self.runtime.status()
+            if status != "running":
+                return f"container is {status}"
+            result = probe(self.rpc_url, max(2, self.interval))
+            if "error" in result:
+                if now - last_answer >= self.stall:
+                    return f"RPC has not answered for {now - last_answer:.0f}s ({result['error']})"
+                continue
+            last_answer = now
+            if last_block is None or result["block"] > last_block:
+                last_block = result["block"]
+                last_progress = now
+            elif now - last_progress >= self.stall:
+                return f"no block imported for {now - last_progress:.0f}s (stuck at {last_block}, {result['peers']} peers)"
+            if self.streak and now - self.streak_start >= self.stable:
+                self.streak = 0
+        return None
+
+    # Bring the node up (adopting a running container unless restart is set) and wait until it is ready
+    def bring_up(self, restart=False):
+        status = self.runtime.status()
+        if restart:
+            self.log("Restarting the node container")
+            started = time.monotonic()
+            self.runtime.stop(self.stop_timeout)
+            self.log(f"Container stopped in {time.monotonic() - started:.1f}s")
+            self.start()
+        elif status == "running":
+            self.log("Node container is already running; checking it")
+        else:
+            if status != "missing":
+                self.runtime.stop(self.stop_timeout)
+            self.log(f"Node container is {status}; starting it")
+            self.start()
+        return self.until_ready()
+
+    def run(self, restart=False, once=False):
+        if not self.bring_up(restart):
+            return False
+        if once:
+            return True
+        while not self.stopping:
+            reason = self.watch()
+            if reason is None:
+                break
+            self.restart(reason)
+            if not self.until_ready():
+                break
+        self.save(status="stopped")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start, watch and restart the zenchain node container")
+    parser.add_argument("--rpc-url", default="http://localhost:9944", help="the node's own RPC endpoint")
+    parser.add_argument("--runtime", choices=("docker", "mock"), default="docker",
+                        help="container runtime (mock: a mock node on the --rpc-url port, see mock_rpc.py)")
+    parser.add_argument("--container", default=CONTAINER)
+    parser.add_argument("--node-name", help="node name (default: NODE_NAME from priv-data.txt)")
+    parser.add_argument("--safe-rpc", action="store_true",
+                        help="docker runtime: serve only safe RPC methods, on 127.0.0.1 (after setting keys)")
+    parser.add_argument("--restart", action="store_true", help="recreate the container even if it is running")
+    parser.add_argument("--once", action="store_true", help="exit once the node is ready instead of watching it")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between readiness polls while starting")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between health polls once ready")
+    parser.add_argument("--stall", type=float, default=120, help="seconds without an imported block before a restart")
+    parser.add_argument("--ready-timeout", type=float, default=900, help="seconds a start may take before a restart")
+    parser.add_argument("--backoff", type=float, default=10, help="wait before the second restart in a row (doubles)")
+    parser.add_argument("--max-backoff", type=float, default=300)
+    parser.add_argument("--stable", type=float, default=600, help="seconds of healthy running that reset the backoff")
+    parser.add_argument("--stop-timeout", type=float, default=30, help="seconds docker stop waits for a clean shutdown")
+    parser.add_argument("--state", default="/root/chain-data/supervisor-state.json",
+                        help="JSON file for starts, restarts and time-to-ready ('' to keep nothing)")
+    parser.add_argument("--mock-stall", type=float, help="mock runtime: stop importing blocks this long after the first start")
+    args = parser.parse_args()
+
+    if args.runtime == "mock":
+        from urllib.parse import urlparse
+        from mock_rpc import MockRuntime
+        runtime = MockRuntime(urlparse(args.rpc_url).port, stall_after=args.mock_stall)
+    else:
+        node_name = args.node_name or load_node_name()
+        if not node_name:
+            print(f"{RED}No node name: pass --node-name or set NODE_NAME in {file_path}{RESET}")
+            sys.exit(1)
+        runtime = DockerRuntime(node_name, name=args.container, safe_rpc=args.safe_rpc)
+
+    supervisor = NodeSupervisor(runtime, args.rpc_url, args.state or None, poll=args.poll, interval=args.interval,
+                                stall=args.stall, ready_timeout=args.ready_timeout, backoff=args.backoff,
+                                max_backoff=args.max_backoff, stable=args.stable, stop_timeout=args.stop_timeout)
+
+    # Leave the node running when the supervisor itself is stopped
+    def stop(*_):
+        supervisor.stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        ok = supervisor.run(restart=args.restart, once=args.once)
+    except (OSError, RuntimeError) as e:
+        print(f"{RED}{e}{RESET}")
+        sys.exit(1)
+    state = supervisor.state
+    print(f"{state['starts']} starts, {state['restarts']} restarts, last time to ready: "
+          f"{state['last_ready_seconds'] if state['last_ready_seconds'] is not None else '-'}s")
+    if args.runtime == "mock":
+        runtime.stop()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
+import os
 import time
 import sys
-from web3 import Web3
+from client import get_web3, preflight
+from staking_abi import NATIVE_STAKING_ADDRESS, NATIVE_STAKING_ABI
+from nonce_manager import TxPipeline, BroadcastError
+from simulate import check_calls
+from tx_journal import open_run, JournalError
 
 # ANSI escape codes for green text
 GREEN = "\033[92m"
+RED = '\033[91m'
 RESET = "\033[0m"  # Reset to default color
 
-# Set the ZenChain RPC URL
-rpc_url = "https://zenchain-testnet.api.onfinality.io/public"
-
-# Load data from priv-data.txt
-file_path = "/root/chain-data/chains/priv-data.txt"
+# Load data from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
 
 try:
     with open(file_path, 'r') as file:
@@ -28,126 +31,82 @@ except IndexError:
 if SESSION_KEYS.startswith("0x"):
     SESSION_KEYS = SESSION_KEYS[2:]
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(rpc_url))
+# Initialize Web3 (shared pooled client, see client.py)
+w3 = get_web3()
+preflight(w3, MY_ADDRESS)
 
 
+# NativeStaking precompile (ABI shared with the other scripts, see staking_abi.py)
+staking_contract = w3.eth.contract(address=NATIVE_STAKING_ADDRESS, abi=NATIVE_STAKING_ABI)
 
-# Check if connected to the ZenChain network
-if not w3.is_connected():
-    print('Not connected to ZenChain')
-    sys.exit(1)
+# Nonces are assigned locally so dependent calls go out back to back (see nonce_manager.py)
+pipeline = TxPipeline(w3, MY_ADDRESS, PRIVATE_KEY)
 
-if not w3.is_address(MY_ADDRESS):
-    print(f"Invalid address: {MY_ADDRESS}")
-else:
+def send_transactions(funcs):
+    # An interrupted earlier run is reconciled against the chain first, and only
+    # its unfinished steps are sent (see tx_journal.py). The run is keyed by
+    # account: the planner may pick other targets after a restart, and the
+    # bond must still not be sent twice.
     try:
-        balance = w3.eth.get_balance(MY_ADDRESS)
-        balance_in_ether = w3.from_wei(balance, 'ether')
-        print(f"{GREEN}Balance for {MY_ADDRESS}: {balance_in_ether} ZCX{RESET}")
-    except Exception as e:
-        print(f"Error getting balance: {e}")
-
-
-
-# Load the NativeStaking contract
-NATIVE_STAKING_ADDRESS = '0x0000000000000000000000000000000000000800'
-NATIVE_STAKING_ABI = [
-    {
-        "inputs": [
-            {
-                "internalType": "address[]",
-                "name": "targets",
-                "type": "address[]"
-            }
-        ],
-        "name": "nominate",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        'inputs': [{'internalType': 'uint256', 'name': 'value', 'type': 'uint256'}],
-        'name': 'bondExtra',
-        'outputs': [],
-        'stateMutability': 'nonpayable',
-        'type': 'function'
-    },
-    {
-        "inputs": [
-            {
-                "internalType": "address",
-                "name": "",
-                "type": "address"
-            }
-        ],
-        "name": "bonded",
-        "outputs": [
-            {
-                "internalType": "bool",
-                "name": "",
-                "type": "bool"
-            }
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {
-                "internalType": "uint256",
-                "name": "value",
-                "type": "uint256"
-            },
-            {
-                "internalType": "address",
-                "name": "payee",
-                "type": "address"
-            }
-        ],
-        "name": "bondWithPayeeAddress",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-]
-
-
-
-
-staking_contract = w3.eth.contract(address=NATIVE_STAKING_ADDRESS, abi=NATIVE_STAKING_ABI)
-
-chain_id = 8408
-
-def send_transaction(func):
-    nonce = w3.eth.get_transaction_count(MY_ADDRESS)
-    transaction = func.build_transaction({
-        'chainId': chain_id,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price,
-        'nonce': nonce,
-    })
-    
-    signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-    
+        run = open_run("nominate", pipeline, funcs, key=MY_ADDRESS)
+    except JournalError as e:
+        print(f"{RED}{e}{RESET}")
+        return False
+    todo = run.pending()
+    funcs = [funcs[i] for i in todo]
+    if not funcs:
+        run.close_if_done()
+        return True
+
+    # Dry-run every call first (see simulate.py) so a doomed transaction is never signed.
+    # A call that only fails because it depends on the calls before it (bondExtra
+    # right after the nomination, for example) is checked again once they are mined.
+    start = 0
+    while start < len(funcs):
+        part = funcs[start:]
+        doomed, recheck = check_calls(MY_ADDRESS, part, pipeline.estimator)
+        for name, reason in doomed:
+            print(f"{RED}{name} would fail: {reason}. {'Nothing was sent.' if not start else 'It was not sent.'}{RESET}")
+        if doomed:
+            return False
+        if recheck is not None:
+            print(f"{GREEN} {part[recheck].fn_name} depends on the calls before it, it is checked again once they are mined.{RESET}")
+            part = part[:recheck]
+        if not send_part(run, part, todo[start:start + len(part)]):
+            return False
+        start += len(part)
+    return True
+
+
+# Sign, send and confirm funcs back to back; steps are their journal step indexes
+def send_part(run, funcs, steps):
     try:
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    
+        sent = pipeline.send(funcs, steps=[run.step(i) for i in steps])
+    except BroadcastError as e:
+        print(f"An error occurred: {e}")
+        sent = e.sent
+
+    for _, tx_hash in sent:
         # Create the explorer link using the transaction hash
         explorer_link = f"https://zentrace.io/tx/0x{tx_hash.hex()}"
         print(f"{GREEN}Transaction sent explorer Link: {explorer_link}")
 
-        print(f"{GREEN} Now Please wait 10 second...!")
-        
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        if tx_receipt['status'] == 1:
+    print(f"{GREEN} Now Please wait for confirmation...!")
+
+    results = pipeline.wait(sent)
+    run.finish_all(steps, results)
+    for result in results:
+        if result['status'] == 'success':
             print("Transaction successful!")
         else:
             print("Transaction failed with details:")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+            print(f"Transaction Hash: {result['tx_hash'].hex()}")
+            print(f"Status: {result['status']}")
+            if result['receipt'] is not None:
+                print(f"Logs: {result['receipt']['logs']}")
 
-    return tx_hash
+    # Every call must have been broadcast and mined successfully
+    return len(results) == len(funcs) and all(result['status'] == 'success' for result in results)
 
   
 
@@ -156,16 +115,40 @@ def check_bonded(address):
 
 
 
+# Nominated when the validator set cannot be read or scored
+FALLBACK_TARGETS = ['0xCFE98EcE20Bf688e9B0BE7dD3f348B90A3a48127', '0xef459153B68648947B6D2863B902595e22040FfA']
+
+
+# Best-scored validators from the whole set (see validator_planner.py)
+def choose_targets():
+    try:
+        from validator_planner import plan_targets
+        targets = plan_targets()
+    except Exception as e:
+        print(f"{RED}Could not rank validators ({e}), using the default targets.{RESET}")
+        return FALLBACK_TARGETS
+    if not targets:
+        print(f"{RED}No validator passed the planner's filters, using the default targets.{RESET}")
+        return FALLBACK_TARGETS
+    print(f"{GREEN}Nominating the {len(targets)} best-scored validators.{RESET}")
+    return targets
+
+
 def nominate_with_conditions():
-    targets = ['0xCFE98EcE20Bf688e9B0BE7dD3f348B90A3a48127', '0xef459153B68648947B6D2863B902595e22040FfA']  # List of target validator addresses
+    targets = choose_targets()
     try:
         print(f"{GREEN}Address {MY_ADDRESS} is not registered. Registering now...{RESET}")
         
         # Proceed to nominate and stake 1 token
         try:
             print("Proceeding to nominate and stake...")
-            send_transaction(staking_contract.functions.nominate(targets))
-            send_transaction(staking_contract.functions.bondExtra(1 * 10**18))  # Staking 1 token in wei
+            # Both calls are signed and broadcast back to back, then confirmed together
+            if not send_transactions([
+                staking_contract.functions.nominate(targets),
+                staking_contract.functions.bondExtra(1 * 10**18),  # Staking 1 token in wei
+            ]):
+                print(f"{RED}Nomination or stake did not complete for {MY_ADDRESS}.{RESET}")
+                return
             print(f"{GREEN}Nomination and 1 token stake successful for {MY_ADDRESS}.{RESET}")
 
         except Exception as e:
@@ -0,0 +1,198 @@
+import threading
+from hexbytes import HexBytes
+from web3.exceptions import TransactionNotFound
+from receipts import ReceiptTracker
+from fees import get_estimator, get_oracle
+from key_client import KeyAgentClient, is_agent_key
+
+# ZenChain testnet chain id
+CHAIN_ID = 8408
+
+# Node errors that mean our local nonce is out of step with the chain, or
+# that this very transaction already reached the node (a retried or failed
+# over send whose first response was lost)
+NONCE_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced", "nonce too high")
+
+# The node already holds the exact signed transaction
+KNOWN_ERRORS = ("already known", "already imported", "known transaction")
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+# Hands out sequential nonces locally so dependent transactions can be
+# signed and broadcast back to back. The chain is only asked once, and
+# again after resync() when a transaction was dropped or replaced.
+class NonceManager:
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._next = None
+        self._lock = threading.Lock()
+
+    def _chain_nonce(self):
+        return self.w3.eth.get_transaction_count(self.address, 'pending')
+
+    def next_nonce(self):
+        with self._lock:
+            if self._next is None:
+                self._next = self._chain_nonce()
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    # Give back a nonce whose transaction never reached the node
+    def release(self, nonce):
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+
+    # Forget local state and start again from the node's pending count
+    def resync(self):
+        with self._lock:
+            self._next = self._chain_nonce()
+            return self._next
+
+
+class BroadcastError(Exception):
+    def __init__(self, error, sent):
+        super().__init__(str(error))
+        self.sent = sent
+
+
+# Signs a list of contract calls with consecutive nonces, broadcasts them
+# without waiting in between, then waits for all receipts together.
+class TxPipeline:
+    # gas=None estimates the limit per function (see fees.py); pass a number to fix it.
+    # private_key="agent" signs through key-agent.py instead (see key_client.py).
+    def __init__(self, w3, address, private_key, chain_id=CHAIN_ID, gas=None, nonces=None, tracker=None,
+                 estimator=None, oracle=None):
+        self.w3 = w3
+        self.address = address
+        self.private_key = private_key
+        self.agent = KeyAgentClient() if is_agent_key(private_key) else None
+        self.chain_id = chain_id
+        self.gas = gas
+        self.nonces = nonces or NonceManager(w3, address)
+        self.tracker = tracker or ReceiptTracker(w3)
+        self.estimator = estimator or get_estimator(w3)
+        self.oracle = oracle or get_oracle()
+
+    def _sign(self, func, nonce, gas_price):
+        transaction = func.build_transaction({
+            'chainId': self.chain_id,
+            'from': self.address,
+            'gas': self.gas or self.estimator.estimate(func, self.address),
+            'gasPrice': gas_price,
+            'nonce': nonce,
+        })
+        if self.agent is not None:
+            return self.agent.sign_one(transaction)
+        return self.w3.eth.account.sign_transaction(transaction, private_key=self.private_key)
+
+    # Whether the node has this transaction, pending or mined. The router sends
+    # eth_getTransactionByHash to the endpoint the transaction was broadcast to,
+    # so a lagging replica cannot report it missing.
+    def _has_transaction(self, tx_hash):
+        try:
+            self.w3.eth.get_transaction(tx_hash)
+            return True
+        except TransactionNotFound:
+            return False
+
+    def _broadcast(self, func, gas_price, step=None):
+        nonce = self.nonces.next_nonce()
+        signed_txn = self._sign(func, nonce, gas_price)
+        if step is not None:
+            step.signed(nonce, signed_txn)
+        try:
+            sent = nonce, self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            if not is_nonce_error(e):
+                self.nonces.release(nonce)
+                raise
+            # A retried or failed-over send can be refused because its first
+            # attempt got through: that transaction is sent, and must not be
+            # signed again at another nonce
+            message = str(e).lower()
+            if any(text in message for text in KNOWN_ERRORS) or self._has_transaction(signed_txn.hash):
+                if step is not None:
+                    step.broadcast()
+                return nonce, HexBytes(signed_txn.hash)
+        else:
+            if step is not None:
+                step.broadcast()
+            return sent
+
+        # Our nonce was stale and the node does not have our transaction
+        # (another sender or a replaced tx): resync and retry once
+        self.nonces.resync()
+        nonce = self.nonces.next_nonce()
+        signed_txn = self._sign(func, nonce, gas_price)
+        if step is not None:
+            step.signed(nonce, signed_txn)
+        try:
+            sent = nonce, self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception:
+            self.nonces.release(nonce)
+            raise
+        if step is not None:
+            step.broadcast()
+        return sent
+
+    # Broadcast funcs in order and return [(nonce, tx_hash)]. Stops at the first
+    # failed broadcast (later calls depend on it) and raises BroadcastError,
+    # which still carries the transactions that did go out. steps are optional
+    # journal entries, one per func (see tx_journal.py): each is told when its
+    # transaction is signed, broadcast, or rejected by the node.
+    def send(self, funcs, steps=None):
+        gas_price = self.oracle.gas_price()
+        steps = steps or [None] * len(funcs)
+        sent = []
+        for func, step in zip(funcs, steps):
+            try:
+                sent.append(self._broadcast(func, gas_price, step))
+            except Exception as e:
+                if step is not None:
+                    step.rejected(e)
+                raise BroadcastError(e, sent) from e
+        return sent
+
+    # Wait for every sent transaction. Returns one dict per entry with
+    # status 'success', 'failed', 'replaced' (nonce used by another tx) or
+    # 'dropped' (not mined before timeout).
+    def wait(self, sent, timeout=None):
+        nonce_of = {tx_hash: nonce for nonce, tx_hash in sent}
+        replaced = set()
+
+        # A mined nonce without our receipt means the tx was replaced
+        def check_replaced(pending):
+            mined_nonce = self.w3.eth.get_transaction_count(self.address, 'latest')
+            for tx_hash in pending:
+                if nonce_of[tx_hash] < mined_nonce and self._receipt(tx_hash) is None:
+                    replaced.add(tx_hash)
+            return replaced
+
+        receipts = self.tracker.wait(list(nonce_of), timeout=timeout, on_block=check_replaced)
+
+        results = []
+        for nonce, tx_hash in sent:
+            receipt = receipts.get(tx_hash)
+            if receipt is not None:
+                status = 'success' if receipt['status'] == 1 else 'failed'
+            else:
+                status = 'replaced' if tx_hash in replaced else 'dropped'
+            results.append({'nonce': nonce, 'tx_hash': tx_hash, 'status': status, 'receipt': receipt})
+
+        if any(result['status'] in ('replaced', 'dropped') for result in results):
+            self.nonces.resync()
+
+        return results
+
+    def _receipt(self, tx_hash):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            return None
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+from web3.datastructures import AttributeDict
+from web3._utils.method_formatters import receipt_formatter
+from client import batch_request, read_url, RPCError
+
+# WebSocket endpoint for new blocks (override with ZENCHAIN_WS_URL, empty to always poll).
+# By default it is the endpoint the receipts are read from, on ws:// or wss://.
+WS_URL = os.environ.get("ZENCHAIN_WS_URL")
+
+# Default time to wait for receipts, in seconds
+RECEIPT_TIMEOUT = float(os.environ.get("ZENCHAIN_RECEIPT_TIMEOUT", "120"))
+
+
+# WebSocket URL of an HTTP(S) RPC endpoint; without rpc_url, of the endpoint
+# reads go to. None when the endpoint is not HTTP.
+def ws_url_for(rpc_url=None):
+    url = rpc_url or read_url()
+    if url.startswith("https://"):
+        return "wss://" + url[len("https://"):]
+    if url.startswith("http://"):
+        return "ws://" + url[len("http://"):]
+    return None
+
+
+# Waits for many transactions at once. Every new block triggers a single
+# batched receipt lookup for all hashes still pending. New blocks come from
+# a newHeads subscription on the WebSocket of the endpoint the receipts are
+# read from (the router's best in-sync endpoint when several are configured),
+# or from an adaptive eth_blockNumber poll when no WebSocket is reachable.
+class ReceiptTracker:
+    def __init__(self, w3, rpc_url=None, ws_url=WS_URL, timeout=RECEIPT_TIMEOUT, min_poll=0.5, max_poll=6):
+        self.w3 = w3
+        self.rpc_url = rpc_url
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.block_time = None  # seconds between blocks, learned while polling
+
+    # Wait for tx_hashes and return {tx_hash: receipt or None}. on_block is
+    # called with the still-pending hashes after each block and may return
+    # hashes to stop waiting for (e.g. replaced transactions).
+    def wait(self, tx_hashes, timeout=None, on_block=None):
+        results = {tx_hash: None for tx_hash in tx_hashes}
+        if not results:
+            return results
+        pending = set(tx_hashes)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+
+        def check():
+            self._resolve(pending, results)
+            if pending and on_block is not None:
+                pending.difference_update(on_block(set(pending)) or ())
+            return not pending
+
+        # Some may already be mined
+        if check():
+            return results
+
+        ws_url = self.ws_url if self.ws_url is not None else ws_url_for(self.rpc_url)
+        if ws_url and self._watch_ws(ws_url, check, deadline):
+            return results
+        self._watch_poll(check, deadline)
+        return results
+
+    # Look up every pending hash in one batch; mined receipts are formatted
+    # the way w3.eth.get_transaction_receipt would return them
+    def _resolve(self, pending, results):
+        # An empty JSON-RPC batch is an invalid request, so never send one
+        if not pending:
+            return
+        hashes = list(pending)
+        raw = batch_request([("eth_getTransactionReceipt", [self._hex(h)]) for h in hashes], self.rpc_url)
+        for tx_hash, receipt in zip(hashes, raw):
+            if receipt is None or isinstance(receipt, RPCError):
+                continue
+            results[tx_hash] = AttributeDict.recursive(receipt_formatter(receipt))
+            pending.discard(tx_hash)
+
+    @staticmethod
+    def _hex(tx_hash):
+        if isinstance(tx_hash, str):
+            return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+        return "0x" + bytes(tx_hash).hex()
+
+    # Returns True when done, False if the WebSocket could not be used
+    def _watch_ws(self, ws_url, check, deadline):
+        try:
+            from websockets.sync.client import connect
+        except ImportError:
+            return False
+
+        try:
+            ws = connect(ws_url, open_timeout=2)
+        except Exception:
+            return False
+
+        with ws:
+            try:
+                ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+                reply = json.loads(ws.recv(timeout=5))
+                if "error" in reply:
+                    return False
+
+                while time.monotonic() < deadline:
+                    try:
+                        ws.recv(timeout=deadline - time.monotonic())
+                    except TimeoutError:
+                        break
+                    # Skip headers that queued up while we were checking
+                    try:
+                        while True:
+                            ws.recv(timeout=0)
+                    except TimeoutError:
+                        pass
+                    if check():
+                        return True
+            except Exception:
+                # Connection dropped mid-wait: finish by polling
+                return False
+        return True
+
+    def _watch_poll(self, check, deadline):
+        last_block = self.w3.eth.block_number
+        last_seen = time.monotonic()
+        interval = self.min_poll
+        misses = 0
+
+        while time.monotonic() < deadline:
+            time.sleep(min(interval, max(0, deadline - time.monotonic())))
+            block = self.w3.eth.block_number
+            if block <= last_block:
+                # No new block yet: back off
+                misses += 1
+                interval = min(self.min_poll * 1.5 ** misses, self.max_poll)
+                continue
+
+            now = time.monotonic()
+            observed = (now - last_seen) / (block - last_block)
+            self.block_time = observed if self.block_time is None else 0.7 * self.block_time + 0.3 * observed
+            last_block, last_seen = block, now
+
+            if check():
+                return
+            # Sleep most of a block, then poll quickly for the next one
+            misses = 0
+            interval = max(self.min_poll, min(self.block_time * 0.8, self.max_poll))
@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from web3 import Web3
+from client import batch_request, parallel_batches, RPCError
+from chain_cache import ChainCache
+from staking_abi import NATIVE_STAKING_ADDRESS, eth_call, encode_call, decode_output
+
+# Per-era stake, exposure and payout report over the last historyDepth eras.
+#
+#   python3 rewards.py                                   # the account in priv-data.txt
+#   python3 rewards.py addresses.txt --format csv        # a fleet, one address per line
+#   python3 rewards.py --address 0xA --address 0xB --eras 20 --format jsonl
+#
+# activeEra and historyDepth are read first; then every (address, era) value
+# that is not cached yet is fetched in JSON-RPC batches, several batches in
+# flight at once. Completed eras cannot change, so their values are stored in
+# the chain cache with no era (kept forever) and later runs only fetch the
+# current era. The one exception is an unclaimed payout: its claimed flag can
+# still flip, so it is fetched again until it is claimed.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+# Per-era NativeStaking reads (see staking_abi.py)
+ERA_CALLS = ["eraStake", "eraExposure", "eraPayout"]
+
+FIELDS = ["address", "era", "stake_zcx", "exposure_total_zcx", "exposure_own_zcx", "payout_zcx", "claimed", "error"]
+
+
+def format_wei_to_zcx(wei_amount):
+    # Convert from wei to ZCX (divide by 10^18)
+    return wei_amount / 10**18
+
+
+def load_addresses(path):
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
+
+
+# The account from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+def own_address():
+    file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
+    try:
+        with open(file_path, 'r') as file:
+            return file.readline().split('=')[1].strip()
+    except FileNotFoundError:
+        print("Private data file not found!")
+        sys.exit(1)
+    except IndexError:
+        print("Failed to load MY_ADDRESS from priv-data.txt.")
+        sys.exit(1)
+
+
+# activeEra and historyDepth in one round trip
+def era_window(rpc_url):
+    active, depth = batch_request([eth_call("activeEra"), eth_call("historyDepth")], rpc_url)
+    for name, result in (("activeEra", active), ("historyDepth", depth)):
+        if isinstance(result, RPCError):
+            print(f"Error retrieving {name}: {result}")
+            sys.exit(1)
+    return decode_output("activeEra", active)[0], decode_output("historyDepth", depth)[0]
+
+
+# A completed era's value is final, except a payout that has not been claimed yet
+def is_final(name, value):
+    return name != "eraPayout" or value[1] or value[0] == 0
+
+
+class RewardHistory:
+    def __init__(self, cache, rpc_url=None, concurrency=8, batch_size=60, retries=2):
+        self.cache = cache
+        self.rpc_url = rpc_url
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.cached = 0
+        self.fetched = 0
+        self.batches = 0
+
+    # values[(address, era, name)] = decoded output, or an RPCError
+    def fetch(self, addresses, eras, active_era):
+        values = {}
+        live = []
+        for address in addresses:
+            for era in eras:
+                for name in ERA_CALLS:
+                    data = encode_call(name, era, address)
+                    if era < active_era and self.cache is not None:
+                        value = self.cache.get(ChainCache.key(NATIVE_STAKING_ADDRESS, data))
+                        if value is not None:
+                            values[(address, era, name)] = value
+                            self.cached += 1
+                            continue
+                    live.append(((address, era, name), data))
+
+        calls = [("eth_call", [{"to": NATIVE_STAKING_ADDRESS, "data": data}, "latest"]) for _, data in live]
+        results = parallel_batches(calls, self.rpc_url, self.batch_size, self.concurrency, self.retries)
+        self.batches += -(-len(calls) // self.batch_size)
+        for (slot, data), result in zip(live, results):
+            if isinstance(result, RPCError):
+                values[slot] = result
+                continue
+            _, era, name = slot
+            value = list(decode_output(name, result))
+            values[slot] = value
+            self.fetched += 1
+            if era < active_era and self.cache is not None and is_final(name, value):
+                self.cache.put(ChainCache.key(NATIVE_STAKING_ADDRESS, data), value)
+        return values
+
+
+def build_rows(addresses, eras, values):
+    rows = []
+    for address in addresses:
+        for era in eras:
+            row = dict.fromkeys(FIELDS)
+            row["address"] = address
+            row["era"] = era
+            errors = []
+            for name in ERA_CALLS:
+                value = values.get((address, era, name))
+                if isinstance(value, RPCError):
+                    errors.append(f"{name}: {value}")
+                    continue
+                if name == "eraStake":
+                    row["stake_zcx"] = format_wei_to_zcx(value[0])
+                elif name == "eraExposure":
+                    row["exposure_total_zcx"] = format_wei_to_zcx(value[0])
+                    row["exposure_own_zcx"] = format_wei_to_zcx(value[1])
+                else:
+                    row["payout_zcx"] = format_wei_to_zcx(value[0])
+                    row["claimed"] = value[1]
+            if errors:
+                row["error"] = "; ".join(errors)
+            rows.append(row)
+    return rows
+
+
+def print_table(rows, active_era):
+    current = None
+    totals = {}
+    for row in rows:
+        if row["address"] != current:
+            current = row["address"]
+            print(f"\n{GREEN}{current}{RESET}")
+            print(f"{'era':>6}{'stake':>14}{'exposure':>14}{'own':>14}{'payout':>12}  claimed")
+        if row["error"]:
+            print(f"{RED}{row['era']:>6}  {row['error']}{RESET}")
+            continue
+        claimed = "current" if row["era"] == active_era else ("yes" if row["claimed"] else "no")
+        print(f"{row['era']:>6}{row['stake_zcx']:>14.4f}{row['exposure_total_zcx']:>14.4f}"
+              f"{row['exposure_own_zcx']:>14.4f}{row['payout_zcx']:>12.6f}  {claimed}")
+        total = totals.setdefault(current, [0.0, 0.0])
+        total[0] += row["payout_zcx"]
+        if not row["claimed"]:
+            total[1] += row["payout_zcx"]
+    print()
+    for address, (paid, unclaimed) in totals.items():
+        print(f"{GREEN}{address}: total payout {paid:.6f} ZCX, unclaimed {unclaimed:.6f} ZCX{RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-era stake, exposure and payout history")
+    parser.add_argument("address_file", nargs="?", help="file with one address per line (default: the account in priv-data.txt)")
+    parser.add_argument("--address", action="append", default=[], help="address to report (repeatable)")
+    parser.add_argument("--eras", type=int, help="only the last N eras (default: historyDepth)")
+    parser.add_argument("--format", choices=["table", "jsonl", "csv"], default="table")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the configured endpoints)")
+    parser.add_argument("--concurrency", type=int, default=8, help="batches in flight at once")
+    parser.add_argument("--batch-size", type=int, default=60, help="calls per JSON-RPC batch")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--no-cache", action="store_true", help="fetch every era from the chain")
+    args = parser.parse_args()
+
+    addresses = list(args.address)
+    if args.address_file:
+        if not os.path.isfile(args.address_file):
+            print(f"Address file not found: {args.address_file}", file=sys.stderr)
+            sys.exit(1)
+        addresses.extend(load_addresses(args.address_file))
+    if not addresses:
+        addresses = [own_address()]
+
+    invalid = [address for address in addresses if not Web3.is_address(address)]
+    if invalid:
+        print(f"Invalid address: {', '.join(invalid)}", file=sys.stderr)
+        sys.exit(1)
+    addresses = [Web3.to_checksum_address(address) for address in addresses]
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ChainCache()
+        except Exception as e:
+            print(f"Chain cache unavailable, reading everything from the chain: {e}", file=sys.stderr)
+
+    started = time.monotonic()
+    active_era, history_depth = era_window(args.rpc_url)
+    depth = history_depth if args.eras is None else min(args.eras, history_depth)
+    eras = list(range(max(0, active_era - depth), active_era + 1))
+
+    history = RewardHistory(cache, args.rpc_url, args.concurrency, args.batch_size, args.retries)
+    values = history.fetch(addresses, eras, active_era)
+    rows = build_rows(addresses, eras, values)
+
+    if args.format == "table":
+        print_table(rows, active_era)
+    elif args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            print(json.dumps(row))
+
+    print(f"{len(addresses)} addresses x {len(eras)} eras (active era {active_era}): {history.cached} values cached, "
+          f"{history.fetched} fetched in {history.batches} batches, {time.monotonic() - started:.2f}s", file=sys.stderr)
+    if any(row["error"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from eth_account import Account
+from web3 import Web3
+from client import get_web3, batch_request, RPCError
+from nonce_manager import TxPipeline, BroadcastError
+from receipts import ReceiptTracker
+from fees import get_estimator, get_oracle
+from key_client import agent_keys, is_agent_key, AgentError
+from staking_abi import KEY_MANAGER_ADDRESS, KEY_MANAGER_ABI
+
+# Session key rotation for a fleet of validator nodes.
+#
+#   python3 rotate-keys.py fleet.csv --keys keys.csv --output rotated.jsonl
+#   python3 rotate-keys.py fleet.csv --keys keys.csv --rotate-only
+#
+# fleet.csv holds one "node_rpc_url,account" pair per line, e.g.
+#   http://10.0.0.11:9944,0xValidatorA
+#   http://10.0.0.12:9944,0xValidatorB
+# keys.csv holds one "address,private_key" pair per line (same file as sign-batch.py).
+# With --agent, keys held by key-agent.py are used as well (see key_client.py).
+#
+# This does for every node at once what create_key in zenchain.sh and zen.py
+# do for one:
+#   1. author_rotateKeys on every node concurrently (the node's RPC must allow
+#      unsafe methods), then author_hasSessionKeys on the same node to check
+#      that the keystore really holds the new keys
+#   2. setKeys on the KeyManager precompile for every verified node, each
+#      account on its own pipelined nonces, all broadcast concurrently
+#   3. one batched wait for all the receipts
+# Each node gets its timings for every step in the table and in --output.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+
+def load_fleet(path):
+    fleet = []
+    seen = set()
+    with open(path, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                node, account = [part.strip() for part in line.split(',', 1)]
+                account = Web3.to_checksum_address(account)
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}")
+            # A second setKeys for the same account would overwrite the first node's keys
+            if account in seen:
+                raise ValueError(f"line {line_number}: {account} is listed for more than one node")
+            seen.add(account)
+            fleet.append({"node": node, "account": account, "status": "planned"})
+    return fleet
+
+
+def load_keys(path):
+    keys = {}
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            address, private_key = [part.strip() for part in line.split(',', 1)]
+            keys[address.lower()] = private_key
+    return keys
+
+
+# Every account needs its key before any node is rotated
+def check_keys(fleet, keys):
+    for entry in fleet:
+        private_key = keys.get(entry["account"].lower())
+        if private_key is None:
+            raise ValueError(f"no key for {entry['account']}")
+        if not is_agent_key(private_key) and Account.from_key(private_key).address != entry["account"]:
+            raise ValueError(f"private key does not match {entry['account']}")
+
+
+def elapsed_ms(started):
+    return round((time.monotonic() - started) * 1000, 1)
+
+
+# One node's RPC call; raises RPCError for a node-side error
+def node_call(node, method, params):
+    result = batch_request([(method, params)], node)[0]
+    if isinstance(result, RPCError):
+        raise result
+    return result
+
+
+# author_rotateKeys + author_hasSessionKeys on one node
+def rotate(entry):
+    started = time.monotonic()
+    try:
+        session_keys = node_call(entry["node"], "author_rotateKeys", [])
+    except Exception as e:
+        entry.update(status="rotate_failed", error=str(e), rotate_ms=elapsed_ms(started))
+        return
+    entry.update(session_keys=session_keys, rotate_ms=elapsed_ms(started))
+
+    started = time.monotonic()
+    try:
+        has_keys = node_call(entry["node"], "author_hasSessionKeys", [session_keys])
+    except Exception as e:
+        entry.update(status="verify_failed", error=str(e), verify_ms=elapsed_ms(started))
+        return
+    entry["verify_ms"] = elapsed_ms(started)
+    if not has_keys:
+        entry.update(status="verify_failed", error="node does not hold the rotated keys")
+        return
+    entry["status"] = "rotated"
+
+
+class KeySubmitter:
+    def __init__(self, w3, keys, rpc_url=None):
+        self.w3 = w3
+        self.keys = keys
+        self.tracker = ReceiptTracker(w3, rpc_url=rpc_url)
+        self.estimator = get_estimator(w3)
+        self.oracle = get_oracle(rpc_url)
+        self.contract = w3.eth.contract(address=KEY_MANAGER_ADDRESS, abi=KEY_MANAGER_ABI)
+
+    # Broadcast setKeys for one node without waiting for it
+    def send(self, entry):
+        pipeline = TxPipeline(self.w3, entry["account"], self.keys[entry["account"].lower()], tracker=self.tracker,
+                              estimator=self.estimator, oracle=self.oracle)
+        func = self.contract.functions.setKeys(bytes.fromhex(entry["session_keys"][2:]))
+        started = time.monotonic()
+        try:
+            [(nonce, tx_hash)] = pipeline.send([func])
+        except BroadcastError as e:
+            entry.update(status="rejected", error=str(e), send_ms=elapsed_ms(started))
+            return
+        entry.update(status="sent", nonce=nonce, tx_hash="0x" + bytes(tx_hash).hex(), send_ms=elapsed_ms(started))
+        entry["_sent_at"] = time.monotonic()
+
+    # Wait for every sent setKeys; each entry gets the time its receipt showed up
+    def wait(self, entries, timeout):
+        sent = {entry["tx_hash"]: entry for entry in entries if entry["status"] == "sent"}
+        pending = set(sent)
+
+        def on_block(still_pending):
+            now = time.monotonic()
+            for tx_hash in pending - still_pending:
+                sent[tx_hash]["confirm_s"] = round(now - sent[tx_hash]["_sent_at"], 2)
+            pending.intersection_update(still_pending)
+
+        receipts = self.tracker.wait(list(sent), timeout=timeout, on_block=on_block)
+        now = time.monotonic()
+        for tx_hash, entry in sent.items():
+            receipt = receipts.get(tx_hash)
+            if receipt is None:
+                entry.update(status="pending", error="setKeys not mined before the timeout")
+                continue
+            entry.setdefault("confirm_s", round(now - entry["_sent_at"], 2))
+            entry["block"] = receipt["blockNumber"]
+            entry["status"] = "success" if receipt["status"] == 1 else "failed"
+
+
+def print_table(fleet):
+    print(f"{'node':<32}{'account':<44}{'rotate ms':>10}{'verify ms':>10}{'send ms':>9}{'confirm s':>10}  status")
+    for entry in fleet:
+        color = GREEN if entry["status"] in ("success", "rotated") else RED
+        timings = "".join(f"{entry.get(field, '-'):>{width}}" for field, width in
+                          (("rotate_ms", 10), ("verify_ms", 10), ("send_ms", 9), ("confirm_s", 10)))
+        line = f"{entry['node']:<32}{entry['account']:<44}{timings}  {entry['status']}"
+        if entry.get("error"):
+            line += f" ({entry['error']})"
+        print(f"{color}{line}{RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rotate session keys on many nodes and submit them with setKeys")
+    parser.add_argument("fleet", help="CSV file of node_rpc_url,account")
+    parser.add_argument("--keys", help="CSV file of address,private_key (needed unless --rotate-only)")
+    parser.add_argument("--agent", action="store_true", help="sign with the keys held by key-agent.py")
+    parser.add_argument("--rpc-url", help="RPC endpoint for setKeys (default: the configured endpoints, see client.py)")
+    parser.add_argument("--concurrency", type=int, default=16, help="nodes handled at once")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for setKeys receipts")
+    parser.add_argument("--rotate-only", action="store_true", help="rotate and verify keys but do not submit setKeys")
+    parser.add_argument("--output", help="write one JSON line per node (session keys, timings, status) to this file")
+    args = parser.parse_args()
+
+    if not args.rotate_only and not args.keys and not args.agent:
+        parser.error("--keys or --agent is required unless --rotate-only is given")
+    try:
+        fleet = load_fleet(args.fleet)
+        keys = load_keys(args.keys) if args.keys else {}
+        if args.agent and not args.rotate_only:
+            keys.update(agent_keys())
+        if not args.rotate_only:
+            check_keys(fleet, keys)
+    except (OSError, ValueError, AgentError) as e:
+        print(f"{RED}Failed to load fleet or keys: {e}{RESET}")
+        sys.exit(1)
+
+    started = time.monotonic()
+    workers = max(1, min(args.concurrency, len(fleet)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(rotate, fleet))
+    rotated = [entry for entry in fleet if entry["status"] == "rotated"]
+    print(f"Rotated and verified keys on {len(rotated)}/{len(fleet)} nodes in {time.monotonic() - started:.2f}s")
+
+    if rotated and not args.rotate_only:
+        submitter = KeySubmitter(get_web3(args.rpc_url), keys, args.rpc_url)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(submitter.send, rotated))
+        submitter.wait(rotated, args.timeout)
+
+    print_table(fleet)
+    for entry in fleet:
+        entry.pop("_sent_at", None)
+    if args.output:
+        with open(args.output, 'w') as out:
+            for entry in fleet:
+                out.write(json.dumps(entry) + "\n")
+        print(f"Results written to {args.output}")
+
+    done = "rotated" if args.rotate_only else "success"
+    ok = all(entry["status"] == done for entry in fleet)
+    print(f"{GREEN if ok else RED}{sum(entry['status'] == done for entry in fleet)}/{len(fleet)} nodes done "
+          f"in {time.monotonic() - started:.2f}s{RESET}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from web3 import Web3
+from web3._utils.batching import sort_batch_response_by_response_ids
+
+# Routes JSON-RPC traffic across several endpoints (see get_router in client.py).
+#
+# Every endpoint keeps a latency average, an error rate and its last head
+# block. Reads go to the fastest healthy endpoint that is within MAX_LAG
+# blocks of the best head; if it has not answered after the hedge delay the
+# same request is also sent to the next endpoint and the first answer wins.
+# Transactions, nonce reads and transaction lookups by hash stay on one
+# endpoint (so the node that gets our transactions also answers for its
+# pending pool) and fail over only when it stops answering.
+
+# Seconds a read may take before it is also sent to a second endpoint
+HEDGE_DELAY = float(os.environ.get("ZENCHAIN_HEDGE_DELAY", "0.5"))
+
+# Blocks an endpoint may trail the best known head and still serve reads
+MAX_LAG = int(os.environ.get("ZENCHAIN_MAX_LAG", "3"))
+
+# Seconds between head / health probes of every endpoint
+HEALTH_INTERVAL = float(os.environ.get("ZENCHAIN_HEALTH_INTERVAL", "15"))
+
+# Timeout for a health probe, kept short so a dead endpoint cannot hold up the first request
+PROBE_TIMEOUT = 3
+
+# Methods that must not be hedged or spread over endpoints
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction", "eth_getTransactionCount", "eth_getTransactionByHash"}
+
+# Weight of the newest sample in the latency and error averages
+SMOOTHING = 0.3
+
+# Longest an endpoint is skipped after repeated failures, in seconds
+MAX_BACKOFF = 60
+
+
+class Endpoint:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0
+        self.head = None
+        self.requests = 0
+
+    def record_success(self, latency):
+        self.requests += 1
+        self.latency = latency if self.latency is None else (1 - SMOOTHING) * self.latency + SMOOTHING * latency
+        self.error_rate *= 1 - SMOOTHING
+        self.failures = 0
+        self.down_until = 0
+
+    def record_failure(self):
+        self.requests += 1
+        self.error_rate = (1 - SMOOTHING) * self.error_rate + SMOOTHING
+        self.failures += 1
+        self.down_until = time.monotonic() + min(MAX_BACKOFF, 2 ** (self.failures - 1))
+
+    def healthy(self):
+        return time.monotonic() >= self.down_until
+
+    # Lower is better: latency, inflated by recent errors
+    def score(self):
+        latency = self.latency if self.latency is not None else HEDGE_DELAY
+        return latency * (1 + 4 * self.error_rate)
+
+
+class Router:
+    def __init__(self, urls, session, timeout=30, hedge_delay=HEDGE_DELAY, max_lag=MAX_LAG,
+                 health_interval=HEALTH_INTERVAL):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.session = session
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.writer = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.endpoints)))
+        self._last_probe = None
+        self._probing = False
+
+    def _post(self, endpoint, data, timeout=None):
+        started = time.monotonic()
+        try:
+            response = self.session.post(endpoint.url, data=data, headers={"Content-Type": "application/json"},
+                                         timeout=timeout or self.timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            with self._lock:
+                endpoint.record_failure()
+            raise
+        with self._lock:
+            endpoint.record_success(time.monotonic() - started)
+        return response.content
+
+    # ---- head tracking ----
+
+    def probe(self):
+        payload = json.dumps({"jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber", "params": []}).encode()
+
+        def probe_one(endpoint):
+            try:
+                reply = json.loads(self._post(endpoint, payload, timeout=PROBE_TIMEOUT))
+                head = int(reply["result"], 16)
+            except (requests.RequestException, ValueError, KeyError, TypeError):
+                return
+            with self._lock:
+                endpoint.head = head
+
+        list(self._executor.map(probe_one, self.endpoints))
+        with self._lock:
+            self._last_probe = time.monotonic()
+            self._probing = False
+
+    def _refresh_heads(self):
+        with self._lock:
+            if self._last_probe is None:
+                first = not self._probing
+                self._probing = True
+            elif not self._probing and time.monotonic() - self._last_probe > self.health_interval:
+                self._probing = True
+                threading.Thread(target=self.probe, daemon=True).start()
+                return
+            else:
+                return
+        # The first request waits for one probe, so it already knows which endpoints are in sync
+        if first:
+            self.probe()
+
+    # Split endpoints into (ready, lagging, down), each in the order they should be tried
+    def _partition(self):
+        self._refresh_heads()
+        with self._lock:
+            heads = [endpoint.head for endpoint in self.endpoints if endpoint.head is not None]
+            best_head = max(heads) if heads else None
+
+            def in_sync(endpoint):
+                return best_head is None or (endpoint.head is not None and best_head - endpoint.head <= self.max_lag)
+
+            ready = sorted((e for e in self.endpoints if e.healthy() and in_sync(e)), key=Endpoint.score)
+            lagging = sorted((e for e in self.endpoints if e.healthy() and not in_sync(e)), key=Endpoint.score)
+            down = sorted((e for e in self.endpoints if not e.healthy()), key=lambda e: e.down_until)
+        return ready, lagging, down
+
+    # Endpoints in the order they should be tried
+    def candidates(self):
+        ready, lagging, down = self._partition()
+        return ready + lagging + down
+
+    # ---- requests ----
+
+    # Send raw JSON-RPC bytes; methods are the RPC methods inside (one, or several for a batch)
+    def post(self, data, methods):
+        if WRITE_METHODS.intersection(methods):
+            return self._write(data)
+        return self._read(data)
+
+    def _hedge_after(self, endpoint):
+        if endpoint.latency is None:
+            return self.hedge_delay
+        return max(self.hedge_delay, 2 * endpoint.latency)
+
+    def _read(self, data):
+        remaining = self.candidates()
+        futures = {}
+        last_error = None
+        hedged = False
+
+        def launch():
+            endpoint = remaining.pop(0)
+            futures[self._executor.submit(self._post, endpoint, data)] = endpoint
+            return endpoint
+
+        current = launch()
+        while futures:
+            timeout = None if hedged or not remaining else self._hedge_after(current)
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow answer: ask the next endpoint too, first reply wins
+                hedged = True
+                launch()
+                continue
+            for future in done:
+                futures.pop(future)
+                try:
+                    return future.result()
+                except requests.RequestException as e:
+                    last_error = e
+            if not futures and remaining:
+                # Fail over to the next endpoint
+                current = launch()
+                hedged = False
+        raise last_error
+
+    def _write(self, data):
+        ready, lagging, down = self._partition()
+        with self._lock:
+            writer = self.writer
+        # Stay on the current writer while it is healthy and in sync
+        if writer in ready:
+            ready.remove(writer)
+            ready.insert(0, writer)
+
+        last_error = None
+        for endpoint in ready + lagging + down:
+            try:
+                content = self._post(endpoint, data)
+            except requests.RequestException as e:
+                last_error = e
+                continue
+            with self._lock:
+                self.writer = endpoint
+            return content
+        raise last_error
+
+    def status(self):
+        with self._lock:
+            heads = [endpoint.head for endpoint in self.endpoints if endpoint.head is not None]
+            best_head = max(heads) if heads else None
+            return [{
+                "url": endpoint.url,
+                "healthy": endpoint.healthy(),
+                "latency_ms": None if endpoint.latency is None else round(endpoint.latency * 1000, 1),
+                "error_rate": round(endpoint.error_rate, 3),
+                "head": endpoint.head,
+                "lag": None if endpoint.head is None or best_head is None else best_head - endpoint.head,
+                "requests": endpoint.requests,
+            } for endpoint in self.endpoints]
+
+
+# web3 HTTPProvider that sends every request through a Router
+class RoutedHTTPProvider(Web3.HTTPProvider):
+    def __init__(self, router, **kwargs):
+        super().__init__(router.endpoints[0].url, **kwargs)
+        self.router = router
+
+    def __str__(self):
+        return f"RPC router over {', '.join(endpoint.url for endpoint in self.router.endpoints)}"
+
+    def _make_request(self, method, request_data):
+        return self.router.post(request_data, (method,))
+
+    def make_batch_request(self, batch_requests):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        raw_response = self.router.post(request_data, [method for method, _ in batch_requests])
+        response = self.decode_rpc_response(raw_response)
+        if not isinstance(response, list):
+            return response
+        return sort_batch_response_by_response_ids(response)
+
+
+# Probe the configured endpoints and show what the router sees
+def main():
+    from client import RPC_URLS, get_session, TIMEOUT
+
+    urls = sys.argv[1:] or RPC_URLS
+    router = Router(urls, get_session(), TIMEOUT)
+    router.probe()
+    for row in router.status():
+        state = "up" if row["healthy"] and row["head"] is not None else "down"
+        latency = "-" if row["latency_ms"] is None else f"{row['latency_ms']} ms"
+        lag = "" if row["lag"] is None else f", {row['lag']} blocks behind"
+        print(f"{row['url']}: {state}, head {row['head']}{lag}, latency {latency}")
+    order = [endpoint.url for endpoint in router.candidates()]
+    print(f"Read order: {', '.join(order)}")
+
+
+if __name__ == "__main__":
+    main()
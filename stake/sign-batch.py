@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from key_client import agent_keys, AgentError
+
+# Offline signing stage: build and sign staking calls for many accounts in
+# parallel across CPU cores, without touching the network. The output is
+# pushed to a node later with broadcast.py.
+#
+#   python3 sign-batch.py manifest.jsonl --keys keys.csv --gas-price 1000000000 --output signed.jsonl
+#
+# manifest.jsonl holds one call per line:
+#   {"account": "0x...", "nonce": 7, "function": "bondExtra", "args": [1000000000000000000]}
+#   {"account": "0x...", "function": "validate", "args": [50000000, false]}
+# The first line for an account must carry its next "nonce"; later lines
+# for that account continue from it in file order.
+#
+# keys.csv holds one "address,private_key" pair per line. A key written as
+# "agent", or every account with --agent, is signed by key-agent.py instead.
+
+CHAIN_ID = 8408
+
+# Staking calls accepted in a manifest: function -> gas limit
+# (precompile and argument types come from staking_abi.py)
+STAKING_CALLS = {
+    "bondExtra": 2000000,
+    "validate": 2000000,
+    "setPayee": 2000000,
+    "nominate": 2000000,
+    "setKeys": 2000000,
+}
+
+
+def load_keys(path):
+    keys = {}
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            address, private_key = [part.strip() for part in line.split(',', 1)]
+            keys[address.lower()] = private_key
+    return keys
+
+
+# Read the manifest and give every call its nonce
+def plan_calls(path):
+    next_nonce = {}
+    calls = []
+    with open(path, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                call = json.loads(line)
+                if not isinstance(call, dict):
+                    raise ValueError("expected a JSON object")
+                for field in ("account", "function"):
+                    if field not in call:
+                        raise ValueError(f'missing "{field}"')
+                if not isinstance(call["account"], str):
+                    raise ValueError('"account" must be an address string')
+                account = call["account"].lower()
+                if call["function"] not in STAKING_CALLS:
+                    raise ValueError(f"unknown function {call['function']}")
+                if "nonce" in call:
+                    next_nonce[account] = int(call["nonce"])
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"line {line_number}: {e}")
+            if "nonce" not in call and account not in next_nonce:
+                raise ValueError(f"line {line_number}: first call for {call['account']} needs a nonce")
+            call["nonce"] = next_nonce[account]
+            next_nonce[account] += 1
+            calls.append(call)
+    return calls
+
+
+# Worker: sign one chunk of calls. Imports stay inside so each process
+# only pays for eth_account once. Calls whose key is held by key-agent.py
+# are signed by the agent in one request per chunk.
+def sign_chunk(chunk, gas_price, chain_id):
+    from eth_account import Account
+    from eth_utils import to_checksum_address
+    from staking_abi import FUNCTIONS, encode_call
+    from key_client import KeyAgentClient, AgentError, is_agent_key
+
+    def signed_entry(call, address, signed_txn):
+        return {
+            "account": address,
+            "nonce": call["nonce"],
+            "function": call["function"],
+            "tx_hash": "0x" + signed_txn.hash.hex(),
+            "raw": "0x" + signed_txn.raw_transaction.hex(),
+        }
+
+    def error_entry(call, error):
+        return {"account": call["account"], "nonce": call["nonce"], "function": call["function"], "error": str(error)}
+
+    signed = [None] * len(chunk)
+    agent_work = []
+    accounts = {}
+    for i, (call, private_key) in enumerate(chunk):
+        function = call["function"]
+        precompile = FUNCTIONS[function][0]
+        gas = STAKING_CALLS[function]
+        try:
+            data = encode_call(function, *call.get("args", []))
+            transaction = {
+                'to': to_checksum_address(precompile),
+                'value': 0,
+                'data': data,
+                'gas': int(call.get("gas", gas)),
+                'gasPrice': gas_price,
+                'nonce': call["nonce"],
+                'chainId': chain_id,
+            }
+            if is_agent_key(private_key):
+                agent_work.append((i, dict(transaction, **{'from': to_checksum_address(call["account"])})))
+                continue
+
+            # Key derivation is the slow part, so do it once per account in this chunk
+            account = accounts.get(private_key)
+            if account is None:
+                account = accounts[private_key] = Account.from_key(private_key)
+            if account.address.lower() != call["account"].lower():
+                raise ValueError("private key does not match account")
+            signed[i] = signed_entry(call, account.address, account.sign_transaction(transaction))
+        except Exception as e:
+            signed[i] = error_entry(call, e)
+
+    if agent_work:
+        try:
+            results = KeyAgentClient().sign([transaction for _, transaction in agent_work])
+        except AgentError as e:
+            results = [e] * len(agent_work)
+        for (i, transaction), result in zip(agent_work, results):
+            call = chunk[i][0]
+            if isinstance(result, AgentError):
+                signed[i] = error_entry(call, result)
+            else:
+                signed[i] = signed_entry(call, transaction['from'], result)
+    return signed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sign a manifest of ZenChain staking calls offline")
+    parser.add_argument("manifest", help="JSON lines file of staking calls")
+    parser.add_argument("--keys", help="CSV file of address,private_key")
+    parser.add_argument("--agent", action="store_true", help="sign with the keys held by key-agent.py")
+    parser.add_argument("--gas-price", type=int, required=True, help="gas price in wei")
+    parser.add_argument("--chain-id", type=int, default=CHAIN_ID)
+    parser.add_argument("--output", required=True, help="where to write the signed transactions")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=200, help="calls per worker task")
+    args = parser.parse_args()
+
+    if not args.keys and not args.agent:
+        parser.error("give --keys, --agent or both")
+    try:
+        keys = load_keys(args.keys) if args.keys else {}
+        if args.agent:
+            keys.update(agent_keys())
+        calls = plan_calls(args.manifest)
+    except (OSError, ValueError, AgentError) as e:
+        print(f"Failed to load manifest or keys: {e}")
+        sys.exit(1)
+
+    missing = {call["account"] for call in calls if call["account"].lower() not in keys}
+    if missing:
+        print(f"No private key for: {', '.join(sorted(missing))}")
+        sys.exit(1)
+
+    work = [(call, keys[call["account"].lower()]) for call in calls]
+    chunks = [work[i:i + args.chunk_size] for i in range(0, len(work), args.chunk_size)]
+
+    signed_count = 0
+    failed = 0
+    broken_accounts = set()
+    with open(args.output, 'w') as out, ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # map keeps manifest order, so each account's nonces stay in sequence in the file
+        for signed in executor.map(sign_chunk, chunks, [args.gas_price] * len(chunks), [args.chain_id] * len(chunks)):
+            for entry in signed:
+                account = entry["account"].lower()
+                if "error" not in entry and account in broken_accounts:
+                    # A nonce gap would stall everything after it, so skip the rest of this account
+                    entry["error"] = "skipped after an earlier failure for this account"
+                if "error" in entry:
+                    failed += 1
+                    broken_accounts.add(account)
+                    print(f"Failed to sign {entry['function']} for {entry['account']} (nonce {entry['nonce']}): {entry['error']}")
+                    continue
+                out.write(json.dumps(entry) + "\n")
+                signed_count += 1
+
+    print(f"Signed {signed_count} transactions, {failed} failed, written to {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
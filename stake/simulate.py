@@ -0,0 +1,120 @@
+import os
+from client import parallel_batches, RPCError
+from staking_abi import FUNCTIONS, SELECTORS, encode_call, decode_values
+
+# Dry run of planned precompile transactions before anything is signed.
+#
+#   results = simulate([(sender, "bondExtra", [amount]), (sender, "validate", [commission, False])])
+#   results[0] -> {"ok": True, "gas": 60000, "reason": None, "after": None}
+#              or {"ok": False, "gas": None, "reason": "InsufficientBalance", "after": None}
+#
+# Every call gets an eth_call and an eth_estimateGas against the pending
+# block, and all of them go out in JSON-RPC batches: one round trip for a
+# single script, a few for a bulk run. A call that reverts, or cannot get a
+# gas estimate, is doomed and comes back with ok False and the decoded
+# revert reason. When the node could not answer at all the result is ok
+# None: nothing is known, so the caller should go ahead.
+#
+# Each call is simulated on its own against the pending state, so a call
+# that only works once an earlier call in the same run is mined (validate
+# after the bondExtra that reaches the minimum bond, for example) fails
+# here too. "after" names the previous call from the same sender in the
+# run: such a failure is not final, and the caller checks the call again
+# once the calls before it are mined (see check_calls).
+
+# Simulate before signing (override with ZENCHAIN_SIMULATE=0)
+SIMULATE = os.environ.get("ZENCHAIN_SIMULATE", "1") != "0"
+
+# Revert data prefixes: Error(string) and Panic(uint256)
+ERROR_SELECTOR = "0x08c379a0"
+PANIC_SELECTOR = "0x4e487b71"
+
+# Node error messages that mean the call itself fails, not the node
+DOOMED_ERRORS = ("revert", "out of gas", "exceeds allowance", "insufficient funds", "invalid opcode")
+
+# JSON-RPC error code for execution reverted
+REVERT_CODE = 3
+
+
+# Readable reason from an eth_call / eth_estimateGas error
+def revert_reason(error):
+    data = error.data if isinstance(error.data, str) else ""
+    try:
+        if data.startswith(ERROR_SELECTOR) and len(data) > 10:
+            return decode_values(['string'], data[10:])[0]
+        if data.startswith(PANIC_SELECTOR) and len(data) > 10:
+            return f"panic 0x{decode_values(['uint256'], data[10:])[0]:02x}"
+    except ValueError:
+        pass
+    message = str(error)
+    if data not in ("", "0x") and data not in message:
+        message += f" (data {data})"
+    return message
+
+
+def is_doomed(error):
+    return error.code == REVERT_CODE or any(text in str(error).lower() for text in DOOMED_ERRORS)
+
+
+# calls: [(sender, function name, args)]; returns one result dict per call
+def simulate(calls, rpc_url=None, block="pending", batch_size=60, concurrency=8):
+    requests = []
+    for sender, name, args in calls:
+        transaction = {"from": sender, "to": FUNCTIONS[name][0], "data": encode_call(name, *args)}
+        requests.append(("eth_call", [transaction, block]))
+        requests.append(("eth_estimateGas", [transaction, block]))
+    replies = parallel_batches(requests, rpc_url, batch_size, concurrency)
+
+    results = []
+    previous = {}
+    for i, (sender, name, _) in enumerate(calls):
+        call_reply, gas_reply = replies[2 * i], replies[2 * i + 1]
+        errors = [reply for reply in (call_reply, gas_reply) if isinstance(reply, RPCError)]
+        doomed = [error for error in errors if is_doomed(error)]
+        if doomed:
+            result = {"ok": False, "gas": None, "reason": revert_reason(doomed[0])}
+        elif errors:
+            result = {"ok": None, "gas": None, "reason": f"could not simulate: {errors[0]}"}
+        else:
+            result = {"ok": True, "gas": int(gas_reply, 16), "reason": None}
+        result["after"] = previous.get(sender.lower())
+        previous[sender.lower()] = name
+        results.append(result)
+    return results
+
+
+# Pass the largest estimate per function on to a GasEstimator (fees.py), so
+# the pipeline does not estimate the same functions again
+def prime_estimator(estimator, calls, results):
+    for (_, name, _), result in zip(calls, results):
+        if result["gas"] is not None:
+            estimator.prime(FUNCTIONS[name][0], SELECTORS[name], result["gas"])
+
+
+# Simulate web3 contract calls for one sender, as the stake scripts build
+# them. Returns (doomed, recheck): doomed is [(function name, reason)] for
+# the calls that fail on the current state, which must stop the run;
+# recheck is the index of the first call that fails only after earlier
+# calls in funcs, to be simulated again once they are mined (else None).
+def check_calls(sender, funcs, estimator=None, rpc_url=None):
+    if not SIMULATE:
+        return [], None
+    calls = [(sender, func.fn_name, list(func.args)) for func in funcs]
+    results = simulate(calls, rpc_url)
+    if estimator is not None:
+        prime_estimator(estimator, calls, results)
+    doomed = []
+    recheck = None
+    for i, ((_, name, _), result) in enumerate(zip(calls, results)):
+        if result["ok"] is not False:
+            continue
+        if result["after"] is None:
+            doomed.append((name, result["reason"]))
+        elif recheck is None:
+            recheck = i
+    return doomed, recheck
+
+
+# Doomed calls only, for a single call or calls that do not depend on each other
+def doomed_calls(sender, funcs, estimator=None, rpc_url=None):
+    return check_calls(sender, funcs, estimator, rpc_url)[0]
@@ -1,17 +1,19 @@
+import os
 import sys
-from web3 import Web3
-import time
+from client import get_web3, preflight
+from staking_abi import NATIVE_STAKING_ADDRESS, NATIVE_STAKING_ABI
+from nonce_manager import TxPipeline, BroadcastError
+from simulate import doomed_calls
+from tx_journal import open_run, JournalError
 
 
 # ANSI escape codes for green text
 GREEN = "\033[92m"
+RED = '\033[91m'
 RESET = "\033[0m"  # Reset to default color
 
-# Set the ZenChain RPC URL
-rpc_url = "https://zenchain-testnet.api.onfinality.io/public"
-
-# Load data from priv-data.txt
-file_path = "/root/chain-data/chains/priv-data.txt"
+# Load data from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
 
 try:
     with open(file_path, 'r') as file:
@@ -29,93 +31,55 @@ except IndexError:
 if SESSION_KEYS.startswith("0x"):
     SESSION_KEYS = SESSION_KEYS[2:]
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(rpc_url))
-
-
-
-# Check if connected to the ZenChain network
-if not w3.is_connected():
-    print('Not connected to ZenChain')
-    sys.exit(1)
-
-if not w3.is_address(MY_ADDRESS):
-    print(f"Invalid address: {MY_ADDRESS}")
-else:
-    try:
-        balance = w3.eth.get_balance(MY_ADDRESS)
-        balance_in_ether = w3.from_wei(balance, 'ether')
-        print(f"{GREEN}Balance for {MY_ADDRESS}: {balance_in_ether} ZCX{RESET}")
-    except Exception as e:
-        print(f"Error getting balance: {e}")
-
-
-
-# Load the NativeStaking contract
-NATIVE_STAKING_ADDRESS = '0x0000000000000000000000000000000000000800'
-
-NATIVE_STAKING_ABI = [
-    {
-        'inputs': [{'internalType': 'uint256', 'name': 'value', 'type': 'uint256'}],
-        'name': 'bondExtra',
-        'outputs': [],
-        'stateMutability': 'nonpayable',
-        'type': 'function'
-    },
-    {
-        'inputs': [{'internalType': 'uint32', 'name': 'commission', 'type': 'uint32'},
-                   {'internalType': 'bool', 'name': 'blocked', 'type': 'bool'}],
-        'name': 'validate',
-        'outputs': [],
-        'stateMutability': 'nonpayable',
-        'type': 'function'
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "who", "type": "address"}
-        ],
-        "name": "bonded",
-        "outputs": [
-            {"internalType": "bool", "name": "isBonded", "type": "bool"}
-        ],
-        "stateMutability": "view",  # This is a read-only function
-        "type": "function"
-    }
-]
+# Initialize Web3 (shared pooled client, see client.py)
+w3 = get_web3()
+preflight(w3, MY_ADDRESS)
 
 
+# NativeStaking precompile (ABI shared with the other scripts, see staking_abi.py)
 staking_contract = w3.eth.contract(address=NATIVE_STAKING_ADDRESS, abi=NATIVE_STAKING_ABI)
 
-# Prepare the transaction
-nonce = w3.eth.get_transaction_count(MY_ADDRESS)
-CHAIN_ID = 8408  
+# Nonces come from a local NonceManager instead of a lookup at import time (see nonce_manager.py)
+pipeline = TxPipeline(w3, MY_ADDRESS, PRIVATE_KEY)
 
 def send_transaction(func):
+    # A bondExtra left in flight by an interrupted run with the same amount is
+    # settled against the chain instead of being sent again (see tx_journal.py)
+    try:
+        run = open_run("stake", pipeline, [func])
+    except JournalError as e:
+        print(f"{RED}{e}{RESET}")
+        return None
+    if not run.pending():
+        run.close_if_done()
+        print(f"{GREEN}The interrupted bondExtra was confirmed; nothing more to send.{RESET}")
+        return None
+
+    # Dry-run the call first (see simulate.py) so a doomed transaction is never signed
+    for name, reason in doomed_calls(MY_ADDRESS, [func], pipeline.estimator):
+        print(f"{RED}{name} would fail: {reason}. Nothing was sent.{RESET}")
+        return None
+
+    try:
+        sent = pipeline.send([func], steps=[run.step(0)])
+    except BroadcastError as e:
+        print(f"{RED}An error occurred: {e}{RESET}")
+        return None
+    tx_hash = sent[0][1]
 
-    transaction = func.build_transaction({
-        'chainId': CHAIN_ID,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price,
-        'nonce': nonce,
-    })
-    
-    signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-    tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    
     # Create the explorer link using the transaction hash
     explorer_link = f"https://zentrace.io/tx/0x{tx_hash.hex()}"
     
     print(f"{GREEN}Transaction sent explorer Link: {explorer_link}")
 
-    print(f"{GREEN} Now Please Wait 10 Secound....:")
-
-    time.sleep(10)
+    print(f"{GREEN} Now Please wait for confirmation...!")
 
-    tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    if tx_receipt['status'] == 1:
+    result = pipeline.wait(sent)[0]
+    run.finish_all([0], [result])
+    if result['status'] == 'success':
         print(f"{GREEN}Transaction successful!")
     else:
-        print(f"{RED}Transaction failed.")
+        print(f"{RED}Transaction failed: {result['status']}.")
     
     return tx_hash
 
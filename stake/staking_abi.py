@@ -0,0 +1,232 @@
+from eth_utils import keccak, to_checksum_address
+
+# ABI of the NativeStaking (0x...0800) and KeyManager (0x...0802) precompiles,
+# shared by every stake script, with a fast codec for the argument shapes
+# they use (address, uintN, bool, address[], bytes).
+#
+#   from staking_abi import eth_call, encode_call, decode_output
+#   batch_request([eth_call("stake", address), eth_call("activeEra")])
+#   total, active = decode_output("stake", result)
+#
+# Selectors are computed once at import. Encoding writes the 32-byte words
+# as hex directly instead of going through web3's contract machinery, which
+# resolves the function and normalizes every argument on each call; a fleet
+# scan encodes thousands of calls, so that difference is most of its CPU.
+# NATIVE_STAKING_ABI / KEY_MANAGER_ABI are the same table in JSON form for
+# w3.eth.contract, which the transaction scripts still use to build calls.
+
+NATIVE_STAKING_ADDRESS = '0x0000000000000000000000000000000000000800'
+KEY_MANAGER_ADDRESS = '0x0000000000000000000000000000000000000802'
+
+# Commission units per percent, as validate() takes and validatorPrefs()
+# returns them (100% = 10**7)
+COMMISSION_PER_PERCENT = 100000
+
+# Precompile functions: name -> (precompile, argument types, output types, state mutability)
+FUNCTIONS = {
+    # NativeStaking reads
+    "bonded": (NATIVE_STAKING_ADDRESS, ['address'], ['bool'], "view"),
+    "status": (NATIVE_STAKING_ADDRESS, ['address'], ['uint256'], "view"),
+    "stake": (NATIVE_STAKING_ADDRESS, ['address'], ['uint256', 'uint256'], "view"),
+    "validatorStatus": (NATIVE_STAKING_ADDRESS, ['address'], ['uint8'], "view"),
+    "activeEra": (NATIVE_STAKING_ADDRESS, [], ['uint256'], "view"),
+    "currentEra": (NATIVE_STAKING_ADDRESS, [], ['uint256'], "view"),
+    "historyDepth": (NATIVE_STAKING_ADDRESS, [], ['uint256'], "view"),
+    "eraStake": (NATIVE_STAKING_ADDRESS, ['uint256', 'address'], ['uint256'], "view"),
+    "eraExposure": (NATIVE_STAKING_ADDRESS, ['uint256', 'address'], ['uint256', 'uint256', 'uint256'], "view"),
+    "eraPayout": (NATIVE_STAKING_ADDRESS, ['uint256', 'address'], ['uint256', 'bool'], "view"),
+    "eraPoints": (NATIVE_STAKING_ADDRESS, ['uint256', 'address'], ['uint256'], "view"),
+    "validators": (NATIVE_STAKING_ADDRESS, [], ['address[]'], "view"),
+    "validatorPrefs": (NATIVE_STAKING_ADDRESS, ['address'], ['uint32', 'bool'], "view"),
+    "nominatorCount": (NATIVE_STAKING_ADDRESS, ['address'], ['uint32'], "view"),
+    "maxNominatorsRewarded": (NATIVE_STAKING_ADDRESS, [], ['uint32'], "view"),
+    # NativeStaking transactions
+    "bondWithPayeeAddress": (NATIVE_STAKING_ADDRESS, ['uint256', 'address'], [], "nonpayable"),
+    "bondExtra": (NATIVE_STAKING_ADDRESS, ['uint256'], [], "nonpayable"),
+    "unbond": (NATIVE_STAKING_ADDRESS, ['uint256'], [], "nonpayable"),
+    "validate": (NATIVE_STAKING_ADDRESS, ['uint32', 'bool'], [], "nonpayable"),
+    "nominate": (NATIVE_STAKING_ADDRESS, ['address[]'], [], "nonpayable"),
+    "setPayee": (NATIVE_STAKING_ADDRESS, ['address'], [], "nonpayable"),
+    "chill": (NATIVE_STAKING_ADDRESS, [], [], "nonpayable"),
+    # KeyManager
+    "setKeys": (KEY_MANAGER_ADDRESS, ['bytes'], [], "nonpayable"),
+}
+
+# Events emitted by the precompiles. The first indexed address is the
+# account the event belongs to.
+EVENT_SIGNATURES = [
+    "Bonded(address indexed stash, uint256 amount)",
+    "Unbonded(address indexed stash, uint256 amount)",
+    "Withdrawn(address indexed stash, uint256 amount)",
+    "Nominated(address indexed nominator, address[] targets)",
+    "Validated(address indexed validator, uint32 commission, bool blocked)",
+    "PayeeSet(address indexed stash, address payee)",
+    "Chilled(address indexed stash)",
+    "Rewarded(address indexed stash, uint256 era, uint256 amount)",
+    "KeysSet(address indexed account, bytes keys)",
+]
+
+
+def signature(name):
+    return f"{name}({','.join(FUNCTIONS[name][1])})"
+
+
+# name -> "0x" + 4-byte selector, and back
+SELECTORS = {name: "0x" + keccak(text=signature(name))[:4].hex() for name in FUNCTIONS}
+BY_SELECTOR = {selector: name for name, selector in SELECTORS.items()}
+
+
+def _abi_entries(precompile):
+    return [{
+        "inputs": [{"internalType": abi_type, "name": "", "type": abi_type} for abi_type in inputs],
+        "name": name,
+        "outputs": [{"internalType": abi_type, "name": "", "type": abi_type} for abi_type in outputs],
+        "stateMutability": mutability,
+        "type": "function",
+    } for name, (address, inputs, outputs, mutability) in FUNCTIONS.items() if address == precompile]
+
+
+NATIVE_STAKING_ABI = _abi_entries(NATIVE_STAKING_ADDRESS)
+KEY_MANAGER_ABI = _abi_entries(KEY_MANAGER_ADDRESS)
+
+
+# signature text -> (name, [(field, type, indexed)], topic0)
+def parse_event(text):
+    name, rest = text.split("(", 1)
+    fields = []
+    for part in rest.rstrip(")").split(","):
+        words = part.split()
+        if not words:
+            continue
+        indexed = "indexed" in words
+        words = [word for word in words if word != "indexed"]
+        fields.append((words[1] if len(words) > 1 else f"arg{len(fields)}", words[0], indexed))
+    canonical = f"{name}({','.join(abi_type for _, abi_type, _ in fields)})"
+    return name, fields, "0x" + keccak(text=canonical).hex()
+
+
+# topic0 -> (name, fields)
+EVENTS = {}
+for _text in EVENT_SIGNATURES:
+    _name, _fields, _topic = parse_event(_text)
+    EVENTS[_topic] = (_name, _fields)
+
+
+# ---- encoding ----
+
+def _hex_body(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value[2:] if value[:2] in ("0x", "0X") else value
+
+
+def _address_word(value):
+    body = _hex_body(value)
+    if len(body) != 40:
+        raise ValueError(f"invalid address: {value}")
+    int(body, 16)
+    return "000000000000000000000000" + body.lower()
+
+
+def _uint_word(abi_type, value):
+    bits = int(abi_type[4:] or 256)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0 or value >> bits:
+        raise ValueError(f"{abi_type} out of range: {value!r}")
+    return f"{value:064x}"
+
+
+def _word(abi_type, value):
+    if abi_type == 'address':
+        return _address_word(value)
+    if abi_type == 'bool':
+        return "0" * 63 + ("1" if value else "0")
+    if abi_type.startswith('uint'):
+        return _uint_word(abi_type, value)
+    raise ValueError(f"unsupported ABI type {abi_type}")
+
+
+# ABI-encode values as hex (no 0x). Static types go in the head; bytes and
+# address[] get an offset in the head and their data in the tail.
+def encode_args(types, values):
+    if len(types) != len(values):
+        raise ValueError(f"expected {len(types)} arguments, got {len(values)}")
+    head = []
+    tail = []
+    offset = 32 * len(types)
+    for abi_type, value in zip(types, values):
+        if abi_type == 'bytes':
+            body = _hex_body(value)
+            if len(body) % 2:
+                raise ValueError(f"odd-length hex for bytes: {value!r}")
+            part = f"{len(body) // 2:064x}" + body.lower() + "0" * (-len(body) % 64)
+        elif abi_type == 'address[]':
+            part = f"{len(value):064x}" + "".join(_address_word(item) for item in value)
+        else:
+            head.append(_word(abi_type, value))
+            continue
+        head.append(f"{offset:064x}")
+        tail.append(part)
+        offset += len(part) // 2
+    return "".join(head) + "".join(tail)
+
+
+# Call data for a precompile function
+def encode_call(name, *args):
+    return SELECTORS[name] + encode_args(FUNCTIONS[name][1], args)
+
+
+# Call data for many calls of one function (one argument tuple per call)
+def encode_calls(name, rows):
+    selector = SELECTORS[name]
+    types = FUNCTIONS[name][1]
+    return [selector + encode_args(types, row) for row in rows]
+
+
+# (method, params) for batch_request: an eth_call of a precompile function
+def eth_call(name, *args, block="latest"):
+    return ("eth_call", [{"to": FUNCTIONS[name][0], "data": encode_call(name, *args)}, block])
+
+
+# ---- decoding ----
+
+# Decode ABI-encoded data (hex string or bytes) into a tuple of values
+def decode_values(types, data):
+    body = _hex_body(data)
+    values = []
+    for i, abi_type in enumerate(types):
+        word = body[64 * i:64 * (i + 1)]
+        if len(word) < 64:
+            raise ValueError(f"return data too short for {', '.join(types)}")
+        if abi_type == 'address':
+            values.append(to_checksum_address("0x" + word[24:]))
+        elif abi_type == 'bool':
+            values.append(int(word, 16) != 0)
+        elif abi_type.startswith('uint'):
+            values.append(int(word, 16))
+        elif abi_type in ('bytes', 'string', 'address[]'):
+            start = 2 * int(word, 16)
+            length = int(body[start:start + 64], 16)
+            if abi_type == 'bytes':
+                values.append(bytes.fromhex(body[start + 64:start + 64 + 2 * length]))
+            elif abi_type == 'string':
+                values.append(bytes.fromhex(body[start + 64:start + 64 + 2 * length]).decode('utf-8', 'replace'))
+            else:
+                values.append([to_checksum_address("0x" + body[start + 64 * (j + 1) + 24:start + 64 * (j + 2)])
+                               for j in range(length)])
+        else:
+            raise ValueError(f"unsupported ABI type {abi_type}")
+    return tuple(values)
+
+
+# Decode the return data of a precompile function
+def decode_output(name, data):
+    return decode_values(FUNCTIONS[name][2], data)
+
+
+# Decode the arguments of call data back into (name, values)
+def decode_call(data):
+    body = _hex_body(data)
+    name = BY_SELECTOR.get("0x" + body[:8].lower())
+    if name is None:
+        raise ValueError(f"unknown selector 0x{body[:8]}")
+    return name, decode_values(FUNCTIONS[name][1], body[8:])
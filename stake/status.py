@@ -1,15 +1,15 @@
+import os
 import sys
-from web3 import Web3
+from client import get_web3, preflight, batch_request, RPCError
+from chain_cache import ChainCache
+from staking_abi import NATIVE_STAKING_ADDRESS, NATIVE_STAKING_ABI, encode_call, decode_output
 
 # ANSI escape codes for green text
 GREEN = "\033[92m"
 RESET = "\033[0m"  # Reset to default color
 
-# Set the ZenChain RPC URL
-rpc_url = "https://zenchain-testnet.api.onfinality.io/public"
-
-# Load data from priv-data.txt
-file_path = "/root/chain-data/chains/priv-data.txt"
+# Load data from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
 
 try:
     with open(file_path, 'r') as file:
@@ -27,111 +27,18 @@ except IndexError:
 if SESSION_KEYS.startswith("0x"):
     SESSION_KEYS = SESSION_KEYS[2:]
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(rpc_url))
-
+# Initialize Web3 (shared pooled client, see client.py)
+w3 = get_web3()
+preflight(w3, MY_ADDRESS)
 
 
-# Check if connected to the ZenChain network
-if not w3.is_connected():
-    print('Not connected to ZenChain')
-    sys.exit(1)
-
-if not w3.is_address(MY_ADDRESS):
-    print(f"Invalid address: {MY_ADDRESS}")
-else:
-    try:
-        balance = w3.eth.get_balance(MY_ADDRESS)
-        balance_in_ether = w3.from_wei(balance, 'ether')
-        print(f"{GREEN}Balance for {MY_ADDRESS}: {balance_in_ether} ZCX{RESET}")
-    except Exception as e:
-        print(f"Error getting balance: {e}")
-
-
-
-# Load the NativeStaking contract
-native_staking_contract = '0x0000000000000000000000000000000000000800'
-
-abi = [
-    
-    {
-        "inputs": [
-            {"internalType": "address", "name": "who", "type": "address"}
-        ],
-        "name": "stake",
-        "outputs": [
-            {"internalType": "uint256", "name": "totalStake", "type": "uint256"},
-            {"internalType": "uint256", "name": "activeStake", "type": "uint256"}
-        ],
-        "stateMutability": "view",  # This is a read-only function
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "who", "type": "address"}
-        ],
-        "name": "bonded",
-        "outputs": [
-            {"internalType": "bool", "name": "isBonded", "type": "bool"}
-        ],
-        "stateMutability": "view",  # This is a read-only function
-        "type": "function"
-    },
-    {
-        "inputs": [
-      {
-        "internalType": "address",
-        "name": "who",
-        "type": "address"
-      }
-     ],
-        "name": "status",
-        "outputs": [
-      {
-        "internalType": "uint256",
-        "name": "",
-        "type": "uint256"
-      }
-     ],
-       "stateMutability": "view",
-       "type": "function"
-    },
-    {
-        "inputs": [],
-        "name": "activeEra",
-        "outputs": [
-            {"internalType": "uint256", "name": "", "type": "uint256"}
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [],
-        "name": "historyDepth",
-        "outputs": [
-            {"internalType": "uint256", "name": "", "type": "uint256"}
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "who", "type": "address"}
-        ],
-        "name": "validatorStatus",
-        "outputs": [
-            {"internalType": "uint8", "name": "", "type": "uint8"}
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    },
-]
-
 
+# NativeStaking precompile (full ABI and codec in staking_abi.py)
+native_staking_contract = NATIVE_STAKING_ADDRESS
 
 
 # Contract setup
-staking_contract = w3.eth.contract(address=native_staking_contract, abi=abi)
+staking_contract = w3.eth.contract(address=native_staking_contract, abi=NATIVE_STAKING_ABI)
 
 # Function to check bonded status of an account
 def check_bonded(address):
@@ -148,32 +55,6 @@ def format_wei_to_zcx(wei_amount):
     return wei_amount / 10**18
 
 
-
-def check_stake(address):
-    try:
-        # Assuming the stake function returns a tuple (total_stake, active_stake)
-        total_stake, active_stake = staking_contract.functions.stake(address).call()
-        
-        # Convert the stakes to ZCX
-        total_stake_zcx = format_wei_to_zcx(total_stake)
-        active_stake_zcx = format_wei_to_zcx(active_stake)
-        
-        return total_stake_zcx, active_stake_zcx
-    except Exception as e:
-        print(f"Error retrieving stake: {e}")
-        return None, None
-
-
-def get_staking_status(address):
-    try:
-        raw_output = staking_contract.functions.status(address).call()
-        # Assuming the output is a uint256 (0 for false, non-zero for true)
-        return raw_output > 0  # Non-zero means "bonded"
-    except Exception as e:
-        print(f"Error getting staking status: {e}")
-        return None
-
-
 # Function to get the active era index
 def get_active_era():
     try:
@@ -190,52 +71,144 @@ def get_history_depth():
         print(f"Error retrieving history depth: {e}")
         return None
 
-def check_validator_status(address):
+
+# Read calls in the status report: (function, takes the address)
+SNAPSHOT_CALLS = [
+    ("bonded", True),
+    ("status", True),
+    ("activeEra", False),
+    ("historyDepth", False),
+    ("stake", True),
+]
+
+STATUS_MEANINGS = {
+    0: f"{GREEN} Not staking",
+    1: f"{GREEN} Nominator",
+    2: f"{GREEN} Nominator waiting",
+    3: f"{GREEN} Nominator active"
+}
+
+
+# activeEra and historyDepth are served from the on-disk cache (see chain_cache.py)
+# until the cached era expires; a new era invalidates them
+ERA_CALLS = ("activeEra", "historyDepth")
+
+try:
+    cache = ChainCache()
+except Exception as e:
+    print(f"Chain cache unavailable, reading everything from the chain: {e}")
+    cache = None
+
+
+# Fetch balance and every staking read in one JSON-RPC batch (one round trip)
+def get_snapshot(address):
+    era = cache.active_era() if cache is not None else None
+    snapshot = {}
+
+    calls = [("eth_getBalance", [address, "latest"])]
+    live = []
+    for name, takes_address in SNAPSHOT_CALLS:
+        data = encode_call(name, address) if takes_address else encode_call(name)
+        if era is not None and name in ERA_CALLS:
+            value = era if name == "activeEra" else cache.get(ChainCache.key(native_staking_contract, data), era=era)
+            if value is not None:
+                snapshot[name] = value
+                continue
+        live.append((name, data))
+        calls.append(("eth_call", [{"to": native_staking_contract, "data": data}, "latest"]))
+
+    results = batch_request(calls)
+
+    if isinstance(results[0], RPCError):
+        print(f"Error getting balance: {results[0]}")
+        snapshot["balance"] = None
+    else:
+        snapshot["balance"] = int(results[0], 16)
+
+    fetched = {}
+    for (name, data), result in zip(live, results[1:]):
+        if isinstance(result, RPCError):
+            print(f"Error retrieving {name}: {result}")
+            snapshot[name] = None
+            continue
+        decoded = decode_output(name, result)
+        snapshot[name] = decoded if len(decoded) > 1 else decoded[0]
+        fetched[name] = data
+
+    if cache is not None:
+        if "activeEra" in fetched:
+            cache.set_era(snapshot["activeEra"])
+        if "historyDepth" in fetched and snapshot.get("activeEra") is not None:
+            cache.put(ChainCache.key(native_staking_contract, fetched["historyDepth"]), snapshot["historyDepth"],
+                      era=snapshot["activeEra"])
+    return snapshot
+
+
+# Same report with one call per value, for endpoints that reject batches
+def get_snapshot_sequential(address):
+    try:
+        balance = w3.eth.get_balance(address)
+    except Exception as e:
+        print(f"Error getting balance: {e}")
+        balance = None
+
     try:
         status = staking_contract.functions.status(address).call()
-        status_meanings = {
-            0: f"{GREEN} Not staking",
-            1: f"{GREEN} Nominator",
-            2: f"{GREEN} Nominator waiting",
-            3: f"{GREEN} Nominator active"
-        }
-        return status_meanings.get(status, f"{GREEN} Unknown status: {status}")
     except Exception as e:
-        return f"{GREEN} Error retrieving status: {e}"
+        print(f"Error getting staking status: {e}")
+        status = None
+
+    try:
+        stake = staking_contract.functions.stake(address).call()
+    except Exception as e:
+        print(f"Error retrieving stake: {e}")
+        stake = None
 
+    return {
+        "balance": balance,
+        "bonded": check_bonded(address),
+        "status": status,
+        "activeEra": get_active_era(),
+        "historyDepth": get_history_depth(),
+        "stake": stake,
+    }
 
 
+def print_report(snapshot):
+    if snapshot["balance"] is not None:
+        print(f"{GREEN}Balance for {MY_ADDRESS}: {w3.from_wei(snapshot['balance'], 'ether')} ZCX{RESET}")
 
+    if not snapshot["bonded"]:
+        print(f"{GREEN}You are not bonded yet. Your Nominator is not connected to ZenChain Server!{RESET}")
+        return
 
-# Main execution
-if check_bonded(MY_ADDRESS):
     print(f"{GREEN}Your bonded status is true, Your Nominator Node is connected to ZenChain Server!{RESET}")
 
-    # Example usage
-    validator_status = check_validator_status(MY_ADDRESS)
-    if validator_status is not None:
+    status = snapshot["status"]
+    if status is not None:
+        validator_status = STATUS_MEANINGS.get(status, f"{GREEN} Unknown status: {status}")
         print(f"{GREEN}Validator Status: {validator_status}{RESET}")
-    
-    # Get and print staking status
-    staking_status = get_staking_status(MY_ADDRESS)
-    if staking_status is not None:
-        print(f"{GREEN}Staking Status: {staking_status}{RESET}")
-    
-    # Get and print the active era
-    active_era = get_active_era()
-    if active_era is not None:
-        print(f"{GREEN}Active Era Index: {active_era}{RESET}")
-    
-    # Get and print the history depth
-    history_depth = get_history_depth()
-    if history_depth is not None:
-        print(f"{GREEN}History Depth (Number of Eras Stored): {history_depth}{RESET}")
-
-    # Retrieve and print stake balance
-    total_stake, active_stake = check_stake(MY_ADDRESS)
-    if total_stake is not None and active_stake is not None:
+        # Non-zero means "bonded"
+        print(f"{GREEN}Staking Status: {status > 0}{RESET}")
+
+    if snapshot["activeEra"] is not None:
+        print(f"{GREEN}Active Era Index: {snapshot['activeEra']}{RESET}")
+
+    if snapshot["historyDepth"] is not None:
+        print(f"{GREEN}History Depth (Number of Eras Stored): {snapshot['historyDepth']}{RESET}")
+
+    if snapshot["stake"] is not None:
+        total_stake, active_stake = snapshot["stake"]
         # Print the values in a human-readable format
-        print(f"{GREEN}Your stake balance: Total Stake = {total_stake:.2f} ZCX, Active Stake = {active_stake:.2f} ZCX{RESET}")  
+        print(f"{GREEN}Your stake balance: Total Stake = {format_wei_to_zcx(total_stake):.2f} ZCX, Active Stake = {format_wei_to_zcx(active_stake):.2f} ZCX{RESET}")
+
+
+
+# Main execution
+try:
+    snapshot = get_snapshot(MY_ADDRESS)
+except Exception as e:
+    print(f"Batch request failed ({e}), falling back to single calls...")
+    snapshot = get_snapshot_sequential(MY_ADDRESS)
 
-else:
-    print(f"{GREEN}You are not bonded yet. Your Nominator is not connected to ZenChain Server!{RESET}")
+print_report(snapshot)
@@ -0,0 +1,209 @@
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from client import batch_request, RPCError
+
+# Sync progress tracker for one or more local nodes.
+#
+#   python3 sync-tracker.py                                   # localhost:9944 every 5 seconds
+#   python3 sync-tracker.py --node http://localhost:9944 --node http://localhost:9945 --window 120
+#   python3 sync-tracker.py --count 12 --json
+#
+# Every tick reads system_syncState and system_health from each node in one
+# batch. Blocks/sec and the ETA come from the samples in the rolling window,
+# and a node whose current block has not moved for --stall seconds while it
+# is behind is flagged as stalled.
+
+GREEN = "\033[92m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+# Below this many peers, slow sync is put down to the network
+MIN_PEERS = 3
+# Host CPU busy / iowait share (percent) above which sync is put down to CPU / disk
+CPU_BUSY = 85
+IO_WAIT = 20
+
+
+# Host CPU and iowait share between two reads of /proc/stat (Linux only)
+class HostLoad:
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat", 'r') as file:
+                fields = [int(value) for value in file.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # user nice system idle iowait irq softirq steal
+        idle, iowait = fields[3], fields[4]
+        return sum(fields[:8]), idle, iowait
+
+    def sample(self):
+        current = self._read()
+        last, self._last = self._last, current
+        if current is None or last is None or current[0] == last[0]:
+            return None
+        total = current[0] - last[0]
+        idle = current[1] - last[1]
+        iowait = current[2] - last[2]
+        return {
+            "cpu_busy": round(100 * (total - idle - iowait) / total, 1),
+            "iowait": round(100 * iowait / total, 1),
+        }
+
+
+class NodeTracker:
+    def __init__(self, url, window, stall_after):
+        self.url = url
+        self.window = window
+        self.stall_after = stall_after
+        self.local = urlparse(url).hostname in LOCAL_HOSTS
+        # (time, current block, highest block) over the rolling window
+        self.samples = deque()
+        self.last_progress = None
+
+    def poll(self):
+        now = time.monotonic()
+        try:
+            sync_state, health = batch_request([("system_syncState", []), ("system_health", [])], self.url)
+        except Exception as e:
+            return {"node": self.url, "error": str(e)}
+        if isinstance(sync_state, RPCError):
+            return {"node": self.url, "error": str(sync_state)}
+
+        current = sync_state["currentBlock"]
+        highest = sync_state.get("highestBlock") or current
+        peers = None if isinstance(health, RPCError) else health.get("peers")
+
+        if not self.samples or current > self.samples[-1][1]:
+            self.last_progress = now
+        self.samples.append((now, current, highest))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+        first_time, first_block, _ = self.samples[0]
+        rate = None
+        if now > first_time:
+            rate = (current - first_block) / (now - first_time)
+
+        behind = max(0, highest - current)
+        eta = None
+        if behind == 0:
+            eta = 0
+        elif rate:
+            eta = behind / rate
+
+        stalled = behind > 0 and now - self.last_progress >= self.stall_after
+        return {
+            "node": self.url,
+            "current": current,
+            "highest": highest,
+            "behind": behind,
+            "peers": peers,
+            "rate": None if rate is None else round(rate, 2),
+            "eta_seconds": None if eta is None else round(eta),
+            "stalled": stalled,
+            "window_seconds": round(now - first_time, 1),
+        }
+
+
+# Best guess at what is limiting a node that is behind
+def bottleneck(row, load):
+    # Needs a measured rate, so nothing is said on the first sample
+    if row.get("behind", 0) == 0 or row.get("rate") is None:
+        return None
+    if row.get("peers") is not None and row["peers"] < MIN_PEERS:
+        return "peer-bound"
+    if load is not None:
+        if load["iowait"] >= IO_WAIT:
+            return "disk-bound"
+        if load["cpu_busy"] >= CPU_BUSY:
+            return "cpu-bound"
+    if row.get("peers") is not None and row["rate"] == 0:
+        return "peer-bound"
+    return None
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "unknown"
+    if seconds == 0:
+        return "synced"
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def format_row(row):
+    if "error" in row:
+        return f"{RED}{row['node']}: {row['error']}{RESET}"
+    rate = "-" if row["rate"] is None else f"{row['rate']:.2f} blocks/s"
+    line = (f"{row['node']}: #{row['current']} / #{row['highest']} ({row['behind']} behind), "
+            f"{rate}, ETA {format_eta(row['eta_seconds'])}, peers {row['peers']}")
+    if row.get("load"):
+        line += f", host cpu {row['load']['cpu_busy']}% iowait {row['load']['iowait']}%"
+    if row.get("bottleneck"):
+        line += f", likely {row['bottleneck']}"
+    if row["stalled"]:
+        return f"{RED}{line} [STALLED]{RESET}"
+    return f"{GREEN}{line}{RESET}" if row["behind"] == 0 else line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track sync rate, ETA and stalls for ZenChain nodes")
+    parser.add_argument("--node", action="append", default=[], help="node RPC URL (repeatable, default http://localhost:9944)")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between samples")
+    parser.add_argument("--window", type=float, default=60, help="seconds of samples used for the rate")
+    parser.add_argument("--stall", type=float, default=60, help="seconds without progress before a node counts as stalled")
+    parser.add_argument("--count", type=int, default=0, help="stop after this many samples (0 = run until Ctrl-C)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per node per sample")
+    args = parser.parse_args()
+
+    urls = args.node or ["http://localhost:9944"]
+    trackers = [NodeTracker(url, args.window, args.stall) for url in urls]
+    host_load = HostLoad() if any(tracker.local for tracker in trackers) else None
+
+    stalled = False
+    samples = 0
+    try:
+        with ThreadPoolExecutor(max_workers=len(trackers)) as executor:
+            while True:
+                started = time.monotonic()
+                rows = list(executor.map(lambda tracker: tracker.poll(), trackers))
+                load = host_load.sample() if host_load else None
+                samples += 1
+
+                for tracker, row in zip(trackers, rows):
+                    if "error" not in row:
+                        if tracker.local and load is not None:
+                            row["load"] = load
+                        row["bottleneck"] = bottleneck(row, load if tracker.local else None)
+                        stalled = stalled or row["stalled"]
+                    if args.json:
+                        print(json.dumps(row), flush=True)
+                    else:
+                        print(format_row(row), flush=True)
+
+                if args.count and samples >= args.count:
+                    break
+                if not args.json and len(trackers) > 1:
+                    print()
+                time.sleep(max(0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+
+    if stalled:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from client import parallel_batches, RPCError
+from staking_abi import encode_call
+
+# Write-ahead journal for staking transactions, so a script that dies half
+# way through a run can be started again without sending anything twice.
+#
+#   run = open_run("change-commission", pipeline, [bond_extra, validate])
+#   todo = run.pending()                                  # steps not confirmed yet
+#   sent = pipeline.send([funcs[i] for i in todo], steps=[run.step(i) for i in todo])
+#   run.finish_all(todo, pipeline.wait(sent))
+#
+#   python3 tx_journal.py                                 # open runs and their steps
+#   python3 tx_journal.py --abandon 12                    # stop resuming run 12
+#
+# A run is the list of calls a script is about to make. Its key is a hash
+# of the label, the senders and the call data (or a key the script passes),
+# so starting the same script with the same inputs after a crash reopens
+# the same run. Every step goes
+#   planned -> signed -> broadcast -> confirmed | failed
+# and each change is committed (synchronous=FULL) before the next action:
+# the signed raw transaction is on disk before it is broadcast.
+#
+# Reopening a run reconciles the steps that were signed or broadcast in one
+# couple of JSON-RPC batches (mined nonce per account, then receipts):
+#   - a receipt            -> confirmed / failed
+#   - nonce used elsewhere -> the transaction can never be mined; planned again
+#   - otherwise            -> the same signed bytes are broadcast again (same
+#                             hash and nonce, so it cannot execute twice) and
+#                             waited for
+# Only then are unfinished steps sent, on fresh nonces. A step still pending
+# after the wait raises JournalError rather than being re-signed. A run is
+# closed once every step is confirmed; the same inputs later start a new run.
+
+# Journal file (override with ZENCHAIN_JOURNAL_PATH; ZENCHAIN_JOURNAL=0 keeps it in memory only)
+JOURNAL_PATH = os.environ.get("ZENCHAIN_JOURNAL_PATH", os.path.expanduser("~/.cache/zenchain/tx-journal.sqlite"))
+JOURNAL = os.environ.get("ZENCHAIN_JOURNAL", "1") != "0"
+
+# Seconds to wait for re-broadcast transactions while reconciling
+RECOVER_TIMEOUT = float(os.environ.get("ZENCHAIN_RECEIPT_TIMEOUT", "120"))
+
+FIELDS = ["step", "account", "to_address", "data", "state", "nonce", "tx_hash", "raw", "block", "error"]
+
+
+class JournalError(Exception):
+    pass
+
+
+class TxJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            if path != ":memory:":
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=FULL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY, key TEXT NOT NULL, label TEXT NOT NULL, "
+                "created REAL NOT NULL, closed REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS runs_open ON runs (key, closed)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS steps ("
+                "run INTEGER NOT NULL, step INTEGER NOT NULL, account TEXT NOT NULL, to_address TEXT NOT NULL, "
+                "data TEXT NOT NULL, state TEXT NOT NULL, nonce INTEGER, tx_hash TEXT, raw TEXT, block INTEGER, "
+                "error TEXT, updated REAL NOT NULL, PRIMARY KEY (run, step))"
+            )
+
+    # Reopen the unfinished run for these calls, or start a new one. calls: [(account, to, data)].
+    # key defaults to the calls themselves; pass one when the calls can differ
+    # between attempts (targets picked by the planner, an edited manifest).
+    # Steps that were never sent then take the new call data; steps that were
+    # sent must still be the same function for the same account.
+    def open(self, label, calls, key=None):
+        if key is None:
+            key = json.dumps([[account.lower(), to.lower(), data] for account, to, data in calls])
+        key = hashlib.sha256(f"{label}|{key}".encode()).hexdigest()
+        now = time.time()
+        with self.lock, self.db:
+            row = self.db.execute("SELECT id FROM runs WHERE key = ? AND closed IS NULL ORDER BY id DESC LIMIT 1",
+                                  (key,)).fetchone()
+            if row is not None:
+                run_id = row[0]
+                rows = self.db.execute("SELECT account, to_address, data, state FROM steps WHERE run = ? ORDER BY step",
+                                       (run_id,)).fetchall()
+                if len(rows) != len(calls):
+                    raise JournalError(f"unfinished run {run_id} has {len(rows)} steps, not {len(calls)}; "
+                                       f"finish it with the same inputs or abandon it (tx_journal.py --abandon {run_id})")
+                # A step that may already be on chain must still be the same function for the same account
+                for i, ((account, to, data, state), call) in enumerate(zip(rows, calls)):
+                    if state not in ("planned", "failed") and \
+                            (account.lower(), to.lower(), data[:10]) != (call[0].lower(), call[1].lower(), call[2][:10]):
+                        raise JournalError(f"step {i} of unfinished run {run_id} was sent as a different call; "
+                                           f"abandon the run (tx_journal.py --abandon {run_id}) to start over")
+                self.db.executemany(
+                    "UPDATE steps SET account = ?, to_address = ?, data = ?, updated = ? "
+                    "WHERE run = ? AND step = ? AND state IN ('planned', 'failed')",
+                    [(account, to, data, now, run_id, i) for i, (account, to, data) in enumerate(calls)],
+                )
+                return JournalRun(self, run_id, label, resumed=True)
+            run_id = self.db.execute("INSERT INTO runs (key, label, created) VALUES (?, ?, ?)",
+                                     (key, label, now)).lastrowid
+            self.db.executemany(
+                "INSERT INTO steps (run, step, account, to_address, data, state, updated) "
+                "VALUES (?, ?, ?, ?, ?, 'planned', ?)",
+                [(run_id, i, account, to, data, now) for i, (account, to, data) in enumerate(calls)],
+            )
+        return JournalRun(self, run_id, label, resumed=False)
+
+    def update(self, run_id, step, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock, self.db:
+            self.db.execute(f"UPDATE steps SET {columns}, updated = ? WHERE run = ? AND step = ?",
+                            (*fields.values(), time.time(), run_id, step))
+
+    def steps(self, run_id):
+        with self.lock:
+            rows = self.db.execute(f"SELECT {', '.join(FIELDS)} FROM steps WHERE run = ? ORDER BY step",
+                                   (run_id,)).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def close(self, run_id):
+        with self.lock, self.db:
+            self.db.execute("UPDATE runs SET closed = ? WHERE id = ?", (time.time(), run_id))
+
+    def open_runs(self):
+        with self.lock:
+            return self.db.execute("SELECT id, label, created FROM runs WHERE closed IS NULL ORDER BY id").fetchall()
+
+
+class JournalRun:
+    def __init__(self, journal, run_id, label, resumed):
+        self.journal = journal
+        self.id = run_id
+        self.label = label
+        self.resumed = resumed
+
+    def steps(self):
+        return self.journal.steps(self.id)
+
+    # Indices of the steps that still have to be sent
+    def pending(self):
+        return [step["step"] for step in self.steps() if step["state"] != "confirmed"]
+
+    def step(self, index):
+        return JournalStep(self, index)
+
+    # Settle every signed or broadcast step against the chain (see the top of this file).
+    # Returns {state: count} for the steps it settled.
+    def recover(self, tracker, rpc_url=None, timeout=RECOVER_TIMEOUT):
+        inflight = [step for step in self.steps() if step["state"] in ("signed", "broadcast")]
+        if not inflight:
+            return {}
+        accounts = sorted({step["account"] for step in inflight})
+        # Nonces first, receipts second: a transaction mined before the nonce
+        # read is then sure to show its receipt, so a used nonce without our
+        # receipt really means another transaction took it
+        counts = parallel_batches([("eth_getTransactionCount", [account, "latest"]) for account in accounts], rpc_url)
+        mined = {account: int(count, 16) for account, count in zip(accounts, counts) if not isinstance(count, RPCError)}
+        receipts = parallel_batches([("eth_getTransactionReceipt", [step["tx_hash"]]) for step in inflight], rpc_url)
+
+        settled = {}
+        unsettled = []
+        for step, receipt in zip(inflight, receipts):
+            if isinstance(receipt, RPCError):
+                raise JournalError(f"could not read the receipt of {step['tx_hash']}: {receipt}")
+            if receipt is not None:
+                state = self.finish(step["step"], int(receipt["status"], 16), int(receipt["blockNumber"], 16))
+            elif step["account"] not in mined:
+                raise JournalError(f"could not read the nonce of {step['account']}")
+            elif step["nonce"] < mined[step["account"]]:
+                self.replaced(step["step"])
+                state = "replaced"
+            else:
+                unsettled.append(step)
+                continue
+            settled[state] = settled.get(state, 0) + 1
+
+        if unsettled:
+            # The same signed bytes again: a node that already has them answers "already known"
+            parallel_batches([("eth_sendRawTransaction", [step["raw"]]) for step in unsettled], rpc_url)
+            for step in unsettled:
+                self.journal.update(self.id, step["step"], state="broadcast")
+            results = tracker.wait([step["tx_hash"] for step in unsettled], timeout=timeout)
+            for step in unsettled:
+                receipt = results.get(step["tx_hash"])
+                if receipt is None:
+                    raise JournalError(f"step {step['step']} ({step['tx_hash']}) is still pending; run again later")
+                state = self.finish(step["step"], receipt["status"], receipt["blockNumber"])
+                settled[state] = settled.get(state, 0) + 1
+        return settled
+
+    # Record a mined step: receipt status 1 is confirmed, anything else failed (and sent again next time)
+    def finish(self, index, status, block):
+        state = "confirmed" if status == 1 else "failed"
+        self.journal.update(self.id, index, state=state, block=block, error=None if status == 1 else "reverted")
+        return state
+
+    # Another transaction took the step's nonce, so it can never be mined
+    def replaced(self, index):
+        self.journal.update(self.id, index, state="planned", nonce=None, tx_hash=None, raw=None, error="replaced")
+
+    # Record TxPipeline.wait results for the steps they were sent for
+    def finish_all(self, indices, results):
+        for index, result in zip(indices, results):
+            if result["receipt"] is not None:
+                self.finish(index, result["receipt"]["status"], result["receipt"]["blockNumber"])
+            elif result["status"] == "replaced":
+                self.replaced(index)
+        self.close_if_done()
+
+    def close_if_done(self):
+        if not self.pending():
+            self.journal.close(self.id)
+            return True
+        return False
+
+
+# Handed to TxPipeline.send for one step: records the signed transaction
+# before it goes out, then that it went out
+class JournalStep:
+    def __init__(self, run, index):
+        self.run = run
+        self.index = index
+
+    def signed(self, nonce, signed_txn):
+        self.run.journal.update(self.run.id, self.index, state="signed", nonce=nonce,
+                                tx_hash="0x" + bytes(signed_txn.hash).hex(),
+                                raw="0x" + bytes(signed_txn.raw_transaction).hex(), error=None)
+
+    def broadcast(self):
+        self.run.journal.update(self.run.id, self.index, state="broadcast")
+
+    # The node refused the transaction, so nothing is in flight. A transport
+    # error (timeout, dropped connection) may still have reached the node, so
+    # that step stays signed for recover() to settle.
+    def rejected(self, error):
+        if isinstance(error, OSError):
+            return
+        self.run.journal.update(self.run.id, self.index, state="planned", nonce=None, tx_hash=None, raw=None,
+                                error=str(error))
+
+
+_journal = None
+
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = TxJournal(JOURNAL_PATH if JOURNAL else ":memory:")
+    return _journal
+
+
+# Open (and reconcile) the run for a script's contract calls; all calls are sent by pipeline.address
+def open_run(label, pipeline, funcs, key=None, rpc_url=None):
+    calls = [(pipeline.address, func.address, encode_call(func.fn_name, *func.args)) for func in funcs]
+    run = get_journal().open(label, calls, key)
+    if run.resumed:
+        settled = run.recover(pipeline.tracker, rpc_url)
+        done = len(funcs) - len(run.pending())
+        print(f"Resuming an unfinished {label} run: {done}/{len(funcs)} steps already confirmed"
+              + (f" ({', '.join(f'{count} {state}' for state, count in settled.items())} after reconciling)"
+                 if settled else ""))
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or abandon unfinished journaled runs")
+    parser.add_argument("--path", default=JOURNAL_PATH)
+    parser.add_argument("--abandon", type=int, metavar="RUN", help="close a run so it is not resumed")
+    args = parser.parse_args()
+
+    journal = TxJournal(args.path)
+    if args.abandon is not None:
+        journal.close(args.abandon)
+        print(f"Run {args.abandon} closed")
+        return
+    runs = journal.open_runs()
+    if not runs:
+        print("No unfinished runs")
+    for run_id, label, created in runs:
+        steps = journal.steps(run_id)
+        states = {}
+        for step in steps:
+            states[step["state"]] = states.get(step["state"], 0) + 1
+        print(f"run {run_id} {label} started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))}: "
+              f"{', '.join(f'{count} {state}' for state, count in sorted(states.items()))}")
+        for step in steps:
+            if step["state"] != "confirmed":
+                print(f"  step {step['step']} {step['account']} {step['state']} nonce={step['nonce']} "
+                      f"tx={step['tx_hash']} {step['error'] or ''}")
+    sys.exit(1 if runs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from client import batch_request, parallel_batches, RPCError
+from staking_abi import COMMISSION_PER_PERCENT, eth_call, decode_output
+
+# Nomination planner: picks nomination targets from the whole validator set.
+#
+#   python3 validator_planner.py                          # the TARGET_COUNT best validators, ranked
+#   python3 validator_planner.py --weight yield=0.6 --weight stake=0.2 --max-commission 5
+#   python3 validator_planner.py --json
+#
+# nominate.py calls plan_targets(). The validator list, each validator's
+# commission and blocked flag, its exposure and era points for the last
+# completed era and its nominator count are read in JSON-RPC batches.
+# Scoring is a handful of NumPy array operations over the whole set:
+#
+#   - blocked validators, validators above the commission cap, validators
+#     without points or stake, and oversubscribed validators (nominator
+#     count at or above OVERSUBSCRIPTION x maxNominatorsRewarded) are dropped
+#   - every feature is scaled to 0..1 over the remaining validators
+#   - the score is the weighted sum; the best TARGET_COUNT are nominated
+
+# Targets nominated (the staking pallet accepts at most 16)
+TARGET_COUNT = int(os.environ.get("ZENCHAIN_NOMINATION_TARGETS", "16"))
+
+# Validators charging more than this commission (percent) are skipped
+MAX_COMMISSION = float(os.environ.get("ZENCHAIN_MAX_COMMISSION", "10"))
+
+# Share of maxNominatorsRewarded at which a validator counts as oversubscribed
+OVERSUBSCRIPTION = float(os.environ.get("ZENCHAIN_OVERSUBSCRIPTION", "0.9"))
+
+# Score weights:
+#   yield       era points per staked ZCX after commission (what a nominator earns)
+#   points      era points (is the validator producing blocks)
+#   commission  lower is better
+#   stake       lower total stake is better (rewards are split over less stake)
+#   own         share of the validator's own stake in its exposure
+WEIGHTS = {"yield": 0.4, "points": 0.2, "commission": 0.2, "stake": 0.1, "own": 0.1}
+
+# Per-validator reads, in the order their results are laid out
+VALIDATOR_CALLS = ["validatorPrefs", "eraExposure", "eraPoints", "nominatorCount"]
+
+
+def decode_result(name, result):
+    if isinstance(result, RPCError):
+        raise result
+    return decode_output(name, result)
+
+
+# "yield=0.5,stake=0.2" -> WEIGHTS with those entries replaced
+def parse_weights(items):
+    weights = dict(WEIGHTS)
+    for item in items:
+        for part in item.split(","):
+            if not part.strip():
+                continue
+            name, _, value = part.partition("=")
+            name = name.strip()
+            if name not in WEIGHTS:
+                raise ValueError(f"unknown weight '{name}' (known: {', '.join(WEIGHTS)})")
+            weights[name] = float(value)
+    return weights
+
+
+# Read the validator set into arrays, one entry per validator
+def fetch_validator_set(rpc_url=None, batch_size=60, concurrency=8):
+    validators, active_era, max_nominators = batch_request(
+        [eth_call("validators"), eth_call("activeEra"), eth_call("maxNominatorsRewarded")], rpc_url)
+    addresses = decode_result("validators", validators)[0]
+    active_era = decode_result("activeEra", active_era)[0]
+    max_nominators = decode_result("maxNominatorsRewarded", max_nominators)[0]
+    # Points and exposure of the last completed era (the active one is still filling)
+    era = max(0, active_era - 1)
+
+    calls = []
+    for address in addresses:
+        calls.extend([
+            eth_call("validatorPrefs", address),
+            eth_call("eraExposure", era, address),
+            eth_call("eraPoints", era, address),
+            eth_call("nominatorCount", address),
+        ])
+    results = parallel_batches(calls, rpc_url, batch_size, concurrency)
+
+    count = len(addresses)
+    validator_set = {
+        "address": addresses,
+        "era": era,
+        "max_nominators": max_nominators,
+        "commission": np.zeros(count),
+        "blocked": np.zeros(count, dtype=bool),
+        "total": np.zeros(count),
+        "own": np.zeros(count),
+        "points": np.zeros(count),
+        "nominators": np.zeros(count),
+        # False where any read for the validator failed
+        "valid": np.ones(count, dtype=bool),
+    }
+    per_validator = len(VALIDATOR_CALLS)
+    for i in range(count):
+        try:
+            prefs, exposure, points, nominators = (
+                decode_result(name, result)
+                for name, result in zip(VALIDATOR_CALLS, results[i * per_validator:(i + 1) * per_validator]))
+        except RPCError:
+            validator_set["valid"][i] = False
+            continue
+        validator_set["commission"][i] = prefs[0] / (100 * COMMISSION_PER_PERCENT)
+        validator_set["blocked"][i] = prefs[1]
+        validator_set["total"][i] = exposure[0] / 10**18
+        validator_set["own"][i] = exposure[1] / 10**18
+        validator_set["points"][i] = points[0]
+        validator_set["nominators"][i] = nominators[0]
+    return validator_set
+
+
+# Scale values to 0..1 over the entries in mask
+def normalize(values, mask):
+    if not mask.any():
+        return np.zeros_like(values)
+    low = values[mask].min()
+    span = values[mask].max() - low
+    if span == 0:
+        return np.zeros_like(values)
+    return (values - low) / span
+
+
+# Score every validator; returns (scores, eligible) with -inf for ineligible validators
+def score_validators(validator_set, weights=None, max_commission=MAX_COMMISSION, oversubscription=OVERSUBSCRIPTION):
+    weights = WEIGHTS if weights is None else weights
+    commission = validator_set["commission"]
+    total = validator_set["total"]
+    points = validator_set["points"]
+    nominators = validator_set["nominators"]
+
+    eligible = (validator_set["valid"] & ~validator_set["blocked"] & (commission <= max_commission / 100)
+                & (total > 0) & (points > 0) & (nominators < oversubscription * validator_set["max_nominators"]))
+
+    safe_total = np.where(total > 0, total, 1.0)
+    features = {
+        "yield": normalize(points * (1 - commission) / safe_total, eligible),
+        "points": normalize(points, eligible),
+        "commission": 1 - normalize(commission, eligible),
+        "stake": 1 - normalize(total, eligible),
+        "own": normalize(validator_set["own"] / safe_total, eligible),
+    }
+    scores = np.zeros(len(total))
+    for name, weight in weights.items():
+        scores += weight * features[name]
+    return np.where(eligible, scores, -np.inf), eligible
+
+
+# Indices of the best count validators, best first
+def select_targets(scores, count):
+    count = min(count, int(np.isfinite(scores).sum()))
+    if count <= 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, count - 1)[:count]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+# Ranked rows for the best count validators
+def plan(count=TARGET_COUNT, weights=None, max_commission=MAX_COMMISSION, oversubscription=OVERSUBSCRIPTION,
+         rpc_url=None, validator_set=None):
+    if validator_set is None:
+        validator_set = fetch_validator_set(rpc_url)
+    scores, _ = score_validators(validator_set, weights, max_commission, oversubscription)
+    return [{
+        "address": validator_set["address"][i],
+        "score": round(float(scores[i]), 4),
+        "commission_percent": round(float(validator_set["commission"][i]) * 100, 2),
+        "total_stake_zcx": round(float(validator_set["total"][i]), 4),
+        "era_points": int(validator_set["points"][i]),
+        "nominators": int(validator_set["nominators"][i]),
+    } for i in select_targets(scores, count)]
+
+
+# Target addresses for nominate()
+def plan_targets(count=TARGET_COUNT, **options):
+    return [row["address"] for row in plan(count, **options)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank validators and pick nomination targets")
+    parser.add_argument("--count", type=int, default=TARGET_COUNT, help="targets to pick")
+    parser.add_argument("--weight", action="append", default=[], help="score weight as name=value (repeatable)")
+    parser.add_argument("--max-commission", type=float, default=MAX_COMMISSION, help="highest commission, percent")
+    parser.add_argument("--oversubscription", type=float, default=OVERSUBSCRIPTION,
+                        help="share of maxNominatorsRewarded at which a validator is skipped")
+    parser.add_argument("--rpc-url", help="RPC endpoint (default: the configured endpoints)")
+    parser.add_argument("--json", action="store_true", help="print the chosen targets as JSON")
+    args = parser.parse_args()
+
+    try:
+        weights = parse_weights(args.weight)
+    except ValueError as e:
+        print(f"Invalid weight: {e}")
+        sys.exit(2)
+
+    started = time.perf_counter()
+    try:
+        validator_set = fetch_validator_set(args.rpc_url)
+    except Exception as e:
+        print(f"Failed to read the validator set: {e}")
+        sys.exit(1)
+    fetched = time.perf_counter()
+    scores, eligible = score_validators(validator_set, weights, args.max_commission, args.oversubscription)
+    scored = time.perf_counter()
+    rows = plan(args.count, weights, args.max_commission, args.oversubscription, validator_set=validator_set)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'#':>3}  {'validator':<44}{'score':>7}{'comm %':>8}{'stake (ZCX)':>15}{'points':>8}{'noms':>6}")
+        for rank, row in enumerate(rows, 1):
+            print(f"{rank:>3}  {row['address']:<44}{row['score']:>7.3f}{row['commission_percent']:>8.2f}"
+                  f"{row['total_stake_zcx']:>15.2f}{row['era_points']:>8}{row['nominators']:>6}")
+    print(f"{len(validator_set['address'])} validators, {int(eligible.sum())} eligible (era {validator_set['era']}); "
+          f"fetched in {fetched - started:.2f}s, scored in {(scored - fetched) * 1000:.2f} ms", file=sys.stderr)
+    if not rows:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
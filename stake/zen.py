@@ -1,5 +1,9 @@
+import os
 import sys
-from web3 import Web3
+from client import get_web3, preflight
+from staking_abi import KEY_MANAGER_ADDRESS, KEY_MANAGER_ABI
+from nonce_manager import TxPipeline, BroadcastError
+from simulate import doomed_calls
 import time
 
 
@@ -7,11 +11,8 @@ import time
 GREEN = "\033[92m"
 RESET = "\033[0m"  # Reset to default color
 
-# Set the ZenChain RPC URL
-rpc_url = "https://zenchain-testnet.api.onfinality.io/public"
-
-# Load data from priv-data.txt
-file_path = "/root/chain-data/chains/priv-data.txt"
+# Load data from priv-data.txt (override the path with ZENCHAIN_PRIV_DATA)
+file_path = os.environ.get("ZENCHAIN_PRIV_DATA", "/root/chain-data/chains/priv-data.txt")
 
 try:
     with open(file_path, 'r') as file:
@@ -29,38 +30,14 @@ except IndexError:
 if SESSION_KEYS.startswith("0x"):
     SESSION_KEYS = SESSION_KEYS[2:]
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(rpc_url))
-
-
-
-# Check if connected to the ZenChain network
-if not w3.is_connected():
-    print('Not connected to ZenChain')
-    sys.exit(1)
-
-if not w3.is_address(MY_ADDRESS):
-    print(f"Invalid address: {MY_ADDRESS}")
-else:
-    try:
-        balance = w3.eth.get_balance(MY_ADDRESS)
-        balance_in_ether = w3.from_wei(balance, 'ether')
-        print(f"{GREEN}Balance for {MY_ADDRESS}: {balance_in_ether} ZCX{RESET}")
-
-        # Check if the balance is less than 1 token
-        if balance_in_ether < 1:
-            print(f"{GREEN}You need to deposit at least 1 token to proceed.{RESET}")
-            sys.exit(1)  # Exit the program if balance is less than 1 token
-
-    except Exception as e:
-        print(f"Error getting balance: {e}")
+# Initialize Web3 (shared pooled client, see client.py)
+w3 = get_web3()
+preflight(w3, MY_ADDRESS, min_balance=1)
 
 
-# Set the KeyManager contract address and ABI
-key_manager_address = '0x0000000000000000000000000000000000000802'
-abi = [{'inputs': [{'internalType': 'bytes', 'name': 'keys', 'type': 'bytes'}], 
-        'name': 'setKeys', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'}]
-contract = w3.eth.contract(address=key_manager_address, abi=abi)
+# KeyManager precompile (ABI shared with the other scripts, see staking_abi.py)
+key_manager_address = KEY_MANAGER_ADDRESS
+contract = w3.eth.contract(address=key_manager_address, abi=KEY_MANAGER_ABI)
 
 
 # Convert the session keys from hex string to bytes
@@ -70,37 +47,33 @@ except ValueError as e:
     print(f"Error converting session keys to bytes: {e}")
     sys.exit(1)
 
-# Prepare the transaction
-CHAIN_ID = 8408  
+# Nonces come from a local NonceManager instead of a lookup per call (see nonce_manager.py)
+pipeline = TxPipeline(w3, MY_ADDRESS, PRIVATE_KEY)
 
 def send_transaction(func):
-    nonce = w3.eth.get_transaction_count(MY_ADDRESS)
-    # Build the transaction
-    transaction = func.build_transaction({
-        'chainId': CHAIN_ID,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price,
-        'nonce': nonce,
-    })
-
-    # Sign the transaction using the private key
-    signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-
-    # Send the transaction to the network
-    try:
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-
-        # Wait for the transaction receipt
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-
-        # Output transaction details
-        print(f'{GREEN}Transaction Block Number: {tx_receipt.blockNumber}')
-        print(f'{GREEN}Transaction Hash: {tx_receipt.transactionHash.hex()}')
+    # Dry-run the call first (see simulate.py) so a doomed transaction is never signed
+    for name, reason in doomed_calls(MY_ADDRESS, [func], pipeline.estimator):
+        print(f"{name} would fail: {reason}. Nothing was sent.")
+        sys.exit(1)
 
-    except Exception as e:
+    # Sign and send the transaction to the network
+    try:
+        sent = pipeline.send([func])
+    except BroadcastError as e:
         print(f"Error occurred while sending the transaction: {str(e)}")
         sys.exit(1)
 
+    # Wait for the transaction receipt
+    result = pipeline.wait(sent)[0]
+    if result['receipt'] is None:
+        print(f"Transaction was not mined: {result['status']}")
+        sys.exit(1)
+
+    # Output transaction details
+    tx_receipt = result['receipt']
+    print(f'{GREEN}Transaction Block Number: {tx_receipt.blockNumber}')
+    print(f'{GREEN}Transaction Hash: {tx_receipt.transactionHash.hex()}')
+
 
 
 # Call the send_transaction function to execute the contract method
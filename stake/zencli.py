@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import time
+
+STARTED = time.perf_counter()
+
+import os
+import sys
+import shlex
+import runpy
+import argparse
+
+# One entry point for the stake helpers.
+#
+#   python3 zencli.py status
+#   python3 zencli.py fleet-status addresses.txt --format csv
+#   python3 zencli.py repl            # keep web3, providers and caches warm between commands
+#
+# Only argparse is imported up front; web3 and friends load when the first
+# command that needs them runs, and stay loaded in repl mode.
+
+STAKE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> (script in this directory, description)
+COMMANDS = {
+    "status": ("status.py", "Show bonded status, era and stake for MY_ADDRESS"),
+    "nominate": ("nominate.py", "Nominate validators and stake 1 ZCX"),
+    "stake": ("stake.py", "Add extra stake (bondExtra)"),
+    "change-commission": ("change-commission.py", "Add stake and set validator commission"),
+    "change-stake-address": ("change-stake-addres.py", "Set the reward payee address"),
+    "set-keys": ("zen.py", "Submit session keys to the KeyManager"),
+    "fleet-status": ("fleet-status.py", "Scan staking status for an address list"),
+    "sign-batch": ("sign-batch.py", "Sign a manifest of staking calls offline"),
+    "broadcast": ("broadcast.py", "Broadcast pre-signed transactions"),
+    "exporter": ("exporter.py", "Run the Prometheus metrics exporter"),
+    "logs": ("log-follow.py", "Follow node logs as block heights, peers and errors"),
+    "sync": ("sync-tracker.py", "Track sync rate, ETA and stalls for local nodes"),
+    "index": ("indexer.py", "Index staking events and query account history"),
+    "rewards": ("rewards.py", "Per-era stake, exposure and payouts over historyDepth"),
+    "plan": ("validator_planner.py", "Rank validators and pick nomination targets"),
+    "bulk": ("bulk-stake.py", "Run a manifest of staking operations across many accounts"),
+    "rotate-keys": ("rotate-keys.py", "Rotate session keys on a node fleet and submit setKeys"),
+    "key-agent": ("key-agent.py", "Unlock keystores once and sign for the other commands"),
+    "journal": ("tx_journal.py", "List or abandon unfinished journaled transaction runs"),
+    "supervise": ("node-supervisor.py", "Start, watch and restart the node container on stalls"),
+}
+
+# Modules worth loading before the first command in repl mode
+WARM_MODULES = ("web3", "client", "nonce_manager", "receipts", "fees", "chain_cache")
+
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+# Run one helper script in this process. The scripts are plain top-level
+# programs, so they run with their own argv and SystemExit is caught.
+def run_command(name, argv):
+    script, _ = COMMANDS[name]
+    path = os.path.join(STAKE_DIR, script)
+    saved_argv = sys.argv
+    sys.argv = [path] + list(argv)
+    started = time.perf_counter()
+    exit_code = 0
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except KeyboardInterrupt:
+        print()
+        exit_code = 130
+    except Exception as e:
+        # A failing script (node unreachable, rejected broadcast) must not end the session
+        print(f"{name} failed: {type(e).__name__}: {e}")
+        exit_code = 1
+    finally:
+        sys.argv = saved_argv
+    return exit_code, elapsed_ms(started)
+
+
+def print_commands():
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<22}{description}")
+
+
+def warm_up():
+    started = time.perf_counter()
+    if STAKE_DIR not in sys.path:
+        sys.path.insert(0, STAKE_DIR)
+    for module in WARM_MODULES:
+        __import__(module)
+
+    # Open the pooled provider now so the first command skips the TLS handshake
+    from client import get_web3
+    try:
+        get_web3().eth.chain_id
+    except Exception as e:
+        print(f"RPC not reachable yet: {e}")
+    return elapsed_ms(started)
+
+
+def repl():
+    warm_ms = warm_up()
+    print(f"ZenChain CLI ready in {elapsed_ms(STARTED):.0f} ms (imports and connection warm-up {warm_ms:.0f} ms)")
+    print("Type 'help' for commands, 'exit' to quit.")
+
+    while True:
+        try:
+            line = input("zen> ")
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return 0
+
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            print(f"Invalid input: {e}")
+            continue
+        if not words:
+            continue
+
+        name, argv = words[0], words[1:]
+        if name in ("exit", "quit"):
+            return 0
+        if name == "help":
+            print_commands()
+            continue
+        if name not in COMMANDS:
+            print(f"Unknown command: {name} (type 'help')")
+            continue
+
+        exit_code, took_ms = run_command(name, argv)
+        status = "ok" if exit_code == 0 else f"exit {exit_code}"
+        print(f"[{name} {status} in {took_ms:.0f} ms]")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="ZenChain staking helpers",
+        epilog="Commands: repl, " + ", ".join(COMMANDS),
+    )
+    parser.add_argument("command", help="command to run, or 'repl' for an interactive session")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments passed to the command")
+    parser.add_argument("--timing", action="store_true", help="print startup and command time")
+    args = parser.parse_args()
+
+    if args.command == "repl":
+        sys.exit(repl())
+
+    if args.command not in COMMANDS:
+        print(f"Unknown command: {args.command}")
+        print_commands()
+        sys.exit(2)
+
+    ready_ms = elapsed_ms(STARTED)
+    exit_code, took_ms = run_command(args.command, args.args)
+    if args.timing:
+        print(f"[startup {ready_ms:.0f} ms, {args.command} {took_ms:.0f} ms]", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,132 @@ print_error() {
 priv_data_file="/root/chain-data/chains/priv-data.txt"
 
 
+# Helper scripts are fetched from here (override with ZENCHAIN_SCRIPT_BASE_URL, e.g. a local HTTP stand-in)
+stake_repo_url="${ZENCHAIN_SCRIPT_BASE_URL:-https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake}"
+
+# Local content-addressed cache for the helper scripts
+script_cache_dir="${ZENCHAIN_SCRIPT_CACHE:-$HOME/.cache/zenchain/scripts}"
+# Seconds between update checks for a cached script
+script_check_interval="${ZENCHAIN_SCRIPT_CHECK_INTERVAL:-3600}"
+# Pinned bundle (tar.gz of helper scripts) to run fully offline with ZENCHAIN_OFFLINE=1
+script_bundle="${ZENCHAIN_SCRIPT_BUNDLE:-}"
+
+# Shared Python modules imported by the stake scripts
+shared_py_modules="client.py staking_abi.py rpc_router.py nonce_manager.py receipts.py fees.py chain_cache.py validator_planner.py key_client.py simulate.py tx_journal.py"
+
+
+# Function to store a file in the script cache under its sha256 and point the name at it
+cache_store_script() {
+    local name="$1" file="$2" hash
+    hash=$(sha256sum "$file" | cut -d' ' -f1)
+    mkdir -p "$script_cache_dir/objects" "$script_cache_dir/refs"
+    if [ ! -f "$script_cache_dir/objects/$hash" ]; then
+        mv "$file" "$script_cache_dir/objects/$hash"
+    else
+        rm -f "$file"
+    fi
+    echo "$hash" > "$script_cache_dir/refs/$name"
+}
+
+# Function to load every script from the pinned bundle into the cache
+import_script_bundle() {
+    local bundle_dir file
+    if [ -z "$script_bundle" ] || [ ! -f "$script_bundle" ]; then
+        return 1
+    fi
+    bundle_dir=$(mktemp -d)
+    tar -xzf "$script_bundle" -C "$bundle_dir" || { rm -rf "$bundle_dir"; return 1; }
+    for file in "$bundle_dir"/*; do
+        [ -f "$file" ] && cache_store_script "$(basename "$file")" "$file"
+    done
+    rm -rf "$bundle_dir"
+}
+
+# Function to write every cached script into a bundle for offline hosts
+export_script_bundle() {
+    local out="$1" bundle_dir name
+    bundle_dir=$(mktemp -d)
+    for ref in "$script_cache_dir"/refs/*; do
+        name=$(basename "$ref")
+        cp "$script_cache_dir/objects/$(cat "$ref")" "$bundle_dir/$name"
+    done
+    tar -czf "$out" -C "$bundle_dir" .
+    rm -rf "$bundle_dir"
+    print_info "Script bundle written to $out"
+}
+
+# Function to fetch a helper script through the cache and copy it to a directory.
+# The network is asked at most once per script_check_interval, with a conditional
+# request (If-None-Match / If-Modified-Since); a failed check falls back to the
+# cached copy, then to the pinned bundle.
+fetch_script() {
+    local name="$1" dest="${2:-.}"
+    local ref="$script_cache_dir/refs/$name"
+    local meta="$script_cache_dir/meta"
+    local now last_check tmp http_code
+
+    mkdir -p "$meta"
+
+    if [ "$ZENCHAIN_OFFLINE" = "1" ]; then
+        [ -f "$ref" ] || import_script_bundle
+        if [ ! -f "$ref" ]; then
+            print_error "$name is not in the script cache or the pinned bundle."
+            return 1
+        fi
+    else
+        now=$(date +%s)
+        last_check=$(cat "$meta/$name.checked" 2>/dev/null || echo 0)
+        if [ ! -f "$ref" ] || [ $((now - last_check)) -ge "$script_check_interval" ]; then
+            tmp=$(mktemp)
+            # Conditional request with the validators the server sent last time
+            local conditions=()
+            if [ -f "$ref" ]; then
+                [ -s "$meta/$name.etag" ] && conditions+=(-H "If-None-Match: $(cat "$meta/$name.etag")")
+                [ -s "$meta/$name.modified" ] && conditions+=(-H "If-Modified-Since: $(cat "$meta/$name.modified")")
+            fi
+            http_code=$(curl -s -L --max-time 20 -o "$tmp" -D "$tmp.headers" -w '%{http_code}' \
+                "${conditions[@]}" "$stake_repo_url/$name")
+
+            if [ "$http_code" = "200" ]; then
+                cache_store_script "$name" "$tmp"
+                grep -i '^etag:' "$tmp.headers" | tail -1 | cut -d' ' -f2- | tr -d '\r' > "$meta/$name.etag"
+                grep -i '^last-modified:' "$tmp.headers" | tail -1 | cut -d' ' -f2- | tr -d '\r' > "$meta/$name.modified"
+                echo "$now" > "$meta/$name.checked"
+            elif [ "$http_code" = "304" ]; then
+                rm -f "$tmp"
+                echo "$now" > "$meta/$name.checked"
+            else
+                rm -f "$tmp" "$tmp.headers"
+                [ -f "$ref" ] || import_script_bundle
+                if [ ! -f "$ref" ]; then
+                    print_error "Failed to download $name (HTTP $http_code) and no cached copy exists."
+                    return 1
+                fi
+                print_info "Could not check $name for updates (HTTP $http_code), using cached copy."
+            fi
+            rm -f "$tmp.headers"
+        fi
+    fi
+
+    cp "$script_cache_dir/objects/$(cat "$ref")" "$dest/$name"
+}
+
+# Function to copy the shared Python modules next to the stake scripts
+download_shared_modules() {
+    for module in $shared_py_modules; do
+        if ! fetch_script "$module" .; then
+            print_error "Failed to download $module."
+            exit 1
+        fi
+    done
+}
+
+# Function to remove the shared Python modules after execution
+remove_shared_modules() {
+    rm -f $shared_py_modules
+}
+
+
 
 install_dependency() {
     print_info "<=========== Install Dependency ==============>"
@@ -170,6 +296,14 @@ run_node() {
         exit 1
     fi
 
+    # Wait until the node has peers and imports blocks (see node-supervisor.py)
+    if fetch_script node-supervisor.py .; then
+        download_shared_modules
+        python3 node-supervisor.py --once --node-name "$NODE_NAME"
+        rm -f node-supervisor.py
+        remove_shared_modules
+    fi
+
     # Return to the menu after the node setup
     node_menu
 }
@@ -193,7 +327,17 @@ sync_status() {
 
     if [ "$is_syncing" == "true" ]; then
         print_info "isSyncing: true"
-        print_info "Your node is still syncing."
+        print_info "Your node is still syncing. Measuring sync rate for 30 seconds..."
+
+        # Sample system_syncState to get blocks/sec, ETA and stall warnings
+        if fetch_script sync-tracker.py .; then
+            download_shared_modules
+            python3 sync-tracker.py --node http://localhost:9944 --interval 5 --count 7
+            rm -f sync-tracker.py
+            remove_shared_modules
+        else
+            print_error "Failed to download sync-tracker.py."
+        fi
     elif [ "$is_syncing" == "false" ]; then
         print_info "isSyncing: false"
         print_info "Your node is fully synced."
@@ -291,11 +435,11 @@ zen_key() {
     print_info "Loaded MY_ADDRESS, PRIVATE_KEY, and SESSION_KEYS successfully."
 
     # Download the zen.py file from the GitHub repository
-    zen_py_url="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/zen.py"
+    zen_py_url="$stake_repo_url/zen.py"
     print_info "Downloading zen.py from: $zen_py_url"
     
-    # Download zen.py using curl and save it to a local file
-    curl -o zen.py "$zen_py_url"
+    # Fetch zen.py through the local script cache (see fetch_script)
+    fetch_script zen.py .
     
     if [ ! -f "zen.py" ]; then
         print_error "Failed to download zen.py."
@@ -303,6 +447,9 @@ zen_key() {
     fi
     print_info "zen.py downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute zen.py with Python, passing the required variables as arguments
     print_info "Executing zen.py with the provided keys..."
     python3 zen.py
@@ -316,16 +463,9 @@ zen_key() {
 
     # Remove zen.py after execution
     rm -f zen.py
+    remove_shared_modules
     print_info "zen.py removed after execution."
 
-    # Now Docker stop
-    print_info "Stopping the zenchain Docker container..."
-    docker stop zenchain
-
-    # Remove docker 
-    print_info "Removing the zenchain Docker container..."
-    docker rm zenchain
-
     # Load NODE_NAME from priv-data.txt
     if grep -q '^NODE_NAME=' "$priv_data_file"; then
         NODE_NAME=$(grep '^NODE_NAME=' "$priv_data_file" | cut -d'=' -f2)
@@ -334,28 +474,21 @@ zen_key() {
         echo "NODE_NAME=$NODE_NAME" >> "$priv_data_file"  # Save NODE_NAME
     fi
 
-    # Restart docker 
+    # Restart the container and return as soon as the node has peers and imports blocks.
+    # The keys are set, so the unsafe RPC methods (author_*) are closed again.
     print_info "Restarting the zenchain Docker container..."
-    docker run \
-    -d \
-    --name zenchain \
-    -p 30333:30333 \
-    -p 9944:9944 \
-    -v "$HOME/chain-data:/chain-data" \
-    ghcr.io/zenchain-protocol/zenchain-testnet:latest \
-    ./usr/bin/zenchain-node \
-    --base-path=/chain-data \
-    --validator \
-    --name="$NODE_NAME" \
-    --bootnodes=/dns4/node-7242611732906999808-0.p2p.onfinality.io/tcp/26266/p2p/12D3KooWLAH3GejHmmchsvJpwDYkvacrBeAQbJrip5oZSymx5yrE \
-    --chain=zenchain_testnet
-
-   # Check if Docker command was successful
-   if [ $? -eq 0 ]; then
-      print_info "ZenChain Docker container restarted successfully."
-   else
-      print_error "Failed to restart ZenChain Docker container."
-   fi
+    if fetch_script node-supervisor.py .; then
+        download_shared_modules
+        if python3 node-supervisor.py --restart --once --safe-rpc --node-name "$NODE_NAME"; then
+            print_info "ZenChain Docker container restarted successfully."
+        else
+            print_error "Failed to restart ZenChain Docker container."
+        fi
+        rm -f node-supervisor.py
+        remove_shared_modules
+    else
+        print_error "Failed to download node-supervisor.py."
+    fi
 
    
     # Call the node_menu function
@@ -371,17 +504,20 @@ logs_checker() {
     # Docker container name for ZenChain
     CONTAINER_NAME="zenchain"
 
-    # Use docker logs command to retrieve logs from the specified container
-    logs=$(docker logs $CONTAINER_NAME 2>&1)
+    # Stream the logs through log-follow.py: it keeps only the last lines in memory
+    # and reports block heights, peers, import rate and errors
+    if ! fetch_script log-follow.py .; then
+        print_error "Failed to download log-follow.py."
+        node_menu
+        return
+    fi
 
-    if [ $? -eq 0 ]; then
-        # Display the logs
-        echo "$logs"
+    if python3 log-follow.py --container "$CONTAINER_NAME" --tail 1000 --lines 30; then
         print_info "<=========== End of Logs ==============>"
     else
         print_error "Failed to retrieve logs for container: $CONTAINER_NAME"
-        print_error "Error: $logs"
     fi
+    rm -f log-follow.py
 
     # Call the node_menu function
     node_menu
@@ -394,11 +530,11 @@ status(){
 print_info "<=========== Validator Status ZenChain Node ==============>"
 
     # Download the status.py file from the GitHub repository
-    zen_py_url2="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/status.py"
+    zen_py_url2="$stake_repo_url/status.py"
     print_info "Downloading status.py from: $zen_py_url2"
     
-    # Download status.py using curl and save it to a local file
-    curl -o status.py "$zen_py_url2"
+    # Fetch status.py through the local script cache (see fetch_script)
+    fetch_script status.py .
     
     if [ ! -f "status.py" ]; then
         print_error "Failed to download validator_status."
@@ -406,6 +542,9 @@ print_info "<=========== Validator Status ZenChain Node ==============>"
     fi
     print_info "status.py downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute status with Python, passing the required variables as arguments
     print_info "Executing status..."
     python3 status.py 
@@ -419,6 +558,7 @@ print_info "<=========== Validator Status ZenChain Node ==============>"
 
     # Remove status after execution
     rm -f status.py
+    remove_shared_modules
     print_info "status.py removed after execution."
 
 
@@ -434,11 +574,11 @@ nominator(){
 print_info "<=========== Nominator ZenChain Node ==============>"
 
     # Download the nominate.py file from the GitHub repository
-    zen_py_url3="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/nominate.py"
+    zen_py_url3="$stake_repo_url/nominate.py"
     print_info "Downloading nominate.py from: $zen_py_url3"
     
-    # Download nominate.py using curl and save it to a local file
-    curl -o nominate.py "$zen_py_url3"
+    # Fetch nominate.py through the local script cache (see fetch_script)
+    fetch_script nominate.py .
     
     if [ ! -f "nominate.py" ]; then
         print_error "Failed to download nominate.py."
@@ -446,6 +586,9 @@ print_info "<=========== Nominator ZenChain Node ==============>"
     fi
     print_info "nominate.py downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute status with Python, passing the required variables as arguments
     print_info "Executing nominate..."
     python3 nominate.py
@@ -459,6 +602,7 @@ print_info "<=========== Nominator ZenChain Node ==============>"
 
     # Remove nominate after execution
     rm -f nominate.py
+    remove_shared_modules
     print_info "nominate.py removed after execution."
 
 
@@ -476,11 +620,11 @@ staking() {
     print_info "<=========== Staking ZCX ==============>"
 
     # Download the stake.py file from the GitHub repository
-    zen_py_url3="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/stake.py"
+    zen_py_url3="$stake_repo_url/stake.py"
     print_info "Downloading stake.py from: $zen_py_url3"
     
-    # Download stake.py using curl and save it to a local file
-    curl -o stake.py "$zen_py_url3"
+    # Fetch stake.py through the local script cache (see fetch_script)
+    fetch_script stake.py .
     
     if [ ! -f "stake.py" ]; then
         print_error "Failed to download stake."
@@ -488,6 +632,9 @@ staking() {
     fi
     print_info "stake.py downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute stake with Python, passing the required variables as arguments
     print_info "Executing stake..."
     python3 stake.py
@@ -501,6 +648,7 @@ staking() {
 
     # Remove stake.py after execution
     rm -f stake.py
+    remove_shared_modules
     print_info "stake.py removed after execution."
 
 
@@ -513,11 +661,11 @@ change_commission(){
     print_info "<=========== Change-Commission ==============>"
 
     # Download the stake.py file from the GitHub repository
-    zen_py_url3="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/change-commission.py"
+    zen_py_url3="$stake_repo_url/change-commission.py"
     print_info "Downloading change-commission.py from: $zen_py_url3"
     
-    # Download stake.py using curl and save it to a local file
-    curl -o change-commission.py "$zen_py_url3"
+    # Fetch stake.py through the local script cache (see fetch_script)
+    fetch_script change-commission.py .
     
     if [ ! -f "change-commission.py" ]; then
         print_error "Failed to download change-commission."
@@ -525,6 +673,9 @@ change_commission(){
     fi
     print_info "change-commission downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute stake with Python, passing the required variables as arguments
     print_info "Executing change-commission..."
     python3 change-commission.py
@@ -538,6 +689,7 @@ change_commission(){
 
     # Remove change-commission after execution
     rm -f change-commission.py
+    remove_shared_modules
     print_info "change-commission.py removed after execution."
 
 
@@ -550,11 +702,11 @@ change_stake_addres(){
     print_info "<=========== Staking ZCX ==============>"
 
     # Download the stake.py file from the GitHub repository
-    zen_py_url3="https://raw.githubusercontent.com/CryptoBureau01/zenChain/main/stake/change-stake-addres.py"
+    zen_py_url3="$stake_repo_url/change-stake-addres.py"
     print_info "Downloading change-stake-addres from: $zen_py_url3"
     
-    # Download change-stake-addres.py using curl and save it to a local file
-    curl -o change-stake-addres.py "$zen_py_url3"
+    # Fetch change-stake-addres.py through the local script cache (see fetch_script)
+    fetch_script change-stake-addres.py .
     
     if [ ! -f "change-stake-addres.py" ]; then
         print_error "Failed to download change-stake-addres.py."
@@ -562,6 +714,9 @@ change_stake_addres(){
     fi
     print_info "change-stake-addres.py downloaded successfully."
 
+    # Download the shared Python modules the script imports
+    download_shared_modules
+
     # Execute stake with Python, passing the required variables as arguments
     print_info "Executing change-stake-addres..."
     python3 change-stake-addres.py
@@ -575,6 +730,7 @@ change_stake_addres(){
 
     # Remove change-stake-addres.py after execution
     rm -f change-stake-addres.py
+    remove_shared_modules
     print_info "stake.py removed after execution."
 
 
@@ -584,6 +740,31 @@ change_stake_addres(){
 
 
 
+# Scripts run by the resident CLI (zencli.py)
+cli_dir="$HOME/zenchain-cli"
+cli_py_scripts="zencli.py status.py nominate.py stake.py change-commission.py change-stake-addres.py zen.py fleet-status.py sign-batch.py broadcast.py exporter.py log-follow.py sync-tracker.py indexer.py rewards.py bulk-stake.py rotate-keys.py key-agent.py node-supervisor.py"
+
+# Function to start the resident ZenChain CLI (web3 stays loaded between commands)
+zen_cli() {
+    print_info "<=========== ZenChain CLI ==============>"
+
+    mkdir -p "$cli_dir"
+    for script in $cli_py_scripts $shared_py_modules; do
+        if ! fetch_script "$script" "$cli_dir"; then
+            print_error "Failed to download $script."
+            exit 1
+        fi
+    done
+
+    print_info "Starting ZenChain CLI. Type 'help' for commands, 'exit' to return to the menu."
+    python3 "$cli_dir/zencli.py" repl
+
+    # Call the node_menu function
+    node_menu
+}
+
+
+
 # Function to display menu and handle user input
 node_menu() {
     print_info "====================================="
@@ -602,7 +783,8 @@ node_menu() {
     print_info "10. Stake-ZCX"
     print_info "11. Change-Commission"
     print_info "12. Change-stake-Addres"
-    print_info "13. Exit"
+    print_info "13. ZenChain-CLI"
+    print_info "14. Exit"
     print_info ""
     print_info "==============================="
     print_info " Created By : CryptoBureauMaster "
@@ -610,7 +792,7 @@ node_menu() {
     print_info ""  
 
     # Prompt the user for input
-    read -p "Enter your choice (1 to 13): " user_choice
+    read -p "Enter your choice (1 to 14): " user_choice
     
     # Handle user input
     case $user_choice in
@@ -651,15 +833,24 @@ node_menu() {
             change_stake_addres
             ;;
         13)
+            zen_cli
+            ;;
+        14)
             print_info "Exiting the script. Goodbye!"
             exit 0
             ;;
         *)
-            print_error "Invalid choice. Please enter 1-13"
+            print_error "Invalid choice. Please enter 1-14"
             node_menu # Re-prompt if invalid input
             ;;
     esac
 }
 
+# Write the cached helper scripts to a bundle for offline hosts: ./zenchain.sh --export-bundle scripts.tar.gz
+if [ "$1" = "--export-bundle" ]; then
+    export_script_bundle "${2:-zenchain-scripts.tar.gz}"
+    exit 0
+fi
+
 # Call the node_menu function
 node_menu